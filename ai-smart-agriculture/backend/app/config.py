@@ -2,7 +2,7 @@
 Configuration settings for the Smart Agriculture Assistant.
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 
@@ -11,6 +11,8 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./agriculture.db"
+    # Derived from DATABASE_URL (e.g. sqlite+aiosqlite) unless set
+    ASYNC_DATABASE_URL: Optional[str] = None
     
     # Application
     APP_NAME: str = "AI Smart Agriculture Assistant"
@@ -27,6 +29,74 @@ class Settings(BaseSettings):
     # ML Models
     MODEL_PATH: str = "./ml_models/"
     UPLOAD_DIR: str = "./uploads/"
+    # Keep uploaded originals in UPLOAD_DIR (written after the response)
+    PERSIST_UPLOADS: bool = True
+    # Uploads are streamed: bytes per file at most, and bytes per file held
+    # in memory before the buffer spills to a temporary file
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+    UPLOAD_SPOOL_SIZE: int = 1024 * 1024
+    MAX_BATCH_UPLOAD_FILES: int = 50
+    # Image features cached by upload hash: in-memory LRU entries, and a
+    # directory shared across restarts and workers (empty for memory only),
+    # holding at most FEATURE_CACHE_DISK_ENTRIES files (0 for no limit)
+    FEATURE_CACHE_SIZE: int = 10000
+    FEATURE_CACHE_DIR: str = "./feature_cache/"
+    FEATURE_CACHE_DISK_ENTRIES: int = 100000
+    # Uploaded images and on-disk cached features unused for this long are
+    # removed by python manage.py cleanup-files
+    FILE_RETENTION_HOURS: int = 24
+    SOIL_INFERENCE_ENGINE: str = "compiled"  # compiled or sklearn
+    # /predict/soil/sweep: largest grid, and cells scored per chunk
+    SOIL_SWEEP_MAX_CELLS: int = 5_000_000
+    SOIL_SWEEP_CHUNK_SIZE: int = 16384
+    # Known locations (names, aliases, coordinates, climate) for weather
+    GAZETTEER_PATH: str = "./ml_models/data/locations.csv"
+    # Pre-simulated daily weather per location (python manage.py
+    # generate-weather-history), served by /predict/weather/history
+    WEATHER_HISTORY_DIR: str = "./weather_history/"
+    # Disease model: "heuristic" (feature rules) or "cnn" (NumPy CNN served
+    # through a micro-batching scheduler: up to DISEASE_BATCH_MAX_SIZE
+    # concurrent images per forward pass, waiting at most
+    # DISEASE_BATCH_MAX_WAIT_MS for a batch to fill)
+    DISEASE_MODEL: str = "heuristic"
+    DISEASE_BATCH_MAX_SIZE: int = 16
+    DISEASE_BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Inference executor: threads for GIL-releasing work, processes for
+    # pure-Python/PIL work (0 runs it on the thread pool instead)
+    INFERENCE_THREAD_WORKERS: int = 4
+    INFERENCE_PROCESS_WORKERS: int = 2
+    
+    # Prediction log: "buffered" batches writes in the background,
+    # "sync" commits each prediction before responding
+    PREDICTION_LOG_MODE: str = "buffered"
+    PREDICTION_LOG_BATCH_SIZE: int = 500
+    PREDICTION_LOG_FLUSH_INTERVAL: float = 0.5  # seconds
+    PREDICTION_LOG_MAX_PENDING: int = 10000
+    # A failed flush is retried with doubling delays before it is dropped
+    PREDICTION_LOG_MAX_RETRIES: int = 5
+    PREDICTION_LOG_RETRY_DELAY: float = 0.5  # seconds, first retry
+    
+    # Weather advisories are cached per location for WEATHER_CACHE_TTL
+    # seconds (clock-aligned windows), so repeated requests see the same
+    # numbers; at most WEATHER_CACHE_SIZE entries (0 disables the cache).
+    # Hits are stored in prediction history only if WEATHER_CACHE_LOG_HITS
+    WEATHER_CACHE_SIZE: int = 1000
+    WEATHER_CACHE_TTL: int = 900
+    WEATHER_CACHE_LOG_HITS: bool = False
+    
+    # Longest /predict/weather/forecast horizon, in days
+    WEATHER_FORECAST_MAX_DAYS: int = 90
+    
+    # Records fetched per round trip by /predict/history/export
+    HISTORY_EXPORT_BATCH_SIZE: int = 2000
+    
+    # /predict/statistics trend series: buckets shown by default and at most
+    STATISTICS_DEFAULT_BUCKETS: int = 30
+    STATISTICS_MAX_BUCKETS: int = 2000
+    
+    # Seconds clients are told to wait while models warm up
+    READY_RETRY_AFTER: int = 5
     
     # Create upload directory if it doesn't exist
     def __init__(self, **kwargs):
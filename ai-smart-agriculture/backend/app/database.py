@@ -2,11 +2,31 @@
 Database configuration and session management.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-# Create database engine
+# Async drivers for the synchronous URL schemes we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Swap a synchronous database URL onto its async driver."""
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Synchronous engine, used for schema setup and CLI tools
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
@@ -16,6 +36,16 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine, used by the API so database I/O never blocks the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL),
+    echo=settings.DEBUG
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -32,6 +62,64 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency function to get an async database session.
+    Yields an AsyncSession and closes it after use.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Bump when upgrade_schema gains a new data migration step
+SCHEMA_VERSION = 1
+
+
+def upgrade_schema():
+    """
+    Bring an existing database up to the current schema.
+    
+    create_all only creates missing tables, so indexes added to existing
+    tables are created here. SQLite data migrations are tracked with
+    PRAGMA user_version so each runs once.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    if engine.dialect.name != "sqlite":
+        return
+    
+    with engine.begin() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        
+        if version < 1:
+            # Server-default timestamps have no fractional part; pad them so
+            # stored strings sort and compare like the keyset cursors
+            conn.exec_driver_sql(
+                "UPDATE predictions SET created_at = created_at || '.000000' "
+                "WHERE length(created_at) = 19"
+            )
+        
+        if version < SCHEMA_VERSION:
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+    backfill_rollups()
+
+
+def backfill_rollups():
+    """Build statistics rollups once for predictions stored before they existed."""
+    from sqlalchemy import select
+    from app.models import Prediction, PredictionRollup
+    from app.services.rollups import rebuild_rollups
+    
+    with SessionLocal() as db:
+        has_rollups = db.execute(select(PredictionRollup.id).limit(1)).first()
+        has_predictions = db.execute(select(Prediction.id).limit(1)).first()
+        if has_predictions and not has_rollups:
+            rebuild_rollups(db)
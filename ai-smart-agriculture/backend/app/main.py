@@ -2,11 +2,14 @@
 Main FastAPI application for Smart Agriculture Assistant.
 """
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
-from app.database import init_db
+from app.database import init_db, async_engine
 from app.routes import predictions
+from app.routes.predictions import prediction_service, image_processor
+import asyncio
 import logging
 
 # Configure logging
@@ -42,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "Retry-After"],
 )
 
 # Include routers
@@ -61,13 +65,35 @@ async def startup_event():
         logger.error(f"Database initialization failed: {e}")
         raise
     
+    if settings.PREDICTION_LOG_MODE == "buffered":
+        await prediction_service.prediction_log.start()
+    await prediction_service.disease_batcher.start()
+    
+    # Load and warm models without blocking startup; see /ready
+    app.state.model_loader = asyncio.create_task(load_models())
+    
     logger.info("Application startup complete")
 
 
+async def load_models():
+    """Load and warm up ML models in a worker thread."""
+    try:
+        await run_in_threadpool(prediction_service.load_models)
+        logger.info("Models loaded and warmed up")
+    except Exception as e:
+        logger.error(f"Model loading failed: {e}", exc_info=True)
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on application shutdown."""
     logger.info("Shutting down application")
+    # Finish queued inference, then flush buffered predictions before the
+    # engine goes away
+    await prediction_service.disease_batcher.stop()
+    await prediction_service.prediction_log.stop()
+    prediction_service.executor.shutdown()
+    await async_engine.dispose()
 
 
 @app.get("/")
@@ -79,9 +105,17 @@ async def root():
         "status": "running",
         "endpoints": {
             "disease_detection": "/predict/disease",
+            "disease_detection_batch": "/predict/disease/batch",
             "soil_recommendation": "/predict/soil",
+            "soil_recommendation_batch": "/predict/soil/batch",
+            "soil_sweep": "/predict/soil/sweep",
             "weather_advisory": "/predict/weather",
+            "weather_advisory_bulk": "/predict/weather/bulk",
+            "weather_forecast": "/predict/weather/forecast",
+            "weather_history": "/predict/weather/history",
+            "location_search": "/predict/locations",
             "prediction_history": "/predict/history",
+            "prediction_history_export": "/predict/history/export",
             "statistics": "/predict/statistics"
         },
         "docs": "/docs"
@@ -97,6 +131,38 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint; 503 until models are loaded and warmed up."""
+    if prediction_service.ready:
+        return {"status": "ready"}
+    
+    if prediction_service.load_error:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed", "error": prediction_service.load_error}
+        )
+    
+    return JSONResponse(
+        status_code=503,
+        content={"status": "loading"},
+        headers={"Retry-After": str(settings.READY_RETRY_AFTER)}
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics: inference executor, prediction log, batching and caches."""
+    return {
+        "executor": prediction_service.executor.stats(),
+        "prediction_log": prediction_service.prediction_log.stats(),
+        "feature_cache": prediction_service.feature_cache.stats(),
+        "weather_cache": prediction_service.weather_cache.stats(),
+        "disease_batching": prediction_service.disease_batcher.stats(),
+        "uploads": image_processor.stats()
+    }
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
@@ -2,5 +2,6 @@
 Database models package.
 """
 from app.models.prediction import Prediction
+from app.models.prediction_rollup import PredictionRollup
 
-__all__ = ["Prediction"]
+__all__ = ["Prediction", "PredictionRollup"]
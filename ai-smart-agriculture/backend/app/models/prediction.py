@@ -1,22 +1,33 @@
 """
 Prediction database model for storing prediction history.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
 
+def _utcnow() -> datetime:
+    """Current UTC time with microseconds, used as the created_at default."""
+    return datetime.now(timezone.utc)
+
+
 class Prediction(Base):
     """Model for storing prediction records."""
     
     __tablename__ = "predictions"
+    __table_args__ = (
+        # Keyset pagination of history, with and without a type filter
+        Index("ix_predictions_type_created_id", "prediction_type", "created_at", "id"),
+        Index("ix_predictions_created_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     prediction_type = Column(String, nullable=False, index=True)  # disease, soil, weather
     input_data = Column(JSON, nullable=True)  # Store input parameters
     result = Column(JSON, nullable=False)  # Store prediction results
     confidence = Column(Float, nullable=True)  # Confidence score if applicable
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
     
     def __repr__(self):
         return f"<Prediction(id={self.id}, type={self.prediction_type})>"
@@ -0,0 +1,31 @@
+"""
+Rollup counters that keep prediction statistics cheap to read.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from app.database import Base
+
+
+class PredictionRollup(Base):
+    """
+    Prediction count per type per time bucket.
+    
+    Rows are upserted in the same transaction as the predictions they
+    count. bucket_start is a naive UTC datetime; "total" buckets all start
+    at the epoch and hold all-time counts.
+    """
+    
+    __tablename__ = "prediction_rollups"
+    __table_args__ = (
+        UniqueConstraint("prediction_type", "bucket_size", "bucket_start",
+                         name="uq_prediction_rollups_bucket"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    prediction_type = Column(String, nullable=False)  # disease, soil, weather
+    bucket_size = Column(String, nullable=False)  # hour, day, total
+    bucket_start = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return (f"<PredictionRollup(type={self.prediction_type}, "
+                f"{self.bucket_size}={self.bucket_start}, count={self.count})>")
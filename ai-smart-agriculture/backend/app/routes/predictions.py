@@ -1,63 +1,227 @@
 """
 API routes for prediction endpoints.
 """
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.schemas.prediction import (
-    SoilInput, DiseaseResponse, SoilResponse, 
-    WeatherResponse, PredictionHistory
+    SoilInput, SoilBatchInput, SoilSweepInput, DiseaseResponse, DiseaseBatchResponse, SoilResponse,
+    SoilBatchResponse, WeatherResponse, WeatherBulkInput, WeatherBulkResponse,
+    WeatherForecastResponse, WeatherHistoryResponse, LocationSearchResponse, PredictionHistory
 )
-from app.services.prediction_service import PredictionService
+from app.services.prediction_service import EXPORT_FORMATS, PredictionService
+from app.services.rollups import to_utc_naive
 from app.utils.image_processing import ImageProcessor
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.upload_stream import read_image_uploads
 from app.config import settings
-from typing import List
+from datetime import date, datetime
+from typing import List, Optional
 
 router = APIRouter(prefix="/predict", tags=["predictions"])
 
-# Initialize services
+# Initialize services; models are loaded in the background at startup
 prediction_service = PredictionService()
-image_processor = ImageProcessor(settings.UPLOAD_DIR)
+image_processor = ImageProcessor(settings.UPLOAD_DIR, settings.MAX_UPLOAD_SIZE)
 
 
-@router.post("/disease", response_model=DiseaseResponse)
+def require_ready():
+    """Dependency that fails fast with 503 until models are warmed up."""
+    if not prediction_service.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Models are loading. Please retry shortly.",
+            headers={"Retry-After": str(settings.READY_RETRY_AFTER)}
+        )
+
+
+# Documents the multipart body that the disease route parses itself
+DISEASE_UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "Crop image for disease detection"
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+@router.post("/disease", response_model=DiseaseResponse,
+             dependencies=[Depends(require_ready)],
+             openapi_extra=DISEASE_UPLOAD_SCHEMA)
 async def predict_disease(
-    file: UploadFile = File(..., description="Crop image for disease detection"),
-    db: Session = Depends(get_db)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Predict crop disease from uploaded image.
     
     - **file**: Image file of crop leaves or plant
     - Returns disease name, confidence, treatment, and description
+    
+    The upload is streamed into a bounded buffer: oversized bodies get 413
+    as soon as the limit is crossed, and non-image files get 415 from
+    their first bytes. The image is analyzed from memory. When
+    PERSIST_UPLOADS is enabled the original is written to UPLOAD_DIR after
+    the response is sent, named by its SHA-256 so repeats are stored once
+    and reuse cached features.
     """
+    uploads = []
     try:
-        # Validate file type
-        if not image_processor.is_allowed_file(file.filename):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Allowed: {image_processor.ALLOWED_EXTENSIONS}"
-            )
+        uploads, _ = await read_image_uploads(
+            request,
+            max_file_size=settings.MAX_UPLOAD_SIZE,
+            spool_size=settings.UPLOAD_SPOOL_SIZE,
+            allowed_extensions=image_processor.ALLOWED_EXTENSIONS
+        )
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No image file uploaded")
+        
+        upload = uploads[0]
+        file_data = upload.read()
+        image_path = image_processor.reserve_path(upload.filename, upload.size, upload.sha256)
         
-        # Read and save image
-        file_data = await file.read()
-        image_path = image_processor.save_image(file_data, file.filename)
+        # Get prediction straight from the in-memory bytes
+        result = await prediction_service.predict_disease(
+            file_data, db,
+            image_path=image_path if settings.PERSIST_UPLOADS else None,
+            filename=upload.filename,
+            content_hash=upload.sha256
+        )
         
-        # Get prediction
-        result = prediction_service.predict_disease(image_path, db)
+        # Keep the original without making the client wait for the write
+        if settings.PERSIST_UPLOADS:
+            background_tasks.add_task(image_processor.write_image, file_data, image_path)
         
         return result
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    finally:
+        for upload in uploads:
+            upload.close()
+
+
+DISEASE_BATCH_UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                            "description": "Leaf images from one plot"
+                        },
+                        "plot_id": {
+                            "type": "string",
+                            "description": "Optional plot identifier"
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+def store_uploads(uploads: list, image_paths: List[str]):
+    """Background task: write streamed uploads to their paths, then release them."""
+    try:
+        for upload, image_path in zip(uploads, image_paths):
+            image_processor.write_image(upload.file, image_path)
+    finally:
+        for upload in uploads:
+            upload.close()
 
 
-@router.post("/soil", response_model=SoilResponse)
+@router.post("/disease/batch", response_model=DiseaseBatchResponse,
+             dependencies=[Depends(require_ready)],
+             openapi_extra=DISEASE_BATCH_UPLOAD_SCHEMA)
+async def predict_disease_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Predict crop disease for many leaf photos from one plot.
+    
+    - **files**: Image files (up to MAX_BATCH_UPLOAD_FILES)
+    - **plot_id**: Optional plot identifier, echoed and stored with each record
+    
+    Returns one result per image, in upload order, and a plot summary.
+    Unreadable images get an "Unable to Detect" result instead of failing
+    the batch.
+    """
+    uploads = []
+    handed_off = False
+    try:
+        uploads, fields = await read_image_uploads(
+            request,
+            max_file_size=settings.MAX_UPLOAD_SIZE,
+            spool_size=settings.UPLOAD_SPOOL_SIZE,
+            max_files=settings.MAX_BATCH_UPLOAD_FILES,
+            allowed_extensions=image_processor.ALLOWED_EXTENSIONS
+        )
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No image files uploaded")
+        
+        image_paths = [
+            image_processor.reserve_path(upload.filename, upload.size, upload.sha256)
+            for upload in uploads
+        ]
+        
+        result = await prediction_service.predict_disease_batch(
+            uploads, db,
+            image_paths=image_paths if settings.PERSIST_UPLOADS else None,
+            plot_id=fields.get("plot_id") or None
+        )
+        
+        # The background task writes the originals and closes the buffers
+        if settings.PERSIST_UPLOADS:
+            background_tasks.add_task(store_uploads, uploads, image_paths)
+            handed_off = True
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+    finally:
+        if not handed_off:
+            for upload in uploads:
+                upload.close()
+
+
+@router.post("/soil", response_model=SoilResponse,
+             dependencies=[Depends(require_ready)])
 async def predict_soil_recommendation(
     soil_data: SoilInput,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get crop recommendation based on soil parameters.
@@ -71,7 +235,7 @@ async def predict_soil_recommendation(
     Returns recommended crop and fertilizer advice.
     """
     try:
-        result = prediction_service.predict_soil_recommendation(
+        result = await prediction_service.predict_soil_recommendation(
             nitrogen=soil_data.nitrogen,
             phosphorus=soil_data.phosphorus,
             potassium=soil_data.potassium,
@@ -86,10 +250,67 @@ async def predict_soil_recommendation(
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
-@router.get("/weather", response_model=WeatherResponse)
+@router.post("/soil/batch", response_model=SoilBatchResponse,
+             dependencies=[Depends(require_ready)])
+async def predict_soil_recommendation_batch(
+    batch: SoilBatchInput,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get crop recommendations for many soil samples in one call.
+    
+    - **samples**: List of soil parameter objects (same fields as /predict/soil)
+    
+    Returns one recommendation per sample, in input order.
+    """
+    try:
+        results = await prediction_service.predict_soil_recommendations(
+            [sample.model_dump() for sample in batch.samples],
+            db=db
+        )
+        
+        return {"count": len(results), "results": results}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+
+@router.post("/soil/sweep", dependencies=[Depends(require_ready)],
+             response_class=StreamingResponse,
+             responses={200: {"content": {"application/x-ndjson": {}},
+                              "description": "Grid header, one line per cell, then a summary"}})
+async def sweep_soil_recommendation(sweep: SoilSweepInput):
+    """
+    Stream crop recommendations over a grid of soil parameters.
+    
+    - **base**: Soil parameters held fixed
+    - **axes**: Up to five swept parameters, each with start, stop and steps
+    - **include_probabilities**: Include every crop's probability per cell
+    
+    Returns NDJSON: a `grid` line (axis values, shape, crop order), one line
+    per cell in row-major order (last axis fastest) with the swept values,
+    top crop, confidence and probabilities, then a `summary` line with
+    cell counts per crop.
+    """
+    try:
+        grid = prediction_service.soil_sweep_grid(
+            sweep.base.model_dump(),
+            [axis.model_dump() for axis in sweep.axes]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        prediction_service.stream_soil_sweep(grid, sweep.include_probabilities),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/weather", response_model=WeatherResponse,
+            dependencies=[Depends(require_ready)])
 async def get_weather_advisory(
     location: str = Query("Delhi", description="City or location name"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get weather advisory and irrigation recommendations.
@@ -100,26 +321,144 @@ async def get_weather_advisory(
     Note: Weather data is internally simulated for demonstration.
     """
     try:
-        result = prediction_service.get_weather_advisory(location, db)
+        result = await prediction_service.get_weather_advisory(location, db)
         return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Weather fetch failed: {str(e)}")
 
 
+@router.post("/weather/bulk", response_model=WeatherBulkResponse,
+             dependencies=[Depends(require_ready)])
+async def get_weather_advisories(
+    batch: WeatherBulkInput,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get weather advisories for many locations in one call.
+    
+    - **locations**: List of city or location names
+    
+    Returns the advisories twice: as compact parallel columns, and as one
+    object per location, both in input order.
+    """
+    try:
+        return await prediction_service.get_weather_advisories(batch.locations, db)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk weather fetch failed: {str(e)}")
+
+
+@router.get("/weather/forecast", response_model=WeatherForecastResponse,
+            dependencies=[Depends(require_ready)])
+async def get_weather_forecast(
+    location: str = Query("Delhi", description="City or location name"),
+    days: int = Query(7, ge=1, le=settings.WEATHER_FORECAST_MAX_DAYS,
+                      description="Forecast horizon in days")
+):
+    """
+    Get a day-by-day weather forecast with irrigation advice.
+    
+    - **location**: City or location name
+    - **days**: Forecast horizon (1 to WEATHER_FORECAST_MAX_DAYS, default 7)
+    
+    Consecutive days are correlated and each day follows its own month's
+    seasonal pattern. Weather data is internally simulated.
+    """
+    try:
+        return await prediction_service.get_weather_forecast(location, days)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Weather forecast failed: {str(e)}")
+
+
+@router.get("/weather/history", response_model=WeatherHistoryResponse,
+            dependencies=[Depends(require_ready)])
+async def get_weather_history(
+    location: str = Query("Delhi", description="Location name, alias or \"lat,lon\""),
+    from_date: Optional[date] = Query(None, alias="from", description="First day (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day (YYYY-MM-DD)"),
+    gdd_base: float = Query(10.0, ge=0, le=30,
+                            description="Base temperature for growing degree days, Celsius")
+):
+    """
+    Get daily simulated weather history with rainfall and degree-day totals.
+    
+    - **location**: Location name, alias or coordinates (nearest known place)
+    - **from** / **to**: Inclusive date range (default: the last 30 stored days)
+    - **gdd_base**: Base temperature for growing degree days
+    
+    Returns aggregates (rainfall total, rainy days, growing degree days,
+    temperature and humidity) and the daily series as parallel columns.
+    """
+    if prediction_service.weather_history is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Weather history not generated. Run: python manage.py generate-weather-history"
+        )
+    try:
+        return await prediction_service.get_weather_history(location, from_date, to_date, gdd_base)
+        
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Weather history failed: {str(e)}")
+
+
+@router.get("/locations", response_model=LocationSearchResponse,
+            dependencies=[Depends(require_ready)])
+async def search_locations(
+    q: str = Query(..., min_length=1, description="Start of a location name or alias"),
+    limit: int = Query(10, ge=1, le=50, description="Most results")
+):
+    """
+    Autocomplete known locations by name or alias prefix.
+    
+    - **q**: Typed text (case, accents and punctuation are ignored)
+    - **limit**: Most results (1-50)
+    """
+    results = prediction_service.search_locations(q, limit)
+    return {"count": len(results), "results": results}
+
+
+@router.get("/locations/nearest", response_model=LocationSearchResponse,
+            dependencies=[Depends(require_ready)])
+async def nearest_locations(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
+    limit: int = Query(1, ge=1, le=50, description="Locations returned")
+):
+    """
+    Known locations nearest to a point, closest first.
+    
+    The weather endpoints accept "lat,lon" as a location and use the
+    nearest location's climate profile the same way.
+    """
+    results = prediction_service.nearest_locations(lat, lon, limit)
+    return {"count": len(results), "results": results}
+
+
 @router.get("/history", response_model=List[PredictionHistory])
 async def get_prediction_history(
+    response: Response,
     prediction_type: str = Query(None, description="Filter by type: disease, soil, weather"),
     limit: int = Query(50, ge=1, le=100, description="Maximum records to return"),
-    db: Session = Depends(get_db)
+    before: Optional[str] = Query(None, description="Cursor: return records older than this"),
+    after: Optional[str] = Query(None, description="Cursor: return records newer than this"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get prediction history.
+    Get prediction history, newest first.
     
     - **prediction_type**: Optional filter (disease, soil, weather)
     - **limit**: Maximum number of records (1-100)
+    - **before** / **after**: Optional page cursors (not both)
     
-    Returns list of past predictions.
+    Returns list of past predictions. Cursors for the neighbouring pages
+    are returned in the X-Next-Cursor (older) and X-Prev-Cursor (newer)
+    response headers.
     """
     try:
         if prediction_type and prediction_type not in ["disease", "soil", "weather"]:
@@ -128,7 +467,27 @@ async def get_prediction_history(
                 detail="Invalid prediction type. Use: disease, soil, or weather"
             )
         
-        history = prediction_service.get_prediction_history(db, prediction_type, limit)
+        if before and after:
+            raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+        
+        try:
+            before_position = decode_cursor(before) if before else None
+            after_position = decode_cursor(after) if after else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        history = await prediction_service.get_prediction_history(
+            db, prediction_type, limit, before=before_position, after=after_position
+        )
+        
+        if history:
+            first, last = history[0], history[-1]
+            # Older records may follow a full page, and always follow an 'after' page
+            if len(history) == limit or after:
+                response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+            if before or (after and len(history) == limit):
+                response.headers["X-Prev-Cursor"] = encode_cursor(first.created_at, first.id)
+        
         return history
         
     except HTTPException:
@@ -137,16 +496,70 @@ async def get_prediction_history(
         raise HTTPException(status_code=500, detail=f"Failed to fetch history: {str(e)}")
 
 
+@router.get("/history/export", response_class=StreamingResponse,
+            responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}},
+                             "description": "Every matching record, oldest id first"}})
+async def export_prediction_history(
+    export_format: str = Query("ndjson", alias="format", description="Output format: ndjson or csv"),
+    prediction_type: Optional[str] = Query(None, description="Filter by type: disease, soil, weather"),
+    start: Optional[datetime] = Query(None, description="Created at or after (UTC if no offset)"),
+    end: Optional[datetime] = Query(None, description="Created before (UTC if no offset)"),
+    after_id: Optional[int] = Query(None, ge=0, description="Resume after this record id")
+):
+    """
+    Export the full prediction history as a stream.
+    
+    - **format**: ndjson (one record per line) or csv
+    - **prediction_type**: Optional filter (disease, soil, weather)
+    - **start** / **end**: Optional creation time range
+    - **after_id**: Resume an interrupted export after the last id received
+    
+    Records come in ascending id order with their input data and results.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format. Use: ndjson or csv")
+    
+    if prediction_type and prediction_type not in ["disease", "soil", "weather"]:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid prediction type. Use: disease, soil, or weather"
+        )
+    
+    if start and end and to_utc_naive(start) >= to_utc_naive(end):
+        raise HTTPException(status_code=400, detail="'start' must be before 'end'")
+    
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        prediction_service.export_predictions(export_format, prediction_type, start, end, after_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="predictions.{export_format}"'}
+    )
+
+
 @router.get("/statistics")
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(
+    bucket: Optional[str] = Query(None, description="Trend bucket size: hour or day"),
+    start: Optional[datetime] = Query(None, description="Trend range start (UTC if no offset)"),
+    end: Optional[datetime] = Query(None, description="Trend range end (UTC if no offset)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get statistics about predictions.
     
-    Returns counts of different prediction types.
+    - **bucket**: Optional trend bucket size (hour, day)
+    - **start** / **end**: Optional trend range; implies daily buckets
+    
+    Returns counts of different prediction types, plus a zero-filled
+    "trend" series of per-bucket counts when a bucket or range is given.
     """
     try:
-        stats = prediction_service.get_statistics(db)
+        if bucket is None and (start or end):
+            bucket = "day"
+        
+        stats = await prediction_service.get_statistics(db, bucket, start, end)
         return stats
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch statistics: {str(e)}")
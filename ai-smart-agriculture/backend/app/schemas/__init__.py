@@ -3,16 +3,50 @@ Pydantic schemas package for request/response validation.
 """
 from app.schemas.prediction import (
     SoilInput,
+    SoilBatchInput,
+    SoilSweepAxis,
+    SoilSweepInput,
     DiseaseResponse,
+    DiseaseBatchItem,
+    DiseaseBatchSummary,
+    DiseaseBatchResponse,
     SoilResponse,
+    SoilBatchResponse,
     WeatherResponse,
+    WeatherBulkInput,
+    WeatherColumns,
+    WeatherBulkResponse,
+    WeatherForecastDay,
+    WeatherForecastResponse,
+    WeatherHistorySummary,
+    WeatherHistorySeries,
+    WeatherHistoryResponse,
+    LocationMatch,
+    LocationSearchResponse,
     PredictionHistory
 )
 
 __all__ = [
     "SoilInput",
+    "SoilBatchInput",
+    "SoilSweepAxis",
+    "SoilSweepInput",
     "DiseaseResponse",
+    "DiseaseBatchItem",
+    "DiseaseBatchSummary",
+    "DiseaseBatchResponse",
     "SoilResponse",
+    "SoilBatchResponse",
     "WeatherResponse",
+    "WeatherBulkInput",
+    "WeatherColumns",
+    "WeatherBulkResponse",
+    "WeatherForecastDay",
+    "WeatherForecastResponse",
+    "WeatherHistorySummary",
+    "WeatherHistorySeries",
+    "WeatherHistoryResponse",
+    "LocationMatch",
+    "LocationSearchResponse",
     "PredictionHistory"
 ]
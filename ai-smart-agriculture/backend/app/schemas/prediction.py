@@ -1,9 +1,11 @@
 """
 Pydantic schemas for prediction endpoints.
 """
-from pydantic import BaseModel, Field, validator
-from typing import Optional, Any, Dict
-from datetime import datetime
+import math
+from pydantic import BaseModel, Field, model_validator, validator
+from typing import Optional, Any, Dict, List, Literal
+from datetime import date, datetime
+from app.config import settings
 
 
 class SoilInput(BaseModel):
@@ -26,6 +28,80 @@ class SoilInput(BaseModel):
         }
 
 
+class SoilBatchInput(BaseModel):
+    """Input schema for batch soil recommendation."""
+    samples: List[SoilInput] = Field(
+        ..., min_length=1, max_length=10000,
+        description="Soil samples to score (1-10000)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "samples": [
+                    {"nitrogen": 90, "phosphorus": 42, "potassium": 43, "ph": 6.5, "rainfall": 202.5},
+                    {"nitrogen": 110, "phosphorus": 60, "potassium": 40, "ph": 6.8, "rainfall": 75}
+                ]
+            }
+        }
+
+
+class SoilSweepAxis(BaseModel):
+    """One swept soil parameter: `steps` evenly spaced values from start to stop."""
+    parameter: Literal["nitrogen", "phosphorus", "potassium", "ph", "rainfall"]
+    start: float
+    stop: float
+    steps: int = Field(..., ge=1, le=100000, description="Number of values, ends included")
+    
+    @model_validator(mode="after")
+    def check_range(self):
+        """Keep the swept values inside the parameter's SoilInput bounds."""
+        field = SoilInput.model_fields[self.parameter]
+        low = next(m.ge for m in field.metadata if hasattr(m, "ge"))
+        high = next(m.le for m in field.metadata if hasattr(m, "le"))
+        for value in (self.start, self.stop):
+            if not low <= value <= high:
+                raise ValueError(f"{self.parameter} must be between {low} and {high}")
+        return self
+
+
+class SoilSweepInput(BaseModel):
+    """Input schema for a soil what-if sweep."""
+    base: SoilInput = Field(..., description="Values of the parameters not swept")
+    axes: List[SoilSweepAxis] = Field(
+        ..., min_length=1, max_length=5,
+        description="Swept parameters; the last one varies fastest"
+    )
+    include_probabilities: bool = Field(
+        True, description="Emit every crop's probability per cell, not just the top crop"
+    )
+    
+    @model_validator(mode="after")
+    def check_axes(self):
+        """Each parameter can be swept only once, and the grid stays under SOIL_SWEEP_MAX_CELLS."""
+        names = [axis.parameter for axis in self.axes]
+        if len(set(names)) != len(names):
+            raise ValueError("Each soil parameter can be swept only once")
+        cells = math.prod(axis.steps for axis in self.axes)
+        if cells > settings.SOIL_SWEEP_MAX_CELLS:
+            raise ValueError(
+                f"Sweep has {cells} cells, the limit is {settings.SOIL_SWEEP_MAX_CELLS}"
+            )
+        return self
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "base": {"nitrogen": 90, "phosphorus": 42, "potassium": 43, "ph": 6.5, "rainfall": 202.5},
+                "axes": [
+                    {"parameter": "nitrogen", "start": 0, "stop": 200, "steps": 41},
+                    {"parameter": "ph", "start": 4.5, "stop": 8.5, "steps": 41}
+                ],
+                "include_probabilities": True
+            }
+        }
+
+
 class DiseaseResponse(BaseModel):
     """Response schema for disease prediction."""
     disease: str
@@ -46,6 +122,32 @@ class DiseaseResponse(BaseModel):
         }
 
 
+class DiseaseBatchItem(DiseaseResponse):
+    """Per-image result in a batch disease prediction."""
+    filename: str
+
+
+class DiseaseBatchSummary(BaseModel):
+    """Plot-level summary of a batch disease prediction."""
+    total_images: int
+    analyzed_images: int
+    unreadable_images: int
+    disease_counts: Dict[str, int]
+    healthy_fraction: float
+    dominant_disease: Optional[str] = None
+    highest_severity: Optional[str] = None
+    mean_confidence: Optional[float] = None
+    recommended_treatment: Optional[str] = None
+
+
+class DiseaseBatchResponse(BaseModel):
+    """Response schema for batch disease prediction."""
+    count: int
+    plot_id: Optional[str] = None
+    results: List[DiseaseBatchItem]
+    summary: DiseaseBatchSummary
+
+
 class SoilResponse(BaseModel):
     """Response schema for soil recommendation."""
     recommended_crop: str
@@ -64,6 +166,12 @@ class SoilResponse(BaseModel):
         }
 
 
+class SoilBatchResponse(BaseModel):
+    """Response schema for batch soil recommendation."""
+    count: int
+    results: List[SoilResponse]
+
+
 class WeatherResponse(BaseModel):
     """Response schema for weather advisory."""
     location: str
@@ -86,6 +194,104 @@ class WeatherResponse(BaseModel):
         }
 
 
+class WeatherBulkInput(BaseModel):
+    """Input schema for bulk weather advisories."""
+    locations: List[str] = Field(
+        ..., min_length=1, max_length=1000,
+        description="Locations to simulate (1-1000)"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "locations": ["Delhi", "Pune", "Nashik"]
+            }
+        }
+
+
+class WeatherColumns(BaseModel):
+    """Bulk weather advisories as parallel columns, one entry per location."""
+    location: List[str]
+    temperature: List[float]
+    humidity: List[float]
+    rain_prediction: List[str]
+    rain_probability: List[float]
+    irrigation_advice: List[str]
+    farming_tips: List[str]
+
+
+class WeatherBulkResponse(BaseModel):
+    """Response schema for bulk weather advisories."""
+    count: int
+    columns: WeatherColumns
+    results: List[WeatherResponse]
+
+
+class WeatherForecastDay(WeatherResponse):
+    """One day of a weather forecast."""
+    day: int
+    date: date
+    rain_probability: float = Field(..., description="Chance of rain in percent")
+
+
+class WeatherForecastResponse(BaseModel):
+    """Response schema for a multi-day weather forecast."""
+    location: str
+    days: int
+    forecast: List[WeatherForecastDay]
+
+
+class WeatherHistorySummary(BaseModel):
+    """Aggregates over a weather history range."""
+    rainfall_total_mm: float
+    rainy_days: int = Field(..., description="Days with at least 1 mm of rain")
+    max_daily_rainfall_mm: float
+    growing_degree_days: float
+    mean_temperature: float
+    min_temperature: float
+    max_temperature: float
+    mean_humidity: float
+
+
+class WeatherHistorySeries(BaseModel):
+    """Daily weather values as parallel columns, one entry per day."""
+    date: List[date]
+    temp_min: List[float]
+    temp_max: List[float]
+    temp_mean: List[float]
+    humidity: List[float]
+    rainfall: List[float]
+
+
+class WeatherHistoryResponse(BaseModel):
+    """Response schema for daily weather history."""
+    location: str
+    from_date: date = Field(..., alias="from")
+    to_date: date = Field(..., alias="to")
+    days: int
+    gdd_base: float = Field(..., description="Base temperature of growing_degree_days, Celsius")
+    summary: WeatherHistorySummary
+    daily: WeatherHistorySeries
+
+
+class LocationMatch(BaseModel):
+    """A known location and its climate profile."""
+    name: str
+    state: str
+    lat: float
+    lon: float
+    base_temp: float = Field(..., description="Annual average temperature in Celsius")
+    humidity_low: float
+    humidity_high: float
+    distance_km: Optional[float] = None
+
+
+class LocationSearchResponse(BaseModel):
+    """Response schema for location autocomplete and nearest-location queries."""
+    count: int
+    results: List[LocationMatch]
+
+
 class PredictionHistory(BaseModel):
     """Schema for prediction history."""
     id: int
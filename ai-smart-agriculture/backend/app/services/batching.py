@@ -0,0 +1,182 @@
+"""
+Dynamic micro-batching scheduler for batched model inference.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Queued to tell the scheduler to finish the current batch and exit
+_STOP = object()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class MicroBatchScheduler:
+    """
+    Gathers concurrent single-item requests into batches.
+
+    A batch runs as soon as `max_batch_size` items are waiting or
+    `max_wait_ms` milliseconds have passed since the first of them arrived.
+    Each batch is one call of `batch_fn`, run through `runner` (e.g. the
+    inference thread pool), and its results are handed back to the
+    waiting callers in order.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 runner: Callable[..., Awaitable[Any]],
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0,
+                 stats_window: int = 10000):
+        """
+        Initialize the scheduler; call start() from the running event loop.
+
+        Args:
+            batch_fn: Maps a list of items to a list of results of equal length
+            runner: Coroutine function running batch_fn(items) off the event loop
+            max_batch_size: Items per batch at most
+            max_wait_ms: Longest time, in milliseconds, an item waits for a batch to fill
+            stats_window: Recent batches and items kept for the distributions
+        """
+        self.batch_fn = batch_fn
+        self.runner = runner
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self._batch_sizes: deque = deque(maxlen=stats_window)
+        self._queue_waits_ms: deque = deque(maxlen=stats_window)
+
+    @property
+    def running(self) -> bool:
+        """Whether the scheduler is accepting items."""
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        """Start the background batching task."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Run everything still queued, then stop."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result.
+
+        Runs the item as a batch of one when the scheduler is not running.
+
+        Args:
+            item: Input for batch_fn
+
+        Returns:
+            The result batch_fn produced for this item
+
+        Raises:
+            Exception: Whatever batch_fn raised for the batch
+        """
+        if not self.running:
+            return (await self.runner(self.batch_fn, [item]))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        """Collect items into batches and run them until stopped."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                try:
+                    # Items already queued are taken without waiting
+                    entry = self._queue.get_nowait() if remaining <= 0 else \
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[tuple]):
+        """Run one forward pass and resolve the waiting futures."""
+        started = time.perf_counter()
+        for _, _, queued in batch:
+            self._queue_waits_ms.append(1000 * (started - queued))
+        self._batch_sizes.append(len(batch))
+        self.batches += 1
+        self.items += len(batch)
+
+        try:
+            results = await self.runner(self.batch_fn, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch of {len(batch)} returned {len(results)} results")
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"Batch of {len(batch)} failed: {e}", exc_info=True)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # The caller may have been cancelled while waiting
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch-size and queue-wait distributions over the recent window."""
+        sizes = list(self._batch_sizes)
+        waits = list(self._queue_waits_ms)
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "batch_size": {
+                "avg": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+                "p50": _percentile(sizes, 0.5),
+                "p95": _percentile(sizes, 0.95),
+                "histogram": dict(sorted(Counter(sizes).items()))
+            },
+            "queue_wait_ms": {
+                "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p50": round(_percentile(waits, 0.5), 3),
+                "p95": round(_percentile(waits, 0.95), 3),
+                "max": round(max(waits), 3) if waits else 0.0
+            }
+        }
@@ -0,0 +1,125 @@
+"""
+In-process caches shared by the prediction services.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count, with an
+    optional time to live.
+
+    Callers run on the event loop and on executor threads, so every
+    operation takes a lock; none of them do I/O while holding it. Expired
+    entries are dropped when they are next looked up, and count as misses.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid after it is stored (None: forever)
+            clock: Monotonic time source, in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (value, expiry time or None)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key: Hashable) -> tuple:
+        """(found, value) for a live entry; drops it if expired. Needs the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires = entry
+        if expires is not None and self.clock() >= expires:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Hashable, value: Any):
+        """Insert and evict down to capacity. Needs the lock."""
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None, and count the hit or miss."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._store(key, value)
+
+    def setdefault(self, key: Hashable, value: Any) -> Any:
+        """
+        Store a value unless a live one is already cached, atomically.
+
+        When two callers compute a value for the same missing key at once,
+        both get back whichever was stored first.
+
+        Args:
+            key: Cache key
+            value: Value to store if the key is absent or expired
+
+        Returns:
+            The value now cached for the key (`value` itself if stored)
+        """
+        if self.max_entries <= 0:
+            return value
+        with self._lock:
+            found, current = self._lookup(key)
+            if found:
+                return current
+            self._store(key, value)
+            return value
+
+    def clear(self):
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -0,0 +1,177 @@
+"""
+Executor layer that keeps CPU-bound inference off the asyncio event loop.
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict) -> Tuple[float, Any]:
+    """Run fn in a worker process and report the wall-clock time it started."""
+    started = time.time()
+    return started, fn(*args, **kwargs)
+
+
+class _PoolStats:
+    """Thread-safe counters and recent queue wait times for one pool."""
+
+    WINDOW = 1000
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self._waits = deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+
+    def on_submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def on_start(self, wait_seconds: float):
+        with self._lock:
+            self.started += 1
+            self._waits.append(max(0.0, wait_seconds))
+
+    def on_finish(self, failed: bool = False):
+        with self._lock:
+            self.completed += 1
+            if failed:
+                self.failed += 1
+
+    def snapshot(self, exact_start: bool = True) -> Dict[str, Any]:
+        """
+        Current counters and wait-time percentiles.
+
+        Args:
+            exact_start: Starts are recorded when work begins; if False they
+                are only known on completion and queue depth is estimated
+                from the number of workers
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            in_flight = self.submitted - self.completed
+            if exact_start:
+                queue_depth = self.submitted - self.started
+            else:
+                queue_depth = max(0, in_flight - self.workers)
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": in_flight,
+                "queue_depth": queue_depth,
+                "wait_ms_avg": round(1000 * sum(waits) / len(waits), 3) if waits else 0.0,
+                "wait_ms_p95": round(1000 * waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+                "wait_ms_max": round(1000 * waits[-1], 3) if waits else 0.0
+            }
+
+
+class InferenceExecutor:
+    """
+    Thread and process pools for inference work.
+
+    Use the thread pool for work that releases the GIL (NumPy, the compiled
+    forest, blocking database calls) and the process pool for pure-Python
+    or PIL work that would otherwise hold it.
+    """
+
+    def __init__(self, thread_workers: int, process_workers: int = 0,
+                 process_initializer: Optional[Callable] = None):
+        """
+        Initialize executor pools.
+
+        Args:
+            thread_workers: Size of the thread pool
+            process_workers: Size of the process pool; 0 runs process work on threads
+            process_initializer: Called once in every worker process
+        """
+        self.thread_pool = ThreadPoolExecutor(
+            max_workers=thread_workers, thread_name_prefix="inference"
+        )
+        self.process_pool = None
+        if process_workers > 0:
+            # spawn, not fork: the server process already runs threads
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=process_initializer
+            )
+
+        self._thread_stats = _PoolStats(thread_workers)
+        self._process_stats = _PoolStats(process_workers)
+
+    async def run_in_thread(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the thread pool and await the result."""
+        stats = self._thread_stats
+        submitted = time.time()
+
+        def call():
+            stats.on_start(time.time() - submitted)
+            return fn(*args, **kwargs)
+
+        stats.on_submit()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.thread_pool, call)
+        except Exception:
+            stats.on_finish(failed=True)
+            raise
+
+        stats.on_finish()
+        return result
+
+    async def run_in_process(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the process pool and await the result.
+
+        fn and its arguments must be picklable. Falls back to the thread
+        pool when no process workers are configured.
+        """
+        if self.process_pool is None:
+            return await self.run_in_thread(fn, *args, **kwargs)
+
+        stats = self._process_stats
+        submitted = time.time()
+        stats.on_submit()
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(
+                self.process_pool, functools.partial(_timed_call, fn, args, kwargs)
+            )
+        except Exception:
+            stats.on_finish(failed=True)
+            raise
+
+        stats.on_start(started - submitted)
+        stats.on_finish()
+        return result
+
+    def warm_up_processes(self):
+        """Start every worker process now instead of on first use."""
+        if self.process_pool is None:
+            return
+        futures = [self.process_pool.submit(time.sleep, 0.05)
+                   for _ in range(self._process_stats.workers)]
+        for future in futures:
+            future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and wait-time statistics per pool."""
+        return {
+            "thread_pool": self._thread_stats.snapshot(),
+            "process_pool": (self._process_stats.snapshot(exact_start=False)
+                             if self.process_pool else None)
+        }
+
+    def shutdown(self):
+        """Stop both pools, letting running tasks finish."""
+        self.thread_pool.shutdown(wait=True, cancel_futures=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,201 @@
+"""
+Content-addressed cache of image feature vectors.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from app.services.cache import LRUCache
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureCache:
+    """
+    Feature vectors keyed by the SHA-256 of the uploaded bytes.
+
+    Lookups check an in-memory LRU first and then a directory of small
+    JSON files, one per hash, which survives restarts and is shared by
+    every worker pointing at the same directory. Entries are namespaced by
+    feature version, so a changed feature extractor never reads stale data.
+    Disk entries are touched whenever they are read or stored again, and
+    cleanup_old_files ages them out like uploaded images. The disk store
+    is also capped at `max_disk_entries`: once a write takes it over the
+    cap, the least recently used tenth is removed.
+    """
+
+    # Share of max_disk_entries removed when the disk store is trimmed
+    TRIM_FRACTION = 0.1
+
+    def __init__(self, directory: Optional[str], max_entries: int, feature_version: int,
+                 max_disk_entries: int = 0):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: On-disk store root, or None/empty for memory only
+            max_entries: In-memory LRU capacity
+            feature_version: Version of the feature extractor
+            max_disk_entries: On-disk capacity; 0 for no limit
+        """
+        self.memory = LRUCache(max_entries)
+        self.max_disk_entries = max_disk_entries
+        self.directory = None
+        if directory:
+            self.directory = os.path.join(directory, f"v{feature_version}")
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._trim_lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.disk_evictions = 0
+        # Other workers write to the same directory, so this is an estimate,
+        # corrected by every trim
+        self._disk_entries = 0
+        if self.directory and max_disk_entries:
+            self._disk_entries = sum(1 for _ in self._entries())
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _entries(self) -> Iterator[os.DirEntry]:
+        """Every stored entry file, shard by shard."""
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".json") and entry.is_file():
+                        yield entry
+
+    def get(self, digest: str, upload_size: int = 0) -> Optional[Dict[str, float]]:
+        """
+        Look up the features of an upload.
+
+        Args:
+            digest: Hex SHA-256 of the upload
+            upload_size: Upload size in bytes, counted as saved work on a hit
+
+        Returns:
+            Cached feature dictionary, or None
+        """
+        features = self.memory.get(digest)
+        if features is None and self.directory:
+            path = self._path(digest)
+            try:
+                with open(path) as f:
+                    features = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                features = None
+            if features is not None:
+                self.memory.put(digest, features)
+                with self._lock:
+                    self.disk_hits += 1
+
+        with self._lock:
+            if features is None:
+                self.misses += 1
+            else:
+                self.bytes_saved += upload_size
+        return features
+
+    def put(self, digest: str, features: Dict[str, float]):
+        """
+        Store the features of an upload in memory and on disk.
+
+        Args:
+            digest: Hex SHA-256 of the upload
+            features: Feature dictionary of plain floats
+        """
+        self.memory.put(digest, features)
+        if not self.directory:
+            return
+
+        path = self._path(digest)
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+                return
+            except FileNotFoundError:
+                pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.part"
+        with open(temp_path, "w") as f:
+            json.dump(features, f)
+        os.replace(temp_path, path)
+
+        if self.max_disk_entries:
+            with self._lock:
+                self._disk_entries += 1
+                over = self._disk_entries > self.max_disk_entries
+            if over:
+                self._trim()
+
+    def _trim(self):
+        """Remove the least recently used disk entries down to below the cap."""
+        if not self._trim_lock.acquire(blocking=False):
+            return  # another thread is already trimming
+        try:
+            entries = []
+            for entry in self._entries():
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+            keep = int(self.max_disk_entries * (1 - self.TRIM_FRACTION))
+            entries.sort()
+            removed = 0
+            for _, path in entries[:max(0, len(entries) - keep)]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            with self._lock:
+                self._disk_entries = len(entries) - removed
+                self.disk_evictions += removed
+        finally:
+            self._trim_lock.release()
+
+    def cleanup_old_files(self, max_age_hours: int = 24) -> int:
+        """
+        Remove disk entries not read or written for a while.
+
+        Args:
+            max_age_hours: Maximum age of entries to keep
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.directory:
+            return 0
+
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for entry in self._entries():
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Error removing cached features {entry.name}: {e}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates across both tiers and bytes of decoding skipped."""
+        memory = self.memory.stats()
+        with self._lock:
+            lookups = memory["hits"] + self.disk_hits + self.misses
+            return {
+                "memory": memory,
+                "disk_enabled": self.directory is not None,
+                "disk_hits": self.disk_hits,
+                "disk_evictions": self.disk_evictions,
+                "misses": self.misses,
+                "hit_rate": round((memory["hits"] + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved
+            }
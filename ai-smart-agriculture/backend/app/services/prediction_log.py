@@ -0,0 +1,167 @@
+"""
+Write-behind prediction log that batches inserts into few transactions.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.services.rollups import save_predictions_async
+
+logger = logging.getLogger(__name__)
+
+# Queued after the last row to tell the writer to flush and exit
+_STOP = object()
+
+
+class PredictionLog:
+    """
+    Bounded in-process buffer of Prediction rows.
+
+    Rows are flushed in one multi-row transaction as soon as `batch_size`
+    rows are waiting or `flush_interval` seconds have passed since the
+    first of them arrived. When `max_pending` rows are queued, record()
+    waits for the writer to catch up (backpressure).
+
+    A batch whose transaction fails is retried with doubling delays; the
+    buffer keeps filling meanwhile, so callers slow down instead of rows
+    being lost. Only a batch that still fails after `max_retries` retries
+    is dropped, and counted in failed_rows.
+    """
+
+    # Longest wait between two retries of a batch, in seconds
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, session_factory: Callable, batch_size: int = 500,
+                 flush_interval: float = 0.5, max_pending: int = 10000,
+                 max_retries: int = 5, retry_delay: float = 0.5):
+        """
+        Initialize the log; call start() from the running event loop.
+
+        Args:
+            session_factory: Callable returning an AsyncSession context manager
+            batch_size: Rows per transaction at most
+            flush_interval: Longest time, in seconds, a row waits to be written
+            max_pending: Buffer capacity before record() blocks
+            max_retries: Retries of a failed batch before it is dropped
+            retry_delay: Wait before the first retry, in seconds; doubles
+                on every further retry
+        """
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.retries = 0
+        self.failed_flushes = 0
+        self.failed_rows = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Whether the background writer is accepting rows."""
+        return self._writer is not None and not self._writer.done()
+
+    async def start(self):
+        """Start the background writer task."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still buffered, then stop the writer."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._writer
+        self._writer = None
+
+    async def record(self, rows: List[Dict[str, Any]]):
+        """
+        Buffer rows for writing, waiting if the buffer is full.
+
+        Args:
+            rows: Column dicts for Prediction
+        """
+        for row in rows:
+            await self._queue.put(row)
+
+    async def _run(self):
+        """Collect rows into batches and flush them until stopped."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """
+        Write one batch and its rollup counters in a single transaction.
+
+        The transaction either commits rows and counters together or
+        neither, so retrying cannot double count.
+        """
+        started = time.perf_counter()
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.session_factory() as db:
+                    await save_predictions_async(db, batch)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed_flushes += 1
+                    self.failed_rows += len(batch)
+                    logger.error(f"Dropped {len(batch)} predictions after "
+                                 f"{attempt + 1} failed flushes: {e}", exc_info=True)
+                    return
+                self.retries += 1
+                logger.warning(f"Failed to flush {len(batch)} predictions, "
+                               f"retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, self.MAX_RETRY_DELAY)
+
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        self.last_flush_ms = round(1000 * (time.perf_counter() - started), 3)
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth and flush counters."""
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "capacity": self.max_pending,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "retries": self.retries,
+            "failed_flushes": self.failed_flushes,
+            "failed_rows": self.failed_rows,
+            "avg_batch_size": round(self.flushed_rows / self.flushes, 1) if self.flushes else 0.0,
+            "last_flush_ms": self.last_flush_ms
+        }
@@ -1,37 +1,308 @@
 """
 Prediction service handling all ML model predictions.
 """
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
+from collections import Counter
+import numpy as np
+from PIL import Image
+from sqlalchemy import Text, cast, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
+from app.config import settings
+from app.database import AsyncSessionLocal
 from app.models.prediction import Prediction
+from app.models.prediction_rollup import PredictionRollup
+from app.services.batching import MicroBatchScheduler
+from app.services.cache import LRUCache
+from app.services.executor import InferenceExecutor
+from app.services.feature_cache import FeatureCache
+from app.services.prediction_log import PredictionLog
+from app.services.soil_sweep import SoilGrid, crop_labels, format_cells
+from app.services.rollups import (
+    BUCKET_SIZES, TOTAL_BUCKET, bucket_start, save_predictions, save_predictions_async,
+    to_utc_naive
+)
+from ml_models.cnn_disease_model import DiseaseCNN
 from ml_models.crop_disease_model import CropDiseaseDetector
+from ml_models.gazetteer import Gazetteer
 from ml_models.soil_model import SoilRecommendationModel
+from ml_models.weather_history import WeatherHistory
 from ml_models.weather_simulator import WeatherSimulator
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Disease severities from least to most serious
+SEVERITY_ORDER = ["None", "Low to Moderate", "Moderate", "Moderate to High", "High"]
+
+# Weather advisory fields, and the bulk endpoint's columns
+WEATHER_RESULT_FIELDS = ["location", "temperature", "humidity", "rain_prediction",
+                         "irrigation_advice", "farming_tips"]
+WEATHER_COLUMNS = ["location", "temperature", "humidity", "rain_prediction",
+                   "rain_probability", "irrigation_advice", "farming_tips"]
+
+# History export formats, and the columns of each exported record
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = ["id", "prediction_type", "created_at", "confidence", "input_data", "result"]
+
+# Disease detector owned by the current process (one per pool worker)
+_process_detector: Optional[CropDiseaseDetector] = None
+
+
+def _init_inference_worker():
+    """Process pool initializer: build the detector once per worker."""
+    global _process_detector
+    _process_detector = CropDiseaseDetector()
+
+
+def _detect_disease(image_source) -> tuple:
+    """Run disease detection in whichever process executes this call."""
+    if _process_detector is None:
+        _init_inference_worker()
+    return _process_detector.predict(image_source)
+
+
+def _decode_disease_image(image_source, mode: Optional[str] = None) -> np.ndarray:
+    """Decode an image to a model-resolution array in whichever process runs this."""
+    if _process_detector is None:
+        _init_inference_worker()
+    return _process_detector.decode_array(image_source, mode)
+
+
+def _extract_disease_features(image_source) -> Dict[str, float]:
+    """Decode an image and extract its features in whichever process runs this."""
+    if _process_detector is None:
+        _init_inference_worker()
+    return _process_detector.extract_features(image_source)
+
+
+def _json_text(value) -> str:
+    """A JSON column as JSON text: stored text as is, SQL NULL as null."""
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return value
+    # Drivers that decode JSON despite the cast hand back Python objects
+    return json.dumps(value)
+
+
+def _format_ndjson(rows) -> str:
+    """One JSON line per exported record; JSON columns are embedded as stored."""
+    return "".join([
+        f'{{"id":{id_},"prediction_type":{json.dumps(prediction_type)},'
+        f'"created_at":{json.dumps(created_at and created_at.isoformat())},'
+        f'"confidence":{json.dumps(confidence)},'
+        f'"input_data":{_json_text(input_data)},"result":{_json_text(result)}}}\n'
+        for id_, prediction_type, created_at, confidence, input_data, result in rows
+    ])
+
+
+def _format_csv(rows) -> str:
+    """CSV rows of exported records, JSON columns as text; NULLs are empty."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (id_, prediction_type, created_at and created_at.isoformat(), confidence,
+         None if input_data is None else _json_text(input_data),
+         None if result is None else _json_text(result))
+        for id_, prediction_type, created_at, confidence, input_data, result in rows
+    )
+    return buffer.getvalue()
 
 
 class PredictionService:
     """Service for handling predictions and storing results."""
     
     def __init__(self):
-        """Initialize prediction service with ML models."""
-        self.disease_detector = CropDiseaseDetector()
-        self.soil_model = SoilRecommendationModel()
-        self.weather_simulator = WeatherSimulator()
+        """
+        Initialize prediction service.
+        
+        Models are not loaded here; call load_models (the app does so in a
+        background task at startup) and check `ready` before predicting.
+        """
+        self.disease_detector: Optional[CropDiseaseDetector] = None
+        self.disease_cnn: Optional[DiseaseCNN] = None
+        self.soil_model: Optional[SoilRecommendationModel] = None
+        self.weather_simulator: Optional[WeatherSimulator] = None
+        self.gazetteer: Optional[Gazetteer] = None
+        self.weather_history: Optional[WeatherHistory] = None
+        self.ready = False
+        self.load_error: Optional[str] = None
+        self.executor = InferenceExecutor(
+            thread_workers=settings.INFERENCE_THREAD_WORKERS,
+            process_workers=settings.INFERENCE_PROCESS_WORKERS,
+            process_initializer=_init_inference_worker
+        )
+        self.prediction_log = PredictionLog(
+            AsyncSessionLocal,
+            batch_size=settings.PREDICTION_LOG_BATCH_SIZE,
+            flush_interval=settings.PREDICTION_LOG_FLUSH_INTERVAL,
+            max_pending=settings.PREDICTION_LOG_MAX_PENDING,
+            max_retries=settings.PREDICTION_LOG_MAX_RETRIES,
+            retry_delay=settings.PREDICTION_LOG_RETRY_DELAY
+        )
+        self.feature_cache = FeatureCache(
+            settings.FEATURE_CACHE_DIR,
+            max_entries=settings.FEATURE_CACHE_SIZE,
+            max_disk_entries=settings.FEATURE_CACHE_DISK_ENTRIES,
+            feature_version=CropDiseaseDetector.FEATURE_VERSION
+        )
+        # Weather advisories per (location, time window), so repeated
+        # requests within a window see the same numbers
+        self.weather_cache = LRUCache(settings.WEATHER_CACHE_SIZE, ttl=settings.WEATHER_CACHE_TTL)
+        # Concurrent single-image CNN requests share forward passes
+        self.disease_batcher = MicroBatchScheduler(
+            self._classify_disease_arrays,
+            self.executor.run_in_thread,
+            max_batch_size=settings.DISEASE_BATCH_MAX_SIZE,
+            max_wait_ms=settings.DISEASE_BATCH_MAX_WAIT_MS
+        )
+    
+    def load_models(self):
+        """Load or train all ML models, then warm them with dummy inferences."""
+        try:
+            self.disease_detector = CropDiseaseDetector()
+            if settings.DISEASE_MODEL == "cnn":
+                self.disease_cnn = DiseaseCNN()
+            self.soil_model = SoilRecommendationModel(engine=settings.SOIL_INFERENCE_ENGINE)
+            self.gazetteer = Gazetteer.from_csv(settings.GAZETTEER_PATH)
+            self.weather_simulator = WeatherSimulator(gazetteer=self.gazetteer)
+            self.weather_history = WeatherHistory.open(settings.WEATHER_HISTORY_DIR)
+            if self.weather_history is None:
+                logger.info("No weather history found; run 'python manage.py generate-weather-history'")
+            elif not self.weather_history.matches(self.gazetteer.names):
+                logger.warning("Weather history was generated for a different gazetteer; "
+                               "run 'python manage.py generate-weather-history' again")
+                self.weather_history = None
+            self._warm_up()
+            self.executor.warm_up_processes()
+        except Exception as e:
+            self.load_error = str(e)
+            raise
+        
+        self.ready = True
+    
+    def _warm_up(self):
+        """Run one synthetic inference per model so first requests hit warm caches."""
+        self.soil_model.predict(90, 42, 43, 6.5, 202.5)
+        self.soil_model.predict_many(np.tile([[90, 42, 43, 6.5, 202.5]], (16, 1)))
+        
+        # Small leaf-green image, encoded so the full decode path runs
+        buffer = io.BytesIO()
+        Image.new("RGB", (256, 256), (60, 140, 60)).save(buffer, format="JPEG")
+        buffer.seek(0)
+        self.disease_detector.predict(buffer)
+        if self.disease_cnn is not None:
+            self.disease_cnn.predict_batch(np.zeros((1, 224, 224, 3), dtype=np.uint8))
+        
+        self.weather_simulator.get_weather("default")
+        logger.info("Model warm-up complete")
+    
+    def _classify_disease_arrays(self, arrays: List[np.ndarray]) -> List[tuple]:
+        """
+        Classify decoded RGB images with the CNN in one forward pass.
+        
+        Args:
+            arrays: uint8 arrays of shape (224, 224, 3)
+            
+        Returns:
+            One prediction tuple per image
+        """
+        return self.disease_cnn.predict_batch(np.stack(arrays))
+    
+    def save_predictions(self, db: Session, rows: List[Dict[str, Any]]):
+        """
+        Store prediction rows and their rollup counters in one transaction
+        on a synchronous session.
+        
+        For CLI tools; the API uses save_predictions_async.
+        
+        Args:
+            db: Database session
+            rows: Column dicts for Prediction
+        """
+        save_predictions(db, rows)
     
-    def predict_disease(self, image_path: str, db: Session) -> Dict[str, Any]:
+    async def save_predictions_async(self, db: AsyncSession, rows: List[Dict[str, Any]]):
+        """
+        Store prediction rows and their rollup counters in one transaction.
+        
+        Args:
+            db: Async database session
+            rows: Column dicts for Prediction
+        """
+        await save_predictions_async(db, rows)
+    
+    async def record_predictions(self, db: AsyncSession, rows: List[Dict[str, Any]]):
+        """
+        Record prediction rows according to PREDICTION_LOG_MODE.
+        
+        In "buffered" mode rows go to the write-behind log and are committed
+        in batches shortly after; in "sync" mode they are committed before
+        this returns. Rows are timestamped here so buffering does not shift
+        created_at to the flush time.
+        
+        Args:
+            db: Async database session, used in sync mode
+            rows: Column dicts for Prediction
+        """
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            row.setdefault("created_at", now)
+        
+        if self.prediction_log.running:
+            await self.prediction_log.record(rows)
+        else:
+            await self.save_predictions_async(db, rows)
+    
+    async def predict_disease(self, image_source, db: AsyncSession,
+                              image_path: Optional[str] = None,
+                              filename: Optional[str] = None,
+                              content_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Predict crop disease from image.
         
+        With the heuristic detector, features of in-memory images are
+        cached by content hash, so a resubmitted photo skips decoding and
+        feature extraction. With the CNN, the decoded image joins the
+        micro-batch scheduler and shares a forward pass with concurrent
+        requests.
+        
         Args:
-            image_path: Path to uploaded image
+            image_source: Encoded image (bytes, memoryview, BytesIO) or a
+                path to an image file
             db: Database session
+            image_path: Where the original is (or will be) stored, if anywhere
+            filename: Original upload filename
+            content_hash: Hex SHA-256 of the image bytes, if already known
             
         Returns:
             Disease prediction results
         """
-        # Get prediction from model
-        disease, confidence, treatment, description, severity = \
-            self.disease_detector.predict(image_path)
+        if isinstance(image_source, memoryview):
+            # Process pool arguments are pickled; memoryviews are not picklable
+            image_source = image_source.tobytes()
+        if image_path is None and isinstance(image_source, str):
+            image_path = image_source
+        if content_hash is None and isinstance(image_source, bytes):
+            content_hash = hashlib.sha256(image_source).hexdigest()
+        
+        try:
+            if self.disease_cnn is not None:
+                prediction = await self._predict_disease_cnn(image_source)
+            else:
+                prediction = await self._predict_disease_heuristic(image_source, content_hash)
+        except ValueError as e:
+            # Undecodable image: same fallback the detector gives
+            prediction = self.disease_detector.unreadable_result(e)
+        disease, confidence, treatment, description, severity = prediction
         
         # Prepare result
         result = {
@@ -43,21 +314,187 @@ class PredictionService:
         }
         
         # Store in database
-        prediction = Prediction(
-            prediction_type="disease",
-            input_data={"image_path": image_path},
-            result=result,
-            confidence=confidence
-        )
-        db.add(prediction)
-        db.commit()
-        db.refresh(prediction)
+        await self.record_predictions(db, [{
+            "prediction_type": "disease",
+            "input_data": {"image_path": image_path, "filename": filename,
+                           "sha256": content_hash},
+            "result": result,
+            "confidence": confidence
+        }])
         
         return result
     
-    def predict_soil_recommendation(self, nitrogen: float, phosphorus: float,
-                                   potassium: float, ph: float, rainfall: float,
-                                   db: Session) -> Dict[str, Any]:
+    async def _predict_disease_cnn(self, image_source) -> tuple:
+        """Decode on the process pool, then classify in a shared CNN batch."""
+        array = await self.executor.run_in_process(_decode_disease_image, image_source, "RGB")
+        return await self.disease_batcher.submit(array)
+    
+    async def _predict_disease_heuristic(self, image_source,
+                                         content_hash: Optional[str]) -> tuple:
+        """Heuristic detector prediction from cached or freshly extracted features."""
+        features = None
+        if content_hash is not None:
+            size = len(image_source) if isinstance(image_source, bytes) else 0
+            features = await self.executor.run_in_thread(
+                self.feature_cache.get, content_hash, size
+            )
+        
+        if features is None:
+            # Decoding and feature extraction hold the GIL, so use a process
+            features = await self.executor.run_in_process(
+                _extract_disease_features, image_source
+            )
+            if content_hash is not None:
+                await self.executor.run_in_thread(
+                    self.feature_cache.put, content_hash, features
+                )
+        return self.disease_detector.predict_from_features(features)
+    
+    async def predict_disease_batch(self, uploads: list, db: AsyncSession,
+                                    image_paths: Optional[List[Optional[str]]] = None,
+                                    plot_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Predict crop disease for many images from one plot.
+        
+        Images are decoded in parallel on the process pool, stacked and
+        analyzed in one vectorized pass: one CNN forward pass, or one
+        feature pass for the heuristic detector, which also reuses cached
+        features. All rows are stored in a single transaction.
+        
+        Args:
+            uploads: Uploaded files with read(), filename, sha256 and size
+                (StreamedUpload)
+            db: Database session
+            image_paths: Where each original is (or will be) stored, if anywhere
+            plot_id: Optional field plot identifier
+            
+        Returns:
+            Dictionary with per-image results and a plot summary
+        """
+        image_paths = image_paths or [None] * len(uploads)
+        use_cnn = self.disease_cnn is not None
+        features: List[Optional[Dict[str, float]]] = [None] * len(uploads)
+        if not use_cnn:
+            features = await self.executor.run_in_thread(
+                lambda: [self.feature_cache.get(u.sha256, u.size) for u in uploads]
+            )
+        predictions: Dict[int, tuple] = {}
+        errors: Dict[int, Exception] = {}
+        
+        # Bound how many encoded images are in memory at once
+        limit = asyncio.Semaphore(2 * max(1, settings.INFERENCE_PROCESS_WORKERS))
+        
+        async def decode(index: int):
+            async with limit:
+                data = await self.executor.run_in_thread(uploads[index].read)
+                return await self.executor.run_in_process(
+                    _decode_disease_image, data, "RGB" if use_cnn else None
+                )
+        
+        missing = [i for i, values in enumerate(features) if values is None]
+        decoded = await asyncio.gather(*(decode(i) for i in missing), return_exceptions=True)
+        
+        arrays = {}
+        for index, outcome in zip(missing, decoded):
+            if isinstance(outcome, ValueError):
+                errors[index] = outcome
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                arrays[index] = outcome
+        
+        if arrays and use_cnn:
+            # Already a batch; no need to go through the scheduler
+            classified = await self.executor.run_in_thread(
+                self._classify_disease_arrays, list(arrays.values())
+            )
+            predictions = dict(zip(arrays, classified))
+        elif arrays:
+            extracted = await self.executor.run_in_thread(
+                self.disease_detector.features_from_arrays, list(arrays.values())
+            )
+            for index, values in zip(arrays, extracted):
+                features[index] = values
+            await self.executor.run_in_thread(
+                lambda: [self.feature_cache.put(uploads[i].sha256, features[i]) for i in arrays]
+            )
+        
+        results = []
+        rows = []
+        for index, upload in enumerate(uploads):
+            if index in errors:
+                prediction = self.disease_detector.unreadable_result(errors[index])
+            elif index in predictions:
+                prediction = predictions[index]
+            else:
+                prediction = self.disease_detector.predict_from_features(features[index])
+            disease, confidence, treatment, description, severity = prediction
+            
+            result = {
+                "disease": disease,
+                "confidence": confidence,
+                "treatment": treatment,
+                "description": description,
+                "severity": severity
+            }
+            results.append({"filename": upload.filename, **result})
+            rows.append({
+                "prediction_type": "disease",
+                "input_data": {"image_path": image_paths[index], "filename": upload.filename,
+                               "sha256": upload.sha256, "plot_id": plot_id},
+                "result": result,
+                "confidence": confidence
+            })
+        
+        # A batch is already one multi-row transaction; write it directly
+        await self.save_predictions_async(db, rows)
+        
+        return {
+            "count": len(results),
+            "plot_id": plot_id,
+            "results": results,
+            "summary": self._summarize_disease_batch(results)
+        }
+    
+    def _summarize_disease_batch(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Plot-level summary of per-image disease results.
+        
+        Args:
+            results: Per-image results from predict_disease_batch
+            
+        Returns:
+            Summary dictionary (see DiseaseBatchSummary)
+        """
+        analyzed = [r for r in results if r["disease"] != "Unable to Detect"]
+        counts = Counter(r["disease"] for r in analyzed)
+        diseased = Counter({name: n for name, n in counts.items() if name != "Healthy"})
+        
+        dominant = None
+        if diseased:
+            dominant = diseased.most_common(1)[0][0]
+        elif analyzed:
+            dominant = "Healthy"
+        
+        severities = [r["severity"] for r in analyzed if r["severity"] in SEVERITY_ORDER]
+        
+        return {
+            "total_images": len(results),
+            "analyzed_images": len(analyzed),
+            "unreadable_images": len(results) - len(analyzed),
+            "disease_counts": dict(counts),
+            "healthy_fraction": round(counts["Healthy"] / len(analyzed), 4) if analyzed else 0.0,
+            "dominant_disease": dominant,
+            "highest_severity": max(severities, key=SEVERITY_ORDER.index) if severities else None,
+            "mean_confidence": (round(sum(r["confidence"] for r in analyzed) / len(analyzed), 4)
+                                if analyzed else None),
+            "recommended_treatment": (self.disease_detector.get_disease_info(dominant)["treatment"]
+                                      if dominant else None)
+        }
+    
+    async def predict_soil_recommendation(self, nitrogen: float, phosphorus: float,
+                                          potassium: float, ph: float, rainfall: float,
+                                          db: AsyncSession) -> Dict[str, Any]:
         """
         Predict crop recommendation based on soil parameters.
         
@@ -72,44 +509,170 @@ class PredictionService:
         Returns:
             Crop recommendation results
         """
-        # Get prediction from model
-        crop, fertilizer, confidence, tips = self.soil_model.predict(
-            nitrogen, phosphorus, potassium, ph, rainfall
-        )
-        
-        # Prepare result
-        result = {
-            "recommended_crop": crop,
-            "fertilizer_advice": fertilizer,
-            "confidence": confidence,
-            "additional_tips": tips
-        }
-        
-        # Store in database
-        input_data = {
+        results = await self.predict_soil_recommendations([{
             "nitrogen": nitrogen,
             "phosphorus": phosphorus,
             "potassium": potassium,
             "ph": ph,
             "rainfall": rainfall
-        }
+        }], db)
         
-        prediction = Prediction(
-            prediction_type="soil",
-            input_data=input_data,
-            result=result,
-            confidence=confidence
-        )
-        db.add(prediction)
-        db.commit()
-        db.refresh(prediction)
+        return results[0]
+    
+    def _score_soil_samples(self, samples: List[Dict[str, float]]) -> tuple:
+        """
+        Score soil samples and build their database rows.
         
-        return result
+        Args:
+            samples: Soil parameter dicts
+            
+        Returns:
+            Tuple of (results, Prediction rows)
+        """
+        features = np.array([
+            [s["nitrogen"], s["phosphorus"], s["potassium"], s["ph"], s["rainfall"]]
+            for s in samples
+        ], dtype=np.float64)
+        
+        predictions = self.soil_model.predict_many(features)
+        
+        results = []
+        rows = []
+        for sample, (crop, fertilizer, confidence, tips) in zip(samples, predictions):
+            result = {
+                "recommended_crop": crop,
+                "fertilizer_advice": fertilizer,
+                "confidence": confidence,
+                "additional_tips": tips
+            }
+            results.append(result)
+            rows.append({
+                "prediction_type": "soil",
+                "input_data": dict(sample),
+                "result": result,
+                "confidence": confidence
+            })
+        
+        return results, rows
+    
+    async def predict_soil_recommendations(self, samples: List[Dict[str, float]],
+                                           db: AsyncSession) -> List[Dict[str, Any]]:
+        """
+        Predict crop recommendations for a batch of soil samples.
+        
+        All samples are scored in one vectorized model call and stored
+        with a single bulk insert.
+        
+        Args:
+            samples: Soil parameter dicts with nitrogen, phosphorus,
+                potassium, ph and rainfall keys
+            db: Database session
+            
+        Returns:
+            List of crop recommendation results, in input order
+        """
+        # The forest walk is NumPy work, a thread is enough
+        results, rows = await self.executor.run_in_thread(self._score_soil_samples, samples)
+        
+        # Store all rows in one transaction
+        await self.record_predictions(db, rows)
+        
+        return results
+    
+    def soil_sweep_grid(self, base: Dict[str, float], axes: List[Dict]) -> SoilGrid:
+        """
+        Validate and build a what-if grid for stream_soil_sweep.
+        
+        Args:
+            base: Soil parameters held fixed
+            axes: Swept parameters with start, stop and steps
+            
+        Returns:
+            The grid
+            
+        Raises:
+            ValueError: If the grid is invalid or has more than
+                SOIL_SWEEP_MAX_CELLS cells
+        """
+        grid = SoilGrid(base, axes, max_cells=settings.SOIL_SWEEP_MAX_CELLS)
+        grid.use_thresholds([self.soil_model.split_thresholds(column) for column in grid.columns])
+        return grid
+    
+    def _score_sweep_chunk(self, grid: SoilGrid, first: int, last: int,
+                           labels: List[str], include_probabilities: bool) -> tuple:
+        """Score cells [first, last) of a grid and format them as NDJSON."""
+        swept, features, inverse = grid.distinct_features(first, last)
+        probabilities = self.soil_model.predict_probabilities(features)
+        text = format_cells(first, swept, probabilities, labels, inverse, include_probabilities)
+        best = probabilities.argmax(axis=1)[inverse]
+        return text, np.bincount(best, minlength=probabilities.shape[1])
     
-    def get_weather_advisory(self, location: str, db: Session) -> Dict[str, Any]:
+    async def stream_soil_sweep(self, grid: SoilGrid,
+                                include_probabilities: bool = True) -> AsyncIterator[str]:
+        """
+        Score a what-if grid and yield it as NDJSON.
+        
+        Cells are scored in SOIL_SWEEP_CHUNK_SIZE vectorized chunks on the
+        thread pool, and the next chunk is only scored once the previous
+        one has been consumed, so memory stays flat whatever the grid size.
+        Within a chunk, cells between the same forest split thresholds
+        share one model evaluation.
+        The first line describes the grid, one line per cell follows in
+        flat index order, and a closing summary counts cells per crop.
+        Sweeps are what-if analysis and are not stored in history.
+        
+        Args:
+            grid: Grid from soil_sweep_grid
+            include_probabilities: Whether cell lines carry every crop's probability
+            
+        Yields:
+            Newline-terminated JSON text
+        """
+        crops = [str(crop).title() for crop in self.soil_model.classes]
+        labels = crop_labels(crops)
+        counts = np.zeros(len(crops), dtype=np.int64)
+        chunk_size = max(1, settings.SOIL_SWEEP_CHUNK_SIZE)
+        started = time.perf_counter()
+        
+        yield json.dumps(grid.describe(crops)) + "\n"
+        for first in range(0, grid.cells, chunk_size):
+            last = min(first + chunk_size, grid.cells)
+            text, chunk_counts = await self.executor.run_in_thread(
+                self._score_sweep_chunk, grid, first, last, labels, include_probabilities
+            )
+            counts += chunk_counts
+            yield text
+        
+        yield json.dumps({
+            "type": "summary",
+            "cells": grid.cells,
+            "crop_counts": {crop: int(n) for crop, n in zip(crops, counts) if n},
+            "seconds": round(time.perf_counter() - started, 3)
+        }) + "\n"
+    
+    @staticmethod
+    def _normalize_location(location: str) -> str:
+        """
+        Location as simulated and cached: single-spaced and lowercase.
+        
+        The simulator matches case-insensitively and titles names itself,
+        so every spelling that shares a cache entry also gets the same
+        simulated weather.
+        """
+        return " ".join(location.split()).lower()
+    
+    def _weather_cache_key(self, location: str) -> tuple:
+        """Normalized location and the current WEATHER_CACHE_TTL window."""
+        window = max(1, settings.WEATHER_CACHE_TTL)
+        return location, int(time.time() // window)
+    
+    async def get_weather_advisory(self, location: str, db: AsyncSession) -> Dict[str, Any]:
         """
         Get weather advisory for a location.
         
+        Advisories are cached per normalized location and time window; a
+        cache hit is only stored in history if WEATHER_CACHE_LOG_HITS is set.
+        
         Args:
             location: Location name
             db: Database session
@@ -117,78 +680,355 @@ class PredictionService:
         Returns:
             Weather advisory results
         """
-        # Get simulated weather data
-        weather_data = self.weather_simulator.get_weather(location)
+        normalized = self._normalize_location(location)
+        key = self._weather_cache_key(normalized)
+        weather_data = self.weather_cache.get(key)
+        cached = weather_data is not None
+        
+        if not cached:
+            # Get simulated weather data
+            fresh = await self.executor.run_in_thread(
+                self.weather_simulator.get_weather, normalized
+            )
+            # A concurrent request may have cached this window first
+            weather_data = self.weather_cache.setdefault(key, fresh)
+            cached = weather_data is not fresh
         
         # Prepare result
-        result = {
-            "location": weather_data["location"],
-            "temperature": weather_data["temperature"],
-            "humidity": weather_data["humidity"],
-            "rain_prediction": weather_data["rain_prediction"],
-            "irrigation_advice": weather_data["irrigation_advice"],
-            "farming_tips": weather_data["farming_tips"]
-        }
+        result = {field: weather_data[field] for field in WEATHER_RESULT_FIELDS}
         
         # Store in database
-        prediction = Prediction(
-            prediction_type="weather",
-            input_data={"location": location},
-            result=result,
-            confidence=None  # Weather doesn't have confidence score
-        )
-        db.add(prediction)
-        db.commit()
-        db.refresh(prediction)
+        if not cached or settings.WEATHER_CACHE_LOG_HITS:
+            await self.record_predictions(db, [{
+                "prediction_type": "weather",
+                "input_data": {"location": location, "cached": cached},
+                "result": result,
+                "confidence": None  # Weather doesn't have confidence score
+            }])
         
         return result
     
-    def get_prediction_history(self, db: Session, prediction_type: str = None,
-                               limit: int = 50) -> list:
+    async def get_weather_advisories(self, locations: List[str],
+                                     db: AsyncSession) -> Dict[str, Any]:
         """
-        Get prediction history from database.
+        Get weather advisories for many locations at once.
+        
+        Cached advisories are reused; the other locations are simulated
+        together with array operations. New advisories (and cache hits, if
+        WEATHER_CACHE_LOG_HITS is set) are stored with a single bulk insert.
         
         Args:
+            locations: Location names
             db: Database session
+            
+        Returns:
+            Dictionary with the count, columnar results and per-location results
+        """
+        normalized = [self._normalize_location(location) for location in locations]
+        keys = [self._weather_cache_key(location) for location in normalized]
+        entries = [self.weather_cache.get(key) for key in keys]
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        fresh = set()
+        
+        if missing:
+            columns = await self.executor.run_in_thread(
+                self.weather_simulator.get_weather_columns, [normalized[i] for i in missing]
+            )
+            for position, index in enumerate(missing):
+                simulated = {name: values[position] for name, values in columns.items()}
+                # Repeated locations in one request share the first advisory
+                entries[index] = self.weather_cache.setdefault(keys[index], simulated)
+                if entries[index] is simulated:
+                    fresh.add(index)
+        
+        results = [{field: entry[field] for field in WEATHER_RESULT_FIELDS} for entry in entries]
+        rows = [
+            {
+                "prediction_type": "weather",
+                "input_data": {"location": location, "cached": index not in fresh},
+                "result": result,
+                "confidence": None
+            }
+            for index, (location, result) in enumerate(zip(locations, results))
+            if index in fresh or settings.WEATHER_CACHE_LOG_HITS
+        ]
+        
+        # A bulk request is already one multi-row transaction; write it directly
+        await self.save_predictions_async(db, rows)
+        
+        return {
+            "count": len(results),
+            "columns": {name: [entry[name] for entry in entries] for name in WEATHER_COLUMNS},
+            "results": results
+        }
+    
+    async def get_weather_forecast(self, location: str, days: int) -> Dict[str, Any]:
+        """
+        Get a day-by-day weather forecast for a location.
+        
+        The whole horizon is generated in one vectorized pass with
+        day-to-day correlated weather.
+        
+        Args:
+            location: Location name
+            days: Forecast horizon in days
+            
+        Returns:
+            Dictionary with the location, horizon and daily forecasts
+        """
+        location = self._normalize_location(location)
+        forecast = await self.executor.run_in_thread(
+            self.weather_simulator.get_forecast, location, days
+        )
+        return {"location": location.title(), "days": days, "forecast": forecast}
+    
+    async def get_weather_history(self, location: str, first: Optional[date] = None,
+                                  last: Optional[date] = None,
+                                  gdd_base: float = 10.0) -> Dict[str, Any]:
+        """
+        Daily weather history and aggregates for a location.
+        
+        The date range is sliced from the memory-mapped store; only that
+        location's days are read.
+        
+        Args:
+            location: Location name, alias or "lat,lon" (nearest known place)
+            first: First day (default 29 days before `last`)
+            last: Last day (default the last stored day)
+            gdd_base: Base temperature for growing degree days, Celsius
+            
+        Returns:
+            Dictionary with the range, rainfall and degree-day aggregates
+            and the daily series
+            
+        Raises:
+            LookupError: If the location is unknown or has no history
+            ValueError: If the range is empty or outside the stored period
+        """
+        row = self.gazetteer.resolve(location)
+        if row is None:
+            raise LookupError(f"Unknown location '{location}'")
+        last = last or self.weather_history.end
+        first = first or max(self.weather_history.start, last - timedelta(days=29))
+        
+        return await self.executor.run_in_thread(
+            self.weather_history.query, row, first, last, gdd_base
+        )
+    
+    def search_locations(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Known locations whose name or alias starts with `prefix`.
+        
+        Args:
+            prefix: Typed text
+            limit: Most locations returned
+            
+        Returns:
+            Location records in alphabetical order
+        """
+        return [self.gazetteer.describe(row) for row in self.gazetteer.search(prefix, limit)]
+    
+    def nearest_locations(self, lat: float, lon: float, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        Known locations nearest to a point, closest first.
+        
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            limit: Locations returned
+            
+        Returns:
+            Location records with distance_km
+        """
+        limit = min(limit, len(self.gazetteer))
+        rows, distances = self.gazetteer.nearest(lat, lon, k=limit)
+        return [
+            {**self.gazetteer.describe(int(row)), "distance_km": round(float(distance), 2)}
+            for row, distance in zip(np.atleast_1d(rows), np.atleast_1d(distances))
+        ]
+    
+    async def get_prediction_history(self, db: AsyncSession, prediction_type: str = None,
+                                     limit: int = 50, before: Optional[tuple] = None,
+                                     after: Optional[tuple] = None) -> list:
+        """
+        Get prediction history from database, newest first.
+        
+        Uses keyset pagination on (created_at, id), so any page costs the
+        same index range scan as the first one.
+        
+        Args:
+            db: Async database session
             prediction_type: Optional filter by type
             limit: Maximum number of records
+            before: Optional (created_at, id) position; return older records
+            after: Optional (created_at, id) position; return newer records
             
         Returns:
             List of prediction records
         """
-        query = db.query(Prediction)
+        query = select(Prediction)
+        
+        if prediction_type:
+            query = query.where(Prediction.prediction_type == prediction_type)
+        
+        position = tuple_(Prediction.created_at, Prediction.id)
+        if after is not None:
+            # Walk forward from the cursor, then flip back to newest first
+            query = query.where(position > tuple_(*after)).order_by(
+                Prediction.created_at.asc(), Prediction.id.asc()
+            )
+            result = await db.execute(query.limit(limit))
+            return list(reversed(result.scalars().all()))
+        
+        if before is not None:
+            query = query.where(position < tuple_(*before))
+        
+        result = await db.execute(
+            query.order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(limit)
+        )
+        
+        return list(result.scalars().all())
+    
+    async def export_predictions(self, export_format: str = "ndjson",
+                                 prediction_type: Optional[str] = None,
+                                 start: Optional[datetime] = None,
+                                 end: Optional[datetime] = None,
+                                 after_id: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Stream the full prediction history in id order.
+        
+        Rows are fetched HISTORY_EXPORT_BATCH_SIZE at a time from a
+        server-side cursor and each batch is formatted and yielded before
+        the next is read, so memory does not grow with the history. The
+        JSON columns are cast to text in SQL and copied into the output
+        without being parsed; SQL NULLs become null (empty in CSV). The
+        session is opened here, not taken from the request, because the
+        response outlives the route function.
         
+        Args:
+            export_format: "ndjson" or "csv"
+            prediction_type: Optional filter by type
+            start: Only records created at or after this time (UTC if naive)
+            end: Only records created before this time (UTC if naive)
+            after_id: Only records with a larger id, to resume an export
+            
+        Yields:
+            Chunks of NDJSON lines or CSV rows (CSV starts with a header)
+        """
+        query = select(
+            Prediction.id,
+            Prediction.prediction_type,
+            Prediction.created_at,
+            Prediction.confidence,
+            cast(Prediction.input_data, Text),
+            cast(Prediction.result, Text)
+        )
         if prediction_type:
-            query = query.filter(Prediction.prediction_type == prediction_type)
+            query = query.where(Prediction.prediction_type == prediction_type)
+        if start is not None:
+            query = query.where(Prediction.created_at >= to_utc_naive(start))
+        if end is not None:
+            query = query.where(Prediction.created_at < to_utc_naive(end))
+        if after_id is not None:
+            query = query.where(Prediction.id > after_id)
+        query = query.order_by(Prediction.id).execution_options(
+            yield_per=settings.HISTORY_EXPORT_BATCH_SIZE
+        )
         
-        predictions = query.order_by(Prediction.created_at.desc()).limit(limit).all()
+        format_rows = _format_ndjson if export_format == "ndjson" else _format_csv
+        if export_format == "csv":
+            yield ",".join(EXPORT_COLUMNS) + "\r\n"
         
-        return predictions
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield format_rows(rows)
     
-    def get_statistics(self, db: Session) -> Dict[str, Any]:
+    async def get_statistics(self, db: AsyncSession, bucket: Optional[str] = None,
+                             start: Optional[datetime] = None,
+                             end: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Get statistics about predictions.
         
+        Counts are read from the rollup table, so the cost does not grow
+        with prediction history.
+        
         Args:
-            db: Database session
+            db: Async database session
+            bucket: Optional trend bucket size ("hour" or "day")
+            start: Start of the trend range, inclusive (UTC if naive)
+            end: End of the trend range, exclusive (UTC if naive)
             
         Returns:
-            Statistics dictionary
+            Statistics dictionary, with a "trend" series when a bucket is given
         """
-        total_predictions = db.query(Prediction).count()
-        disease_predictions = db.query(Prediction).filter(
-            Prediction.prediction_type == "disease"
-        ).count()
-        soil_predictions = db.query(Prediction).filter(
-            Prediction.prediction_type == "soil"
-        ).count()
-        weather_predictions = db.query(Prediction).filter(
-            Prediction.prediction_type == "weather"
-        ).count()
+        result = await db.execute(
+            select(PredictionRollup.prediction_type, PredictionRollup.count)
+            .where(PredictionRollup.bucket_size == TOTAL_BUCKET)
+        )
+        counts = dict(result.all())
         
-        return {
-            "total_predictions": total_predictions,
-            "disease_predictions": disease_predictions,
-            "soil_predictions": soil_predictions,
-            "weather_predictions": weather_predictions
+        stats = {
+            "total_predictions": sum(counts.values()),
+            "disease_predictions": counts.get("disease", 0),
+            "soil_predictions": counts.get("soil", 0),
+            "weather_predictions": counts.get("weather", 0)
         }
+        
+        if bucket is not None:
+            stats["trend"] = await self._get_trend(db, bucket, start, end)
+        
+        return stats
+    
+    async def _get_trend(self, db: AsyncSession, bucket: str,
+                         start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+        """
+        Per-bucket prediction counts over a time range, zero-filled.
+        
+        Args:
+            db: Async database session
+            bucket: "hour" or "day"
+            start: Range start; defaults to STATISTICS_DEFAULT_BUCKETS buckets before end
+            end: Range end; defaults to now
+            
+        Returns:
+            Dictionary with the bucket size, range and one point per bucket
+            
+        Raises:
+            ValueError: If the bucket size or range is invalid
+        """
+        if bucket not in BUCKET_SIZES:
+            raise ValueError(f"Invalid bucket. Use: {', '.join(BUCKET_SIZES)}")
+        
+        width = BUCKET_SIZES[bucket]
+        end = to_utc_naive(end or datetime.now(timezone.utc))
+        start = to_utc_naive(start) if start else end - width * settings.STATISTICS_DEFAULT_BUCKETS
+        if start >= end:
+            raise ValueError("'start' must be before 'end'")
+        
+        first = bucket_start(start, bucket)
+        n_buckets = -(-(end - first) // width)
+        if n_buckets > settings.STATISTICS_MAX_BUCKETS:
+            raise ValueError(
+                f"Range covers {n_buckets} buckets; the maximum is {settings.STATISTICS_MAX_BUCKETS}"
+            )
+        
+        result = await db.execute(
+            select(PredictionRollup.bucket_start, PredictionRollup.prediction_type,
+                   PredictionRollup.count)
+            .where(PredictionRollup.bucket_size == bucket,
+                   PredictionRollup.bucket_start >= first,
+                   PredictionRollup.bucket_start < end)
+        )
+        
+        points = {}
+        for index in range(n_buckets):
+            moment = first + index * width
+            points[moment] = {"bucket_start": moment, "total": 0,
+                              "disease": 0, "soil": 0, "weather": 0}
+        for moment, prediction_type, count in result.all():
+            point = points[moment]
+            point[prediction_type] = point.get(prediction_type, 0) + count
+            point["total"] += count
+        
+        return {"bucket": bucket, "start": first, "end": end, "points": list(points.values())}
@@ -0,0 +1,178 @@
+"""
+Incrementally maintained prediction counters per type and time bucket.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.prediction import Prediction
+from app.models.prediction_rollup import PredictionRollup
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Bucket sizes kept for trend queries, with their widths
+BUCKET_SIZES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# All-time counters live in a single bucket per type
+TOTAL_BUCKET = "total"
+TOTAL_BUCKET_START = datetime(1970, 1, 1)
+
+_DIALECT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Convert a datetime to naive UTC; naive values are taken as UTC already."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_start(value: datetime, bucket_size: str) -> datetime:
+    """
+    Start of the bucket containing a timestamp.
+
+    Args:
+        value: Timestamp, naive UTC or timezone-aware
+        bucket_size: "hour" or "day"
+
+    Returns:
+        Naive UTC bucket start
+    """
+    value = to_utc_naive(value).replace(minute=0, second=0, microsecond=0)
+    if bucket_size == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def _count_buckets(pairs: Iterable[Tuple[str, datetime]]) -> Counter:
+    """Count (prediction_type, created_at) pairs into every bucket size."""
+    counts = Counter()
+    for prediction_type, created_at in pairs:
+        counts[(prediction_type, TOTAL_BUCKET, TOTAL_BUCKET_START)] += 1
+        for size in BUCKET_SIZES:
+            counts[(prediction_type, size, bucket_start(created_at, size))] += 1
+    return counts
+
+
+def rollup_increments(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Counter increments for a batch of Prediction rows.
+
+    Rows without created_at are stamped with the current time, so the
+    inserted predictions and their counters agree.
+
+    Args:
+        rows: Column dicts for Prediction
+
+    Returns:
+        Column dicts for PredictionRollup, one per touched bucket
+    """
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        row.setdefault("created_at", now)
+
+    counts = _count_buckets((row["prediction_type"], row["created_at"]) for row in rows)
+    return [
+        {"prediction_type": prediction_type, "bucket_size": size,
+         "bucket_start": start, "count": count}
+        for (prediction_type, size, start), count in counts.items()
+    ]
+
+
+def rollup_upsert(dialect_name: str):
+    """
+    Statement that adds increments to existing counters or creates them.
+
+    Args:
+        dialect_name: Name of the database dialect (sqlite or postgresql)
+
+    Returns:
+        INSERT ... ON CONFLICT DO UPDATE statement for executemany
+    """
+    dialect_insert = _DIALECT_INSERTS.get(dialect_name)
+    if dialect_insert is None:
+        raise ValueError(f"Prediction rollups are not supported on {dialect_name}")
+
+    statement = dialect_insert(PredictionRollup)
+    return statement.on_conflict_do_update(
+        index_elements=["prediction_type", "bucket_size", "bucket_start"],
+        set_={"count": PredictionRollup.count + statement.excluded.count}
+    )
+
+
+def save_predictions(db: Session, rows: List[Dict[str, Any]]):
+    """
+    Insert prediction rows and their rollup counters in one transaction.
+
+    Every write path (API, write-behind log, CLI tools) goes through this
+    or save_predictions_async, so records and counters always agree.
+
+    Args:
+        db: Synchronous database session
+        rows: Column dicts for Prediction
+    """
+    if rows:
+        increments = rollup_increments(rows)
+        db.execute(insert(Prediction), rows)
+        db.execute(rollup_upsert(db.get_bind().dialect.name), increments)
+        db.commit()
+
+
+async def save_predictions_async(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """
+    save_predictions on an async session.
+
+    Args:
+        db: Async database session
+        rows: Column dicts for Prediction
+    """
+    if rows:
+        increments = rollup_increments(rows)
+        await db.execute(insert(Prediction), rows)
+        await db.execute(rollup_upsert(db.get_bind().dialect.name), increments)
+        await db.commit()
+
+
+def rebuild_rollups(db: Session, chunk_size: int = 10000) -> Dict[str, int]:
+    """
+    Recompute every counter from the predictions table.
+
+    Runs in one transaction, so readers see either the old counters or
+    the rebuilt ones.
+
+    Args:
+        db: Synchronous database session
+        chunk_size: Prediction rows fetched per round trip
+
+    Returns:
+        Dictionary with the number of predictions scanned and buckets written
+    """
+    result = db.execute(
+        select(Prediction.prediction_type, Prediction.created_at)
+        .where(Prediction.created_at.is_not(None))
+        .execution_options(yield_per=chunk_size)
+    )
+
+    counts = Counter()
+    scanned = 0
+    for partition in result.partitions():
+        counts.update(_count_buckets(partition))
+        scanned += len(partition)
+
+    db.execute(delete(PredictionRollup))
+    if counts:
+        db.execute(insert(PredictionRollup), [
+            {"prediction_type": prediction_type, "bucket_size": size,
+             "bucket_start": start, "count": count}
+            for (prediction_type, size, start), count in counts.items()
+        ])
+    db.commit()
+
+    return {"predictions": scanned, "buckets": len(counts)}
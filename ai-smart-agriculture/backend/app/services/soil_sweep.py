@@ -0,0 +1,193 @@
+"""
+What-if grids over soil parameters for the crop recommendation model.
+
+A SoilGrid holds only the axis values: the feature rows of any range of
+cells are rebuilt on demand from the flat cell index, so a sweep of
+millions of cells is scored and serialized one fixed-size chunk at a time.
+
+Tree ensembles only compare each feature against split thresholds, so
+swept values lying between the same two thresholds are interchangeable.
+Given the model's thresholds, a grid maps every cell to its combination
+of threshold intervals and only one cell per distinct combination in a
+chunk needs scoring.
+"""
+import json
+import math
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# SoilInput fields in model feature order
+SOIL_FEATURES = ("nitrogen", "phosphorus", "potassium", "ph", "rainfall")
+
+# Decimal places of swept values and probabilities in the output
+SWEEP_DECIMALS = 4
+
+
+class SoilGrid:
+    """Cartesian grid of soil samples varying some parameters around a base sample."""
+
+    def __init__(self, base: Dict[str, float], axes: Sequence[Dict],
+                 max_cells: Optional[int] = None):
+        """
+        Define the grid.
+
+        Args:
+            base: Soil parameters used for every parameter not swept
+            axes: Dicts with parameter, start, stop and steps; the last
+                axis varies fastest in cell order
+            max_cells: Largest accepted number of cells, checked before
+                any axis values are built
+
+        Raises:
+            ValueError: If an axis is unknown or swept twice, or the grid
+                has more than max_cells cells
+        """
+        names = [axis["parameter"] for axis in axes]
+        unknown = set(names) - set(SOIL_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown soil parameters: {', '.join(sorted(unknown))}")
+        if len(set(names)) != len(names):
+            raise ValueError("Each soil parameter can be swept only once")
+
+        # Python ints: an int64 product silently wraps for large grids
+        self.shape = tuple(int(axis["steps"]) for axis in axes)
+        self.cells = math.prod(self.shape)
+        if max_cells is not None and self.cells > max_cells:
+            raise ValueError(f"Sweep has {self.cells} cells, the limit is {max_cells}")
+
+        self.base = np.array([base[name] for name in SOIL_FEATURES], dtype=np.float64)
+        self.parameters = names
+        self.columns = [SOIL_FEATURES.index(name) for name in names]
+        self.values = [np.linspace(axis["start"], axis["stop"], steps)
+                       for axis, steps in zip(axes, self.shape)]
+
+        # Until split thresholds are known every value is its own interval
+        self._intervals = [np.arange(len(values)) for values in self.values]
+        self._interval_shape = self.shape
+
+    def use_thresholds(self, thresholds: Sequence[np.ndarray]):
+        """
+        Group each axis's values by the split thresholds they fall between.
+
+        Args:
+            thresholds: Sorted split thresholds per swept axis; a split
+                sends x <= threshold left after x is cast to float32
+        """
+        self._intervals = []
+        for values, splits in zip(self.values, thresholds):
+            # Number of thresholds strictly below the value the model sees
+            position = np.searchsorted(splits, values.astype(np.float32).astype(np.float64),
+                                       side="left")
+            _, interval = np.unique(position, return_inverse=True)
+            self._intervals.append(interval.ravel())
+        self._interval_shape = tuple(int(interval.max()) + 1 for interval in self._intervals)
+
+    @property
+    def distinct_cells(self) -> int:
+        """Upper bound on the number of distinct predictions in the grid."""
+        return math.prod(self._interval_shape)
+
+    def features(self, first: int, last: int) -> np.ndarray:
+        """
+        Feature rows of cells [first, last).
+
+        Args:
+            first: First flat cell index
+            last: One past the last flat cell index
+
+        Returns:
+            Array of shape (last - first, 5) in SOIL_FEATURES order
+        """
+        indexes = np.unravel_index(np.arange(first, last), self.shape)
+        features = np.tile(self.base, (last - first, 1))
+        for column, values, index in zip(self.columns, self.values, indexes):
+            features[:, column] = values[index]
+        return features
+
+    def distinct_features(self, first: int, last: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Cells [first, last) reduced to one representative per threshold interval combination.
+
+        Args:
+            first: First flat cell index
+            last: One past the last flat cell index
+
+        Returns:
+            Tuple of (swept values per cell, shape (N, axes); feature rows
+            to score, shape (M, 5); row of each cell in them, shape (N,))
+        """
+        indexes = np.unravel_index(np.arange(first, last), self.shape)
+        combination = np.ravel_multi_index(
+            [interval[index] for interval, index in zip(self._intervals, indexes)],
+            self._interval_shape
+        )
+        _, representative, inverse = np.unique(combination, return_index=True,
+                                               return_inverse=True)
+
+        swept = np.column_stack([values[index] for values, index in zip(self.values, indexes)])
+        features = np.tile(self.base, (len(representative), 1))
+        features[:, self.columns] = swept[representative]
+        return swept, features, inverse.ravel()
+
+    def describe(self, crops: Sequence[str]) -> Dict:
+        """Header record: axes with their values, grid shape and crop order."""
+        return {
+            "type": "grid",
+            "axes": [
+                {"parameter": name, "values": np.round(values, SWEEP_DECIMALS).tolist()}
+                for name, values in zip(self.parameters, self.values)
+            ],
+            "shape": list(self.shape),
+            "cells": self.cells,
+            "base": dict(zip(SOIL_FEATURES, self.base.tolist())),
+            "crops": list(crops)
+        }
+
+
+def format_cells(first: int, swept: np.ndarray, probabilities: np.ndarray,
+                 crop_labels: List[str], inverse: Optional[np.ndarray] = None,
+                 include_probabilities: bool = True) -> str:
+    """
+    NDJSON lines for a chunk of scored cells.
+
+    The prediction part of a line is formatted once per distinct
+    probability row and shared by every cell mapped to it. Lists of
+    rounded floats print as valid JSON, so lines are assembled with string
+    formatting instead of one json.dumps per cell.
+
+    Args:
+        first: Flat index of the first cell
+        swept: (N, axes) values of the swept parameters
+        probabilities: (M, crops) crop probabilities
+        crop_labels: JSON-encoded crop name per probability column
+        inverse: Probability row of each cell; None if rows match cells
+        include_probabilities: Whether to emit the full probability vector
+
+    Returns:
+        One line per cell, newline-terminated
+    """
+    best = probabilities.argmax(axis=1)
+    confidence = np.round(probabilities[np.arange(len(best)), best], SWEEP_DECIMALS).tolist()
+    if include_probabilities:
+        vectors = np.round(probabilities, SWEEP_DECIMALS).tolist()
+        predictions = [
+            f'"crop":{crop_labels[b]},"confidence":{c},"probabilities":{p}}}\n'
+            for b, c, p in zip(best.tolist(), confidence, vectors)
+        ]
+    else:
+        predictions = [
+            f'"crop":{crop_labels[b]},"confidence":{c}}}\n'
+            for b, c in zip(best.tolist(), confidence)
+        ]
+
+    rows = range(len(swept)) if inverse is None else inverse.tolist()
+    values = np.round(swept, SWEEP_DECIMALS).tolist()
+    return "".join([
+        f'{{"cell":{first + i},"values":{v},{predictions[row]}'
+        for i, (v, row) in enumerate(zip(values, rows))
+    ])
+
+
+def crop_labels(crops: Sequence[str]) -> List[str]:
+    """JSON string literal of each crop name, for format_cells."""
+    return [json.dumps(crop) for crop in crops]
@@ -2,9 +2,11 @@
 Image processing utilities for crop image handling.
 """
 import os
+import shutil
 from PIL import Image
-from typing import Tuple
+from typing import Optional, Tuple
 import uuid
+from ml_models.image_decoding import decode_image
 
 
 class ImageProcessor:
@@ -14,14 +16,18 @@ class ImageProcessor:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     TARGET_SIZE = (224, 224)
     
-    def __init__(self, upload_dir: str):
+    def __init__(self, upload_dir: str, max_file_size: int = MAX_FILE_SIZE):
         """
         Initialize image processor.
         
         Args:
             upload_dir: Directory to save uploaded images
+            max_file_size: Largest accepted upload, in bytes
         """
         self.upload_dir = upload_dir
+        self.max_file_size = max_file_size
+        self.duplicate_uploads = 0
+        self.duplicate_bytes = 0
         os.makedirs(upload_dir, exist_ok=True)
     
     def is_allowed_file(self, filename: str) -> bool:
@@ -29,16 +35,21 @@ class ImageProcessor:
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
     
-    def save_image(self, file_data: bytes, original_filename: str) -> str:
+    def reserve_path(self, original_filename: str, size: int,
+                     content_hash: Optional[str] = None) -> str:
         """
-        Save uploaded image with unique filename.
+        Validate an upload and choose its storage path without writing.
+        
+        With a content hash the path is content-addressed, so identical
+        uploads share one file; otherwise it is a fresh unique name.
         
         Args:
-            file_data: Image file data
             original_filename: Original filename from upload
+            size: Upload size in bytes
+            content_hash: Optional hex digest of the upload
             
         Returns:
-            Path to saved image
+            Path the image will be written to
             
         Raises:
             ValueError: If file is invalid
@@ -46,13 +57,72 @@ class ImageProcessor:
         if not self.is_allowed_file(original_filename):
             raise ValueError(f"File type not allowed. Allowed types: {self.ALLOWED_EXTENSIONS}")
         
-        if len(file_data) > self.MAX_FILE_SIZE:
-            raise ValueError(f"File too large. Maximum size: {self.MAX_FILE_SIZE / (1024*1024)}MB")
+        if size > self.max_file_size:
+            raise ValueError(f"File too large. Maximum size: {self.max_file_size / (1024*1024)}MB")
         
         # Generate unique filename
         ext = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4()}.{ext}"
-        filepath = os.path.join(self.upload_dir, unique_filename)
+        unique_filename = f"{content_hash or uuid.uuid4()}.{ext}"
+        return os.path.join(self.upload_dir, unique_filename)
+    
+    def write_image(self, file_data, filepath: str):
+        """
+        Write image data to a path from reserve_path.
+        
+        Safe to run as a background task: the data is written to a
+        temporary name and renamed, so readers never see a partial file.
+        Content-addressed files that already exist are not rewritten, but
+        their modification time is refreshed: newer history rows point at
+        them, so cleanup_old_files must treat them as new.
+        
+        Args:
+            file_data: Image bytes, or a binary file object
+            filepath: Destination path
+        """
+        if os.path.exists(filepath):
+            try:
+                os.utime(filepath)
+            except FileNotFoundError:
+                # Removed by cleanup in the meantime; write it again
+                pass
+            else:
+                if hasattr(file_data, 'read'):
+                    size = file_data.seek(0, os.SEEK_END)
+                else:
+                    size = len(file_data)
+                self.duplicate_uploads += 1
+                self.duplicate_bytes += size
+                return
+        
+        temp_path = f"{filepath}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                if hasattr(file_data, 'read'):
+                    file_data.seek(0)
+                    shutil.copyfileobj(file_data, f)
+                else:
+                    f.write(file_data)
+            os.replace(temp_path, filepath)
+        except Exception as e:
+            print(f"Error saving upload {filepath}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def save_image(self, file_data: bytes, original_filename: str) -> str:
+        """
+        Save uploaded image with unique filename.
+        
+        Args:
+            file_data: Image file data
+            original_filename: Original filename from upload
+            
+        Returns:
+            Path to saved image
+            
+        Raises:
+            ValueError: If file is invalid
+        """
+        filepath = self.reserve_path(original_filename, len(file_data))
         
         # Save file
         with open(filepath, 'wb') as f:
@@ -71,25 +141,27 @@ class ImageProcessor:
             Preprocessed PIL Image
         """
         try:
-            # Open image
-            image = Image.open(image_path)
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to target size
-            image = image.resize(self.TARGET_SIZE, Image.Resampling.LANCZOS)
-            
-            return image
+            # Decode near the target size, convert to RGB and resize
+            return decode_image(image_path, self.TARGET_SIZE, mode='RGB',
+                                resample=Image.Resampling.LANCZOS)
             
         except Exception as e:
             raise ValueError(f"Error processing image: {str(e)}")
     
+    def stats(self) -> dict:
+        """Uploads that were already stored and not written again."""
+        return {
+            "duplicate_uploads": self.duplicate_uploads,
+            "duplicate_bytes": self.duplicate_bytes
+        }
+    
     def cleanup_old_files(self, max_age_hours: int = 24):
         """
         Remove old uploaded files.
         
+        Age is taken from the modification time, which write_image
+        refreshes whenever an identical upload reuses a file.
+        
         Args:
             max_age_hours: Maximum age of files to keep
         """
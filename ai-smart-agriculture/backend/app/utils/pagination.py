@@ -0,0 +1,43 @@
+"""
+Keyset pagination cursors for time-ordered listings.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """
+    Encode a (created_at, id) position as an opaque URL-safe cursor.
+    
+    Args:
+        created_at: Timestamp of the record
+        record_id: Primary key of the record
+        
+    Returns:
+        Cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+        
+    Returns:
+        Tuple of (created_at, id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
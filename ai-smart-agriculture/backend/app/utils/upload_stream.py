@@ -0,0 +1,222 @@
+"""
+Streaming multipart upload reader with early size and type rejection.
+"""
+import hashlib
+from tempfile import SpooledTemporaryFile
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+from typing import Dict, List, Optional
+
+# Leading bytes of each accepted image format
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "jpeg",
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"GIF87a": "gif",
+    b"GIF89a": "gif",
+    b"BM": "bmp",
+}
+SNIFF_BYTES = max(len(signature) for signature in IMAGE_SIGNATURES)
+
+# Allowance for multipart boundaries and part headers in Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+# Largest non-file form field kept in memory
+MAX_FIELD_SIZE = 64 * 1024
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """Return the image format whose signature starts `head`, if any."""
+    for signature, image_format in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return image_format
+    return None
+
+
+class StreamedUpload:
+    """
+    One file part, buffered in memory up to a limit and on disk beyond it.
+
+    The SHA-256 of the content is computed as the part streams in.
+    """
+
+    def __init__(self, field_name: str, filename: str, content_type: Optional[str],
+                 spool_size: int):
+        self.field_name = field_name
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self.image_format: Optional[str] = None
+        self.file = SpooledTemporaryFile(max_size=spool_size)
+        self._head = b""
+        self._digest = hashlib.sha256()
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of the bytes received so far."""
+        return self._digest.hexdigest()
+
+    def write(self, data: bytes):
+        """Append data; sniffs the format once enough leading bytes arrived."""
+        if self.image_format is None and len(self._head) < SNIFF_BYTES:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._check_format()
+        self.file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+    def finish(self):
+        """Called at the end of the part; checks short files too."""
+        if self.image_format is None:
+            self._check_format()
+        self.file.seek(0)
+
+    def read(self) -> bytes:
+        """The whole upload as bytes."""
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+    def _check_format(self):
+        self.image_format = sniff_image_format(self._head)
+        if self.image_format is None:
+            raise HTTPException(
+                status_code=415,
+                detail=f"'{self.filename}' is not a supported image (JPEG, PNG, GIF or BMP)"
+            )
+
+
+async def read_image_uploads(request: Request, max_file_size: int, spool_size: int,
+                             max_files: int = 1,
+                             allowed_extensions: Optional[set] = None) -> tuple:
+    """
+    Stream a multipart/form-data body into bounded per-file buffers.
+
+    The body is consumed as the server delivers it and never held whole in
+    memory. Requests are rejected with 413 as soon as a Content-Length or
+    the bytes received cross the limits, and with 415 as soon as a part's
+    leading bytes are not a known image signature.
+
+    Args:
+        request: Incoming request
+        max_file_size: Largest accepted file, in bytes
+        spool_size: Bytes per file kept in memory before spilling to disk
+        max_files: Largest number of file parts accepted
+        allowed_extensions: Lower-case filename extensions accepted, if limited
+
+    Returns:
+        Tuple of (list of StreamedUpload, dict of other form fields)
+
+    Raises:
+        HTTPException: 400, 413 or 415 when the upload is rejected
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload")
+
+    max_body = max_files * max_file_size + MULTIPART_OVERHEAD
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_body:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload too large. Maximum size: {max_file_size / (1024*1024)}MB per file"
+        )
+
+    uploads: List[StreamedUpload] = []
+    fields: Dict[str, str] = {}
+    state = {"header_field": b"", "header_value": b"", "headers": {},
+             "current": None, "field": None, "value": b""}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["current"] = None
+        state["field"] = None
+        state["value"] = b""
+
+    def on_header_field(data, start, end):
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["header_value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = b""
+        state["header_value"] = b""
+
+    def on_headers_finished():
+        disposition, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+
+        if filename is None:
+            state["field"] = name
+            return
+
+        filename = filename.decode("utf-8", "replace")
+        if len(uploads) >= max_files:
+            raise HTTPException(status_code=413, detail=f"Too many files. Maximum: {max_files}")
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if allowed_extensions is not None and extension not in allowed_extensions:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type. Allowed: {allowed_extensions}"
+            )
+
+        part_type = state["headers"].get(b"content-type")
+        upload = StreamedUpload(name, filename, part_type.decode("latin-1") if part_type else None,
+                                spool_size)
+        uploads.append(upload)
+        state["current"] = upload
+
+    def on_part_data(data, start, end):
+        upload = state["current"]
+        if upload is None:
+            state["value"] += data[start:end]
+            if len(state["value"]) > MAX_FIELD_SIZE:
+                raise HTTPException(status_code=413, detail=f"Form field '{state['field']}' too large")
+            return
+        if upload.size + (end - start) > max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {max_file_size / (1024*1024)}MB"
+            )
+        upload.write(data[start:end])
+
+    def on_part_end():
+        if state["current"] is not None:
+            state["current"].finish()
+        elif state["field"] is not None:
+            fields[state["field"]] = state["value"].decode("utf-8", "replace")
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise HTTPException(status_code=413, detail="Upload too large")
+            parser.write(chunk)
+        parser.finalize()
+    except HTTPException:
+        for upload in uploads:
+            upload.close()
+        raise
+    except Exception as e:
+        for upload in uploads:
+            upload.close()
+        raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {e}")
+
+    return uploads, fields
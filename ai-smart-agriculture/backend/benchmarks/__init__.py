@@ -0,0 +1,5 @@
+"""
+Benchmark scripts. Run from the backend directory, e.g.:
+
+    python -m benchmarks.db_concurrency
+"""
@@ -0,0 +1,106 @@
+"""
+Benchmark the synchronous and async persistence paths under concurrency.
+
+Each simulated client repeatedly writes one prediction row and reads the
+latest history page, as the prediction endpoints do. The sync path uses a
+blocking Session inside a coroutine (how the routes used to work); the
+async path uses AsyncSession. Besides requests/sec, the benchmark reports
+the worst event-loop stall seen by a ticker task, which is what every
+other in-flight request experiences.
+
+Usage:
+    python -m benchmarks.db_concurrency [--clients 50] [--requests 20]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.prediction import Prediction
+
+
+ROW = {
+    "prediction_type": "soil",
+    "input_data": {"nitrogen": 90, "phosphorus": 42, "potassium": 43, "ph": 6.5, "rainfall": 202.5},
+    "result": {"recommended_crop": "Rice", "confidence": 0.99},
+    "confidence": 0.99
+}
+
+
+async def watch_loop(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the largest delay between scheduled and actual ticker wake-ups."""
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+async def run_sync(url: str, clients: int, requests: int):
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+    Session = sessionmaker(bind=engine)
+
+    async def client():
+        for _ in range(requests):
+            with Session() as db:
+                db.execute(insert(Prediction), [ROW])
+                db.commit()
+                db.execute(select(Prediction).order_by(Prediction.created_at.desc()).limit(50)).all()
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    engine.dispose()
+
+
+async def run_async(url: str, clients: int, requests: int):
+    engine = create_async_engine(url, connect_args={"timeout": 30})
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def client():
+        for _ in range(requests):
+            async with Session() as db:
+                await db.execute(insert(Prediction), [ROW])
+                await db.commit()
+                (await db.execute(
+                    select(Prediction).order_by(Prediction.created_at.desc()).limit(50)
+                )).all()
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    await engine.dispose()
+
+
+async def measure(name: str, runner, url: str, clients: int, requests: int):
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    start = time.perf_counter()
+    await runner(url, clients, requests)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await watcher
+
+    total = clients * requests
+    print(f"{name:>5}: {total / elapsed:8.1f} req/s   max loop stall {stall * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+
+        print(f"{args.clients} concurrent clients x {args.requests} requests")
+        asyncio.run(measure("sync", run_sync, f"sqlite:///{path}", args.clients, args.requests))
+        asyncio.run(measure("async", run_async, f"sqlite+aiosqlite:///{path}", args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark full-resolution and reduced-resolution image decoding.
+
+Writes synthetic photos at typical phone resolutions, then decodes each to
+the model's 224x224 input with the old path (full Image.open decode, then
+resize) and with ml_models.image_decoding.decode_image. Every measurement
+runs in a fresh subprocess so peak RSS belongs to that path alone.
+
+Usage:
+    python -m benchmarks.decode_benchmark [--repeat 5] [--sizes 4000x3000 6000x4000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+
+def make_photo(path: str, width: int, height: int, fmt: str):
+    """Write a leaf-like noisy gradient image."""
+    rng = np.random.default_rng(0)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = 60 + 80 * x * y
+    pixels[..., 1] = 120 + 60 * (1 - y) * x
+    pixels[..., 2] = 50 + 40 * y
+    pixels += rng.integers(0, 24, size=(height, width, 1), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, format=fmt, quality=90)
+
+
+def decode_legacy(path: str) -> np.ndarray:
+    """The detector's previous path: full decode, then resize."""
+    return np.array(Image.open(path).resize((224, 224)))
+
+
+def decode_reduced(path: str) -> np.ndarray:
+    """Header check, then draft decode near 224x224."""
+    from ml_models.image_decoding import decode_image
+    return np.array(decode_image(path))
+
+
+def peak_rss_kb() -> int:
+    """
+    Peak resident set size of this process in KiB.
+
+    Reads VmHWM on Linux: ru_maxrss survives exec, so a subprocess would
+    report its parent's peak.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(path: str, method: str, repeat: int):
+    """Time one decode path and print latency and peak RSS as JSON."""
+    import ml_models.image_decoding  # noqa: F401  (keep import cost out of the baseline)
+    decode = decode_legacy if method == "legacy" else decode_reduced
+    baseline_kb = peak_rss_kb()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decode(path)
+        timings.append(time.perf_counter() - started)
+
+    peak_kb = peak_rss_kb()
+    print(json.dumps({
+        "ms_median": round(1000 * float(np.median(timings)), 2),
+        "ms_min": round(1000 * min(timings), 2),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "decode_rss_mb": round((peak_kb - baseline_kb) / 1024, 1)
+    }))
+
+
+def measure(path: str, method: str, repeat: int) -> dict:
+    """Run worker() in a subprocess."""
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.decode_benchmark",
+         "--worker", path, method, "--repeat", str(repeat)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="Decodes per measurement")
+    parser.add_argument("--sizes", nargs="+", default=["4000x3000", "6000x4000"],
+                        help="Image sizes as WIDTHxHEIGHT")
+    parser.add_argument("--formats", nargs="+", default=["JPEG", "PNG"], help="PIL formats")
+    parser.add_argument("--worker", nargs=2, metavar=("PATH", "METHOD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.formats:
+            for size in args.sizes:
+                width, height = (int(v) for v in size.split("x"))
+                path = os.path.join(tmp, f"photo_{size}.{fmt.lower()}")
+                make_photo(path, width, height, fmt)
+                megabytes = os.path.getsize(path) / 1e6
+
+                print(f"{fmt} {size} ({width * height / 1e6:.0f} MP, {megabytes:.1f} MB)")
+                for method in ("legacy", "reduced"):
+                    result = measure(path, method, args.repeat)
+                    print(f"  {method:8s} median {result['ms_median']:8.1f} ms   "
+                          f"min {result['ms_min']:8.1f} ms   "
+                          f"decode RSS +{result['decode_rss_mb']:6.1f} MB   "
+                          f"peak RSS {result['peak_rss_mb']:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark the histogram feature kernel against the previous implementation.
+
+The previous _analyze_image_features resized the image again and made
+separate float passes for the mean, the standard deviation and each channel
+mean. The kernel counts per-channel uint8 histograms and derives every
+feature from them. Checks that both produce the same features.
+
+Usage:
+    python -m benchmarks.feature_kernel [--images 32] [--repeat 5]
+"""
+import argparse
+import time
+import numpy as np
+from PIL import Image
+from ml_models.crop_disease_model import CropDiseaseDetector
+from ml_models.image_decoding import TARGET_SIZE
+
+
+def legacy_features(image: Image.Image) -> dict:
+    """The detector's previous feature extraction, kept for comparison."""
+    img_array = np.array(image.resize(TARGET_SIZE))
+    mean_brightness = np.mean(img_array)
+    std_brightness = np.std(img_array)
+    if len(img_array.shape) == 3 and img_array.shape[2] == 3:
+        green_intensity = np.mean(img_array[:, :, 1])
+        red_intensity = np.mean(img_array[:, :, 0])
+        blue_intensity = np.mean(img_array[:, :, 2])
+        green_ratio = green_intensity / (mean_brightness + 1)
+        brown_score = (red_intensity + green_intensity / 2) / (green_intensity + blue_intensity + 1)
+    else:
+        green_ratio = 0.5
+        brown_score = 0.5
+    return {"brightness": mean_brightness, "std": std_brightness,
+            "green_ratio": green_ratio, "brown_score": brown_score}
+
+
+def best_of(fn, repeat: int) -> float:
+    """Fastest wall-clock time of `repeat` runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the image feature kernel")
+    parser.add_argument("--images", type=int, default=32, help="Images per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    stack = rng.integers(0, 256, size=(args.images, 224, 224, 3), dtype=np.uint8)
+    images = [Image.fromarray(array) for array in stack]
+    detector = CropDiseaseDetector()
+
+    worst = 0.0
+    for image, array in zip(images, stack):
+        old = legacy_features(image)
+        new = detector._analyze_image_features(image)
+        worst = max(worst, max(abs(float(old[k]) - new[k]) for k in old))
+    print(f"Max feature difference vs previous implementation: {worst:.2e}")
+
+    n = args.images
+    runs = {
+        "previous (per image)": lambda: [legacy_features(image) for image in images],
+        "kernel (per image)": lambda: [detector._analyze_image_features(image) for image in images],
+        "kernel (batched stack)": lambda: detector._analyze_image_batch(stack),
+    }
+    baseline = None
+    for name, fn in runs.items():
+        seconds = best_of(fn, args.repeat)
+        baseline = baseline or seconds
+        print(f"  {name:24s} {1e6 * seconds / n:8.1f} us/image   {baseline / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
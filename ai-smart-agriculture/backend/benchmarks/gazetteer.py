@@ -0,0 +1,97 @@
+"""
+Benchmark the location gazetteer at village scale.
+
+Builds a gazetteer of synthetic villages (random syllable names, one alias
+each, points spread over India) and times exact lookups, prefix
+autocomplete and nearest-location queries. Nearest queries are checked
+against, and compared with, a brute-force haversine scan.
+
+Usage:
+    python -m benchmarks.gazetteer [--entries 100000] [--queries 2000]
+"""
+import argparse
+import time
+import numpy as np
+from ml_models.gazetteer import EARTH_RADIUS_KM, Gazetteer
+
+SYLLABLES = np.array(["ka", "ra", "pur", "ga", "nag", "li", "ma", "ban", "so", "di",
+                      "har", "wa", "la", "ta", "gao", "ko", "ne", "sar", "bad", "hal"])
+
+
+def synthetic_gazetteer(entries: int, seed: int = 0) -> Gazetteer:
+    """Random villages with two-to-four syllable names and one alias each."""
+    rng = np.random.default_rng(seed)
+    parts = rng.integers(0, len(SYLLABLES), size=(entries, 4))
+    lengths = rng.integers(2, 5, size=entries)
+    names = ["".join(SYLLABLES[p[:n]]).title() + f" {i}" for i, (p, n) in enumerate(zip(parts, lengths))]
+    return Gazetteer(
+        names=names,
+        states=["Synthetic"] * entries,
+        lat=rng.uniform(8, 35, entries),
+        lon=rng.uniform(68, 97, entries),
+        base_temp=rng.uniform(14, 30, entries),
+        humidity_low=rng.uniform(25, 60, entries),
+        humidity_high=rng.uniform(65, 90, entries),
+        aliases=[[name.replace(" ", "-") + "-khurd"] for name in names]
+    )
+
+
+def brute_force_nearest(gazetteer: Gazetteer, lat: float, lon: float) -> tuple:
+    """Nearest row by haversine distance over every location."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2 = np.radians(gazetteer.lat.astype(np.float64))
+    lon2 = np.radians(gazetteer.lon.astype(np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    row = int(distance.argmin())
+    return row, distance[row]
+
+
+def per_query_us(fn, queries) -> float:
+    """Average microseconds per call of fn over the queries."""
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return 1e6 * (time.perf_counter() - started) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the location gazetteer")
+    parser.add_argument("--entries", type=int, default=100000, help="Synthetic locations")
+    parser.add_argument("--queries", type=int, default=2000, help="Queries per measurement")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    gazetteer = synthetic_gazetteer(args.entries)
+    build_seconds = time.perf_counter() - started
+    print(f"Built {len(gazetteer)} locations in {build_seconds:.2f}s, "
+          f"{gazetteer.memory_bytes() / 2**20:.1f} MB of arrays")
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(gazetteer), args.queries)
+    names = [str(gazetteer.names[i]).upper() for i in picks]
+    prefixes = [name[:3] for name in names]
+    points = np.column_stack([rng.uniform(8, 35, args.queries), rng.uniform(68, 97, args.queries)])
+
+    assert all(gazetteer.lookup(name) == i for name, i in zip(names, picks))
+    for lat, lon in points[:50]:
+        row, distance = gazetteer.nearest(lat, lon)
+        _, expected = brute_force_nearest(gazetteer, lat, lon)
+        assert abs(distance - expected) < 1e-3, (distance, expected)
+
+    print(f"  exact lookup              {per_query_us(gazetteer.lookup, names):8.1f} us/query")
+    print(f"  prefix search (3 chars)   {per_query_us(gazetteer.search, prefixes):8.1f} us/query")
+    print(f"  nearest (KD-tree)         "
+          f"{per_query_us(lambda p: gazetteer.nearest(*p), points):8.1f} us/query")
+    sample = points[:max(1, args.queries // 20)]
+    print(f"  nearest (brute force)     "
+          f"{per_query_us(lambda p: brute_force_nearest(gazetteer, *p), sample):8.1f} us/query")
+
+    started = time.perf_counter()
+    gazetteer.nearest(points[:, 0], points[:, 1])
+    print(f"  nearest (KD-tree, batch)  "
+          f"{1e6 * (time.perf_counter() - started) / len(points):8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
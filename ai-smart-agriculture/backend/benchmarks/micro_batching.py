@@ -0,0 +1,77 @@
+"""
+Benchmark the micro-batching scheduler in front of the CNN disease model.
+
+Concurrent clients each submit decoded 224x224 images one at a time. The
+unbatched run gives every request its own forward pass (max batch size 1);
+the batched runs let the scheduler group waiting requests. Reports
+throughput, request latency and the scheduler's batch-size distribution.
+
+Usage:
+    python -m benchmarks.micro_batching [--clients 32] [--requests 20]
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from app.services.batching import MicroBatchScheduler, _percentile
+from app.services.executor import InferenceExecutor
+from ml_models.cnn_disease_model import DiseaseCNN
+from ml_models.synthetic_data.leaf_images import generate_leaf_images
+
+
+async def run(model: DiseaseCNN, executor: InferenceExecutor, images: np.ndarray,
+              clients: int, requests: int, max_batch_size: int, max_wait_ms: float) -> dict:
+    """Drive `clients` concurrent request loops through one scheduler."""
+    scheduler = MicroBatchScheduler(
+        lambda arrays: model.predict_batch(np.stack(arrays)),
+        executor.run_in_thread,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms
+    )
+    await scheduler.start()
+    latencies = []
+
+    async def client(offset: int):
+        for i in range(requests):
+            started = time.perf_counter()
+            await scheduler.submit(images[(offset + i) % len(images)])
+            latencies.append(1000 * (time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    elapsed = time.perf_counter() - started
+    await scheduler.stop()
+
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+        "batch_size": scheduler.stats()["batch_size"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CNN micro-batching")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Scheduler max wait")
+    args = parser.parse_args()
+
+    model = DiseaseCNN()
+    images, _ = generate_leaf_images(8, size=224, seed=3)
+    executor = InferenceExecutor(thread_workers=4, process_workers=0)
+
+    try:
+        for max_batch_size in (1, 8, 16, 32):
+            result = asyncio.run(run(model, executor, images, args.clients, args.requests,
+                                     max_batch_size, args.max_wait_ms))
+            label = "unbatched" if max_batch_size == 1 else f"max batch {max_batch_size}"
+            print(f"  {label:14s} {result['throughput']:8.1f} images/s   "
+                  f"p50 {result['p50_ms']:7.1f} ms   p95 {result['p95_ms']:7.1f} ms   "
+                  f"avg batch {result['batch_size']['avg']}")
+    finally:
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Check that the compiled soil forest matches sklearn exactly, and time
+single-sample inference on both engines.
+
+Trains the production forest (same data and hyperparameters), compiles it,
+round-trips it through a model artifact and compares predict_proba for
+bit-for-bit equality on the training data, random samples over the full
+input range, and samples on and one float32 step either side of every
+split threshold. Both the batched and the single-sample path are checked.
+Exits with status 1 on any mismatch, so it can gate CI.
+
+Usage:
+    python -m benchmarks.soil_parity [--samples 5000] [--calls 2000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import numpy as np
+from ml_models.model_artifact import load_forest_artifact, save_forest_artifact
+from ml_models.soil_model import SoilRecommendationModel
+from ml_models.tree_engine import CompiledForest
+
+
+def per_call_us(fn, calls: int) -> float:
+    """Best average microseconds per call of fn over five rounds."""
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - started) / calls)
+    return 1e6 * best
+
+
+def mismatches(expected: np.ndarray, actual: np.ndarray) -> int:
+    """Rows whose probabilities differ in any bit."""
+    return int(np.count_nonzero((expected != actual).any(axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check compiled soil forest parity with sklearn")
+    parser.add_argument("--samples", type=int, default=5000, help="Random samples to compare")
+    parser.add_argument("--calls", type=int, default=2000, help="Calls per latency measurement")
+    args = parser.parse_args()
+
+    model = SoilRecommendationModel(load=False)
+    X_train, y_train = model._generate_synthetic_data(2000)
+    estimator = model._new_forest()
+    estimator.fit(X_train, y_train)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = f"{directory}/soil_model"
+        save_forest_artifact(path, CompiledForest.from_sklearn(estimator),
+                             estimator.feature_importances_)
+        forest, _ = load_forest_artifact(path)
+
+        rng = np.random.default_rng(0)
+        random = np.column_stack([
+            rng.uniform(0, 200, size=(args.samples, 3)),
+            rng.uniform(0, 14, size=args.samples),
+            rng.uniform(0, 500, size=args.samples)
+        ])
+        cases = {
+            "training data": X_train,
+            "random inputs": random,
+            "split boundaries": forest.boundary_samples(random)
+        }
+
+        failed = False
+        for name, features in cases.items():
+            expected = estimator.predict_proba(features)
+            batched = mismatches(expected, forest.predict_proba(features))
+            single_rows = features[:args.samples]
+            single = mismatches(expected[:len(single_rows)],
+                                np.array([forest.predict_proba_one(x) for x in single_rows]))
+            failed |= bool(batched or single)
+            print(f"  {name:17s} {len(features):7d} rows   batched mismatches {batched}   "
+                  f"single-sample mismatches {single} of {len(single_rows)}")
+
+        sample = np.array([[90, 42, 43, 6.5, 202.5]])
+        estimator.set_params(n_jobs=1)
+        model.engine, model.compiled = "compiled", forest
+        print("Single-sample latency:")
+        print(f"  sklearn predict_proba        {per_call_us(lambda: estimator.predict_proba(sample), args.calls // 10):8.1f} us")
+        print(f"  compiled predict_proba       {per_call_us(lambda: forest.predict_proba(sample), args.calls):8.1f} us")
+        print(f"  compiled predict_proba_one   {per_call_us(lambda: forest.predict_proba_one(sample[0]), args.calls):8.1f} us")
+        print(f"  SoilRecommendationModel.predict "
+              f"{per_call_us(lambda: model.predict(90, 42, 43, 6.5, 202.5), args.calls):5.1f} us")
+
+    if failed:
+        print("Compiled forest does NOT match sklearn")
+        sys.exit(1)
+    print("Compiled forest matches sklearn exactly")
+
+
+if __name__ == "__main__":
+    main()
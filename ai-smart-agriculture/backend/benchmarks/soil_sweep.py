@@ -0,0 +1,62 @@
+"""
+Benchmark soil what-if sweeps.
+
+Scores a nitrogen x pH grid chunk by chunk, once evaluating every cell and
+once evaluating one cell per combination of forest split intervals, and
+formats the NDJSON output either way. Both runs are checked to give the
+same probabilities.
+
+Usage:
+    python -m benchmarks.soil_sweep [--steps 1000] [--chunk-size 16384]
+"""
+import argparse
+import time
+import numpy as np
+from app.services.soil_sweep import SoilGrid, crop_labels, format_cells
+from ml_models.soil_model import SoilRecommendationModel
+
+BASE = {"nitrogen": 90, "phosphorus": 42, "potassium": 43, "ph": 6.5, "rainfall": 202.5}
+
+
+def sweep(model: SoilRecommendationModel, grid: SoilGrid, chunk_size: int,
+          distinct: bool) -> float:
+    """Seconds to score and format the whole grid."""
+    labels = crop_labels([str(crop).title() for crop in model.classes])
+    started = time.perf_counter()
+    for first in range(0, grid.cells, chunk_size):
+        last = min(first + chunk_size, grid.cells)
+        if distinct:
+            swept, features, inverse = grid.distinct_features(first, last)
+        else:
+            features = grid.features(first, last)
+            swept, inverse = features[:, grid.columns], None
+        format_cells(first, swept, model.predict_probabilities(features), labels, inverse)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark soil what-if sweeps")
+    parser.add_argument("--steps", type=int, default=1000, help="Values per axis")
+    parser.add_argument("--chunk-size", type=int, default=16384, help="Cells per chunk")
+    args = parser.parse_args()
+
+    model = SoilRecommendationModel()
+    grid = SoilGrid(BASE, [
+        {"parameter": "nitrogen", "start": 0, "stop": 200, "steps": args.steps},
+        {"parameter": "ph", "start": 3, "stop": 10, "steps": args.steps}
+    ])
+    grid.use_thresholds([model.split_thresholds(column) for column in grid.columns])
+    print(f"{grid.cells} cells, at most {grid.distinct_cells} distinct predictions")
+
+    # Spot-check a chunk: representatives must reproduce every cell
+    _, features, inverse = grid.distinct_features(0, min(args.chunk_size, grid.cells))
+    expected = model.predict_probabilities(grid.features(0, len(inverse)))
+    assert np.array_equal(model.predict_probabilities(features)[inverse], expected)
+
+    for label, distinct in (("every cell", False), ("split intervals", True)):
+        seconds = sweep(model, grid, args.chunk_size, distinct)
+        print(f"  {label:16s} {seconds:7.2f}s   {grid.cells / seconds:10.0f} cells/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Maintenance commands for the Smart Agriculture Assistant backend.
+
+Usage:
+    python manage.py rebuild-rollups
+    python manage.py generate-weather-history [--years 3]
+    python manage.py cleanup-files [--max-age-hours 24]
+"""
+import argparse
+import time
+from datetime import date, timedelta
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app.services.rollups import rebuild_rollups
+
+
+def rebuild_rollups_command(args):
+    """Recompute statistics rollups from the predictions table."""
+    init_db()
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        result = rebuild_rollups(db, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"Rebuilt {result['buckets']} rollup buckets from "
+          f"{result['predictions']} predictions in {elapsed:.2f}s")
+
+
+def generate_weather_history_command(args):
+    """Pre-simulate daily weather for every gazetteer location."""
+    from ml_models.gazetteer import Gazetteer
+    from ml_models.weather_history import write_weather_history
+
+    gazetteer = Gazetteer.from_csv(args.locations)
+    last = date.fromisoformat(args.end) if args.end else date.today()
+    try:
+        first = last.replace(year=last.year - args.years)
+    except ValueError:
+        # Feb 29 has no counterpart in a non-leap year
+        first = last.replace(year=last.year - args.years, day=28)
+    first += timedelta(days=1)
+    write_weather_history(args.directory, gazetteer, first, (last - first).days + 1,
+                          batch_size=args.batch_size, seed=args.seed)
+    print(f"Weather history covers {first.isoformat()} to {last.isoformat()}; "
+          f"restart the server to serve it")
+
+
+def cleanup_files_command(args):
+    """Remove uploads and cached features older than the retention period."""
+    from app.services.feature_cache import FeatureCache
+    from app.utils.image_processing import ImageProcessor
+    from ml_models.crop_disease_model import CropDiseaseDetector
+
+    ImageProcessor(settings.UPLOAD_DIR).cleanup_old_files(args.max_age_hours)
+    if settings.FEATURE_CACHE_DIR:
+        cache = FeatureCache(settings.FEATURE_CACHE_DIR, max_entries=0,
+                             feature_version=CropDiseaseDetector.FEATURE_VERSION)
+        removed = cache.cleanup_old_files(args.max_age_hours)
+        print(f"Removed {removed} cached feature files")
+    print(f"Removed files unused for more than {args.max_age_hours} hours")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Agriculture Assistant maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups",
+                                  help="Recompute statistics rollups from raw predictions")
+    rebuild.add_argument("--chunk-size", type=int, default=10000,
+                         help="Predictions fetched per round trip")
+    rebuild.set_defaults(handler=rebuild_rollups_command)
+
+    history = commands.add_parser("generate-weather-history",
+                                  help="Pre-simulate multi-year daily weather for every location")
+    history.add_argument("--years", type=int, default=3, help="Years of history")
+    history.add_argument("--end", help="Last day, YYYY-MM-DD (default today)")
+    history.add_argument("--directory", default=settings.WEATHER_HISTORY_DIR,
+                         help="Output directory")
+    history.add_argument("--locations", default=settings.GAZETTEER_PATH,
+                         help="Location table (gazetteer CSV)")
+    history.add_argument("--batch-size", type=int, default=256,
+                         help="Locations simulated per vectorized batch")
+    history.add_argument("--seed", type=int, default=0, help="Random seed")
+    history.set_defaults(handler=generate_weather_history_command)
+
+    cleanup = commands.add_parser("cleanup-files",
+                                  help="Remove old uploads and cached image features")
+    cleanup.add_argument("--max-age-hours", type=int, default=settings.FILE_RETENTION_HOURS,
+                         help="Keep files used within this many hours")
+    cleanup.set_defaults(handler=cleanup_files_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Small convolutional disease classifier that trains and runs on CPU with NumPy.
+One 5x5 convolution (as an im2col matrix multiply), ReLU, global average and
+max pooling, and a dense softmax layer. It is trained on synthetic leaf
+images, so it works fully offline, and is meant to be run on batches: one
+forward pass over N stacked images costs far less than N single passes.
+"""
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Tuple
+from ml_models.crop_disease_model import CropDiseaseDetector
+from ml_models.synthetic_data.leaf_images import LEAF_CLASSES, generate_leaf_images
+
+
+class DiseaseCNN:
+    """Convolutional crop disease classifier."""
+
+    INPUT_SIZE = 56  # images are average-pooled down to this before the conv
+    KERNEL = 5
+    FILTERS = 16
+    CLASSES = LEAF_CLASSES
+
+    def __init__(self, weights_path: str = None):
+        """
+        Initialize the model, loading saved weights or training new ones.
+
+        Args:
+            weights_path: .npz weights file; defaults to ml_models/disease_cnn.npz
+        """
+        self.weights_path = weights_path or os.path.join(os.path.dirname(__file__), "disease_cnn.npz")
+        self.params: Dict[str, np.ndarray] = {}
+        self._load_or_train_model()
+
+    def _init_params(self, seed: int = 0):
+        """Random He-initialized weights."""
+        rng = np.random.default_rng(seed)
+        fan_in = self.KERNEL * self.KERNEL * 3
+        self.params = {
+            "conv_w": (rng.normal(0, np.sqrt(2 / fan_in), (fan_in, self.FILTERS))).astype(np.float32),
+            "conv_b": np.zeros(self.FILTERS, dtype=np.float32),
+            "dense_w": (rng.normal(0, np.sqrt(1 / (2 * self.FILTERS)),
+                                   (2 * self.FILTERS, len(self.CLASSES)))).astype(np.float32),
+            "dense_b": np.zeros(len(self.CLASSES), dtype=np.float32),
+        }
+
+    def _preprocess(self, images: np.ndarray) -> np.ndarray:
+        """
+        Scale uint8 images to centered floats at INPUT_SIZE.
+
+        Args:
+            images: uint8 array of shape (N, S, S, 3), S a multiple of INPUT_SIZE
+
+        Returns:
+            float32 array of shape (N, INPUT_SIZE, INPUT_SIZE, 3)
+        """
+        n, height, width, _ = images.shape
+        factor = height // self.INPUT_SIZE
+        if height != width or height % self.INPUT_SIZE:
+            raise ValueError(f"Expected square images with a side multiple of {self.INPUT_SIZE}")
+        pooled = images.reshape(n, self.INPUT_SIZE, factor, self.INPUT_SIZE, factor, 3)
+        return pooled.mean(axis=(2, 4), dtype=np.float32) / 255.0 - 0.5
+
+    def _im2col(self, x: np.ndarray) -> np.ndarray:
+        """(N, H, W, 3) -> (N, positions, KERNEL*KERNEL*3) patch matrix."""
+        windows = sliding_window_view(x, (self.KERNEL, self.KERNEL), axis=(1, 2))
+        n, rows, cols = windows.shape[:3]
+        return np.ascontiguousarray(windows).reshape(n, rows * cols, -1)
+
+    def _forward(self, x: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Logits for preprocessed images, plus the activations backprop needs."""
+        p = self.params
+        patches = self._im2col(x)
+        conv = patches @ p["conv_w"] + p["conv_b"]  # (N, P, F)
+        relu = np.maximum(conv, 0)
+        pooled = np.concatenate([relu.mean(axis=1), relu.max(axis=1)], axis=1)  # (N, 2F)
+        logits = pooled @ p["dense_w"] + p["dense_b"]
+        return logits, {"patches": patches, "conv": conv, "relu": relu, "pooled": pooled}
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True)
+
+    def _gradients(self, x: np.ndarray, labels: np.ndarray) -> Tuple[float, Dict[str, np.ndarray]]:
+        """Cross-entropy loss and parameter gradients for one minibatch."""
+        logits, cache = self._forward(x)
+        probs = self._softmax(logits)
+        n = len(labels)
+        loss = float(-np.log(probs[np.arange(n), labels] + 1e-9).mean())
+
+        d_logits = probs
+        d_logits[np.arange(n), labels] -= 1
+        d_logits /= n
+
+        grads = {
+            "dense_w": cache["pooled"].T @ d_logits,
+            "dense_b": d_logits.sum(axis=0),
+        }
+        d_pooled = d_logits @ self.params["dense_w"].T
+        relu = cache["relu"]
+        positions = relu.shape[1]
+
+        # Average pooling spreads its gradient evenly; max pooling routes
+        # it to the winning position of each filter
+        d_relu = np.broadcast_to(d_pooled[:, None, :self.FILTERS] / positions, relu.shape).copy()
+        winners = relu.argmax(axis=1)  # (N, F)
+        rows = np.arange(n)[:, None]
+        filters = np.arange(self.FILTERS)[None, :]
+        d_relu[rows, winners, filters] += d_pooled[:, self.FILTERS:]
+
+        d_conv = d_relu * (cache["conv"] > 0)
+        patches = cache["patches"]
+        grads["conv_w"] = patches.reshape(-1, patches.shape[2]).T @ d_conv.reshape(-1, self.FILTERS)
+        grads["conv_b"] = d_conv.sum(axis=(0, 1))
+        return loss, grads
+
+    def fit(self, images: np.ndarray, labels: np.ndarray, epochs: int = 12,
+            batch_size: int = 32, learning_rate: float = 0.01, seed: int = 0):
+        """
+        Train with Adam on uint8 images.
+
+        Args:
+            images: uint8 array of shape (N, S, S, 3)
+            labels: Class indices into CLASSES
+            epochs: Passes over the data
+            batch_size: Minibatch size
+            learning_rate: Adam step size
+            seed: Shuffling seed
+        """
+        self._init_params(seed)
+        x = self._preprocess(images)
+        rng = np.random.default_rng(seed)
+        moments = {name: (np.zeros_like(v), np.zeros_like(v)) for name, v in self.params.items()}
+        beta1, beta2, step = 0.9, 0.999, 0
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(x))
+            losses = []
+            for start in range(0, len(x), batch_size):
+                batch = order[start:start + batch_size]
+                loss, grads = self._gradients(x[batch], labels[batch])
+                losses.append(loss)
+                step += 1
+                for name, grad in grads.items():
+                    m, v = moments[name]
+                    m *= beta1
+                    m += (1 - beta1) * grad
+                    v *= beta2
+                    v += (1 - beta2) * grad * grad
+                    m_hat = m / (1 - beta1 ** step)
+                    v_hat = v / (1 - beta2 ** step)
+                    self.params[name] -= (learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)).astype(np.float32)
+            print(f"Epoch {epoch + 1}/{epochs}: loss {np.mean(losses):.4f}")
+
+    def predict_proba(self, images: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for a batch in one forward pass.
+
+        Args:
+            images: uint8 array of shape (N, S, S, 3)
+
+        Returns:
+            float32 array of shape (N, len(CLASSES))
+        """
+        logits, _ = self._forward(self._preprocess(images))
+        return self._softmax(logits)
+
+    def predict_batch(self, images: np.ndarray) -> List[Tuple[str, float, str, str, str]]:
+        """
+        Predict disease for a batch of images.
+
+        Args:
+            images: uint8 array of shape (N, 224, 224, 3)
+
+        Returns:
+            One (disease_name, confidence, treatment, description, severity)
+            tuple per image, like CropDiseaseDetector.predict
+        """
+        probs = self.predict_proba(images)
+        results = []
+        for row in probs:
+            disease = self.CLASSES[int(row.argmax())]
+            info = CropDiseaseDetector.DISEASES[disease]
+            results.append((
+                disease.replace("_", " ").title(),
+                round(float(row.max()), 2),
+                info["treatment"],
+                info["description"],
+                info["severity"]
+            ))
+        return results
+
+    def _train_model(self):
+        """Train on freshly generated synthetic leaf images and save."""
+        print("Training CNN disease model...")
+        images, labels = generate_leaf_images(200, size=self.INPUT_SIZE, seed=0)
+        self.fit(images, labels)
+
+        test_images, test_labels = generate_leaf_images(50, size=self.INPUT_SIZE, seed=1)
+        accuracy = (self.predict_proba(test_images).argmax(axis=1) == test_labels).mean()
+        print(f"Testing accuracy: {accuracy:.3f}")
+
+        self._save_model()
+
+    def _save_model(self):
+        """Write the weights as an .npz archive."""
+        np.savez(self.weights_path, classes=np.array(self.CLASSES), **self.params)
+        print(f"Model saved to {self.weights_path}")
+
+    def _load_or_train_model(self):
+        """Load saved weights if they match this architecture, otherwise train."""
+        if os.path.exists(self.weights_path):
+            try:
+                with np.load(self.weights_path) as saved:
+                    if tuple(saved["classes"]) != tuple(self.CLASSES):
+                        raise ValueError("class list changed")
+                    self._init_params()
+                    for name, value in self.params.items():
+                        if saved[name].shape != value.shape:
+                            raise ValueError(f"'{name}' has shape {saved[name].shape}")
+                        self.params[name] = saved[name].astype(np.float32)
+                print("CNN disease model loaded successfully")
+                return
+            except Exception as e:
+                print(f"Error loading CNN disease model ({e}), retraining...")
+
+        self._train_model()
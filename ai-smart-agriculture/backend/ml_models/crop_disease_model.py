@@ -5,7 +5,9 @@ This module simulates a lightweight CNN model for disease detection.
 import random
 import numpy as np
 from PIL import Image
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional
+from ml_models.image_decoding import TARGET_SIZE, decode_image
+from ml_models.image_features import compute_features, compute_features_batch
 
 
 class CropDiseaseDetector:
@@ -65,6 +67,10 @@ class CropDiseaseDetector:
         }
     }
     
+    # Bump when extracted features change, so cached feature vectors are
+    # not reused across versions
+    FEATURE_VERSION = 1
+    
     def __init__(self):
         """Initialize the disease detector."""
         self.model_loaded = True
@@ -74,117 +80,186 @@ class CropDiseaseDetector:
         """
         Analyze basic image features to influence prediction.
         This simulates feature extraction from a CNN model.
+        
+        Features come from one histogram sweep over the uint8 pixels; see
+        ml_models.image_features to add more.
         """
-        # Convert to numpy array
-        img_array = np.array(image.resize((224, 224)))
-        
-        # Calculate basic statistics that might correlate with disease
-        mean_brightness = np.mean(img_array)
-        std_brightness = np.std(img_array)
-        
-        # Analyze color channels if RGB
-        if len(img_array.shape) == 3 and img_array.shape[2] == 3:
-            green_intensity = np.mean(img_array[:, :, 1])
-            red_intensity = np.mean(img_array[:, :, 0])
-            blue_intensity = np.mean(img_array[:, :, 2])
-            
-            # Calculate color ratios
-            green_ratio = green_intensity / (mean_brightness + 1)
-            brown_score = (red_intensity + green_intensity / 2) / (green_intensity + blue_intensity + 1)
-        else:
-            green_ratio = 0.5
-            brown_score = 0.5
-        
-        return {
-            "brightness": mean_brightness,
-            "std": std_brightness,
-            "green_ratio": green_ratio,
-            "brown_score": brown_score
-        }
+        # Decoded images are already at model resolution
+        if image.size != TARGET_SIZE:
+            image = image.resize(TARGET_SIZE)
+        return compute_features(np.asarray(image))
     
-    def predict(self, image_path: str) -> Tuple[str, float, str, str, str]:
+    def _analyze_image_batch(self, images: np.ndarray) -> List[Dict[str, float]]:
         """
-        Predict disease from image.
+        _analyze_image_features for a stack of same-mode images.
         
         Args:
-            image_path: Path to the crop image
+            images: uint8 array of shape (N, 224, 224, 3)
             
         Returns:
-            Tuple of (disease_name, confidence, treatment, description, severity)
+            One feature dictionary per image, in order
         """
-        try:
-            # Load and analyze image
-            image = Image.open(image_path)
-            features = self._analyze_image_features(image)
+        return compute_features_batch(images)
+    
+    def decode_array(self, image_source, mode: Optional[str] = None) -> np.ndarray:
+        """
+        Decode an image to a model-resolution pixel array.
+        
+        Args:
+            image_source: Anything extract_features accepts
+            mode: PIL mode to convert to (e.g. "RGB"); None keeps the image's own
             
-            # Use image features to influence prediction (simulated ML behavior)
-            if features["green_ratio"] > 0.6 and features["std"] < 50:
-                # High green ratio and low variance suggests healthy plant
-                disease_weights = {
-                    "healthy": 0.7,
-                    "early_blight": 0.1,
-                    "leaf_spot": 0.1,
-                    "powdery_mildew": 0.05,
-                    "rust": 0.05
-                }
-            elif features["brown_score"] > 0.7:
-                # High brown score suggests blight or wilting
-                disease_weights = {
-                    "late_blight": 0.4,
-                    "early_blight": 0.3,
-                    "bacterial_wilt": 0.2,
-                    "anthracnose": 0.1
-                }
-            elif features["brightness"] < 80:
-                # Dark image might indicate severe disease
-                disease_weights = {
-                    "late_blight": 0.3,
-                    "bacterial_wilt": 0.25,
-                    "anthracnose": 0.2,
-                    "mosaic_virus": 0.15,
-                    "rust": 0.1
-                }
-            else:
-                # General distribution for moderate symptoms
-                disease_weights = {
-                    "leaf_spot": 0.25,
-                    "early_blight": 0.2,
-                    "powdery_mildew": 0.15,
-                    "rust": 0.15,
-                    "septoria_leaf_spot": 0.1,
-                    "healthy": 0.1,
-                    "anthracnose": 0.05
-                }
+        Returns:
+            uint8 array of shape (224, 224) or (224, 224, channels)
             
-            # Select disease based on weights
-            diseases = list(disease_weights.keys())
-            weights = list(disease_weights.values())
-            predicted_disease = random.choices(diseases, weights=weights)[0]
+        Raises:
+            ValueError: If the image cannot be decoded
+        """
+        return np.asarray(decode_image(image_source, TARGET_SIZE, mode=mode))
+    
+    def features_from_arrays(self, arrays: List[np.ndarray]) -> List[Dict[str, float]]:
+        """
+        Extract features from many decoded images at once.
+        
+        RGB images are stacked into one (N, 224, 224, 3) array and analyzed
+        together; other modes (grayscale, RGBA, palette) go one by one.
+        
+        Args:
+            arrays: Outputs of decode_array
             
-            # Generate confidence score (higher for clear cases)
-            base_confidence = disease_weights[predicted_disease]
-            confidence = min(0.95, base_confidence + random.uniform(0.05, 0.20))
+        Returns:
+            One feature dictionary of plain floats per array, in order
+        """
+        features: List[Optional[Dict[str, float]]] = [None] * len(arrays)
+        
+        rgb = [i for i, array in enumerate(arrays)
+               if array.dtype == np.uint8 and array.ndim == 3 and array.shape[2] == 3
+               and array.shape[:2] == TARGET_SIZE[::-1]]
+        if rgb:
+            stack = np.stack([arrays[i] for i in rgb])
+            for i, values in zip(rgb, self._analyze_image_batch(stack)):
+                features[i] = values
+        
+        for i, array in enumerate(arrays):
+            if features[i] is None:
+                features[i] = self._analyze_image_features(Image.fromarray(array))
+        
+        return features
+    
+    def extract_features(self, image_source) -> Dict[str, float]:
+        """
+        Decode an image and extract its feature vector.
+        
+        Args:
+            image_source: Path to the crop image, its encoded bytes
+                (bytes or memoryview), or a binary buffer such as BytesIO
             
-            # Get disease information
-            disease_info = self.DISEASES[predicted_disease]
+        Returns:
+            Feature dictionary of plain floats
             
-            return (
-                predicted_disease.replace("_", " ").title(),
-                round(confidence, 2),
-                disease_info["treatment"],
-                disease_info["description"],
-                disease_info["severity"]
-            )
+        Raises:
+            ValueError: If the image cannot be decoded
+        """
+        # Check the header, then decode at (near) model resolution
+        image = decode_image(image_source, TARGET_SIZE)
+        return self._analyze_image_features(image)
+    
+    def predict(self, image_source) -> Tuple[str, float, str, str, str]:
+        """
+        Predict disease from image.
+        
+        Args:
+            image_source: Path to the crop image, its encoded bytes
+                (bytes or memoryview), or a binary buffer such as BytesIO
             
+        Returns:
+            Tuple of (disease_name, confidence, treatment, description, severity)
+        """
+        try:
+            features = self.extract_features(image_source)
         except Exception as e:
-            # Fallback prediction if image processing fails
-            return (
-                "Unable to Detect",
-                0.0,
-                "Please upload a clearer image of the crop leaves.",
-                f"Image processing error: {str(e)}",
-                "Unknown"
-            )
+            return self.unreadable_result(e)
+        
+        return self.predict_from_features(features)
+    
+    def unreadable_result(self, error: Exception) -> Tuple[str, float, str, str, str]:
+        """Fallback prediction if image processing fails."""
+        return (
+            "Unable to Detect",
+            0.0,
+            "Please upload a clearer image of the crop leaves.",
+            f"Image processing error: {str(error)}",
+            "Unknown"
+        )
+    
+    def predict_from_features(self, features: Dict[str, float]) -> Tuple[str, float, str, str, str]:
+        """
+        Predict disease from an already extracted feature vector.
+        
+        Args:
+            features: Output of extract_features
+            
+        Returns:
+            Tuple of (disease_name, confidence, treatment, description, severity)
+        """
+        # Use image features to influence prediction (simulated ML behavior)
+        if features["green_ratio"] > 0.6 and features["std"] < 50:
+            # High green ratio and low variance suggests healthy plant
+            disease_weights = {
+                "healthy": 0.7,
+                "early_blight": 0.1,
+                "leaf_spot": 0.1,
+                "powdery_mildew": 0.05,
+                "rust": 0.05
+            }
+        elif features["brown_score"] > 0.7:
+            # High brown score suggests blight or wilting
+            disease_weights = {
+                "late_blight": 0.4,
+                "early_blight": 0.3,
+                "bacterial_wilt": 0.2,
+                "anthracnose": 0.1
+            }
+        elif features["brightness"] < 80:
+            # Dark image might indicate severe disease
+            disease_weights = {
+                "late_blight": 0.3,
+                "bacterial_wilt": 0.25,
+                "anthracnose": 0.2,
+                "mosaic_virus": 0.15,
+                "rust": 0.1
+            }
+        else:
+            # General distribution for moderate symptoms
+            disease_weights = {
+                "leaf_spot": 0.25,
+                "early_blight": 0.2,
+                "powdery_mildew": 0.15,
+                "rust": 0.15,
+                "septoria_leaf_spot": 0.1,
+                "healthy": 0.1,
+                "anthracnose": 0.05
+            }
+        
+        # Select disease based on weights
+        diseases = list(disease_weights.keys())
+        weights = list(disease_weights.values())
+        predicted_disease = random.choices(diseases, weights=weights)[0]
+        
+        # Generate confidence score (higher for clear cases)
+        base_confidence = disease_weights[predicted_disease]
+        confidence = min(0.95, base_confidence + random.uniform(0.05, 0.20))
+        
+        # Get disease information
+        disease_info = self.DISEASES[predicted_disease]
+        
+        return (
+            predicted_disease.replace("_", " ").title(),
+            round(confidence, 2),
+            disease_info["treatment"],
+            disease_info["description"],
+            disease_info["severity"]
+        )
     
     def get_disease_info(self, disease_name: str) -> Dict:
         """Get detailed information about a specific disease."""
@@ -0,0 +1,226 @@
+"""
+Location gazetteer: names, aliases, coordinates and climate parameters of
+known places, held in flat NumPy arrays.
+
+Two indexes sit on top of the arrays. Normalized names and aliases are
+kept as one sorted byte-string array, so exact lookups and prefix
+(autocomplete) searches are binary searches with np.searchsorted.
+Coordinates are indexed by a KD-tree over points on the unit sphere, so
+any latitude/longitude resolves to the nearest known climate profile in
+logarithmic time.
+"""
+import csv
+import os
+import re
+import unicodedata
+import numpy as np
+from scipy.spatial import cKDTree
+from typing import Dict, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+
+# Table shipped with the backend
+DEFAULT_LOCATIONS_PATH = os.path.join(os.path.dirname(__file__), "data", "locations.csv")
+
+# "lat,lon" queries, e.g. "28.61, 77.21"
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case ASCII words separated by single spaces ("Port  Blair!" -> "port blair")."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", ascii_name.lower()).split())
+
+
+def parse_coordinates(query: str) -> Optional[Tuple[float, float]]:
+    """(lat, lon) if `query` is a valid "lat,lon" pair, else None."""
+    match = _COORDINATES.match(query)
+    if match is None:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def _unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """(N, 3) points on the unit sphere for latitudes/longitudes in degrees."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+class Gazetteer:
+    """Array-backed table of known locations with name and nearest-point indexes."""
+
+    def __init__(self, names: Sequence[str], states: Sequence[str],
+                 lat: Sequence[float], lon: Sequence[float], base_temp: Sequence[float],
+                 humidity_low: Sequence[float], humidity_high: Sequence[float],
+                 aliases: Optional[Sequence[Sequence[str]]] = None):
+        """
+        Build the table and both indexes.
+
+        Args:
+            names: Display name of each location
+            states: State or region of each location
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+            base_temp: Annual average temperature in Celsius
+            humidity_low: Low end of the typical humidity range, percent
+            humidity_high: High end of the typical humidity range, percent
+            aliases: Alternative names of each location, if any
+        """
+        self.names = np.asarray(names, dtype=str)
+        self.states = np.asarray(states, dtype=str)
+        self.lat = np.asarray(lat, dtype=np.float32)
+        self.lon = np.asarray(lon, dtype=np.float32)
+        self.base_temp = np.asarray(base_temp, dtype=np.float32)
+        self.humidity = np.column_stack([humidity_low, humidity_high]).astype(np.float32)
+        if len(self.names) == 0:
+            raise ValueError("Gazetteer needs at least one location")
+
+        # Name index: every normalized name and alias, sorted, pointing at its row
+        keys, rows = [], []
+        for row, name in enumerate(self.names):
+            variants = {normalize_name(name)}
+            if aliases is not None:
+                variants.update(normalize_name(alias) for alias in aliases[row])
+            variants.discard("")
+            keys.extend(variants)
+            rows.extend([row] * len(variants))
+        keys = np.array(keys, dtype=bytes)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._key_rows = np.asarray(rows, dtype=np.int32)[order]
+
+        # Chord distance between unit vectors grows with great-circle
+        # distance, so Euclidean nearest neighbours are the nearest places
+        self._tree = cKDTree(_unit_vectors(self.lat, self.lon))
+
+    @classmethod
+    def from_csv(cls, path: str = DEFAULT_LOCATIONS_PATH) -> "Gazetteer":
+        """
+        Load a location table.
+
+        The CSV needs name, aliases ("|"-separated, may be empty), state,
+        lat, lon, base_temp, humidity_low and humidity_high columns.
+
+        Args:
+            path: CSV file path
+
+        Returns:
+            Gazetteer with every row of the file
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+        return cls(
+            names=[r["name"] for r in records],
+            states=[r["state"] for r in records],
+            lat=[float(r["lat"]) for r in records],
+            lon=[float(r["lon"]) for r in records],
+            base_temp=[float(r["base_temp"]) for r in records],
+            humidity_low=[float(r["humidity_low"]) for r in records],
+            humidity_high=[float(r["humidity_high"]) for r in records],
+            aliases=[[a for a in r["aliases"].split("|") if a] for r in records]
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _key_range(self, key: bytes, prefix: bool) -> Tuple[int, int]:
+        """Slice of the sorted name index equal to (or starting with) `key`."""
+        low = int(np.searchsorted(self._keys, key, side="left"))
+        # Keys are ASCII, so key + 0xff sorts after every key it prefixes
+        high = int(np.searchsorted(self._keys, key + b"\xff" if prefix else key, side="right"))
+        return low, high
+
+    def lookup(self, name: str) -> Optional[int]:
+        """
+        Row of the location whose name or alias matches `name`.
+
+        Args:
+            name: Location name, in any case or spacing
+
+        Returns:
+            Row index, or None if unknown
+        """
+        key = normalize_name(name).encode("ascii")
+        if not key:
+            return None
+        low, high = self._key_range(key, prefix=False)
+        return int(self._key_rows[low]) if high > low else None
+
+    def search(self, prefix: str, limit: int = 10) -> List[int]:
+        """
+        Rows whose name or an alias starts with `prefix`, for autocomplete.
+
+        Args:
+            prefix: Typed text
+            limit: Most rows returned
+
+        Returns:
+            Distinct row indexes in alphabetical order of the matching name
+        """
+        key = normalize_name(prefix).encode("ascii")
+        if not key:
+            return []
+        low, high = self._key_range(key, prefix=True)
+        found: Dict[int, None] = {}
+        for row in self._key_rows[low:high]:
+            found.setdefault(int(row))
+            if len(found) >= limit:
+                break
+        return list(found)
+
+    def nearest(self, lat, lon, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest known locations to one or many points.
+
+        Args:
+            lat: Latitude(s) in degrees
+            lon: Longitude(s) in degrees
+            k: Neighbours per point
+
+        Returns:
+            Tuple of (row indexes, great-circle distances in km), shaped
+            like the query, with a trailing axis of length k when k > 1
+        """
+        chord, rows = self._tree.query(_unit_vectors(np.atleast_1d(lat), np.atleast_1d(lon)), k=k)
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+        if np.ndim(lat) == 0:
+            return rows[0], distance[0]
+        return rows, distance
+
+    def resolve(self, query: str) -> Optional[int]:
+        """
+        Row for a location name or alias, or the nearest row to "lat,lon".
+
+        Args:
+            query: Location name, or coordinates such as "28.61,77.21"
+
+        Returns:
+            Row index, or None for an unknown name
+        """
+        coordinates = parse_coordinates(query)
+        if coordinates is not None:
+            return int(self.nearest(*coordinates)[0])
+        return self.lookup(query)
+
+    def describe(self, row: int) -> Dict:
+        """Plain-Python record of one location."""
+        return {
+            "name": str(self.names[row]),
+            "state": str(self.states[row]),
+            "lat": round(float(self.lat[row]), 4),
+            "lon": round(float(self.lon[row]), 4),
+            "base_temp": float(self.base_temp[row]),
+            "humidity_low": float(self.humidity[row, 0]),
+            "humidity_high": float(self.humidity[row, 1])
+        }
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the arrays and the KD-tree points."""
+        arrays = (self.names, self.states, self.lat, self.lon, self.base_temp,
+                  self.humidity, self._keys, self._key_rows, self._tree.data)
+        return int(sum(array.nbytes for array in arrays))
@@ -0,0 +1,99 @@
+"""
+Decode images straight to model resolution.
+Headers are checked before any pixel data is decoded, and JPEGs are decoded
+with DCT scaling (Image.draft) so a 12-24 MP photo never exists at full size
+in memory. Formats without scale-on-decode are decoded in full and reduced
+with a box filter before the final resize.
+"""
+import io
+from PIL import Image
+from typing import Optional, Tuple
+
+TARGET_SIZE = (224, 224)
+
+# PIL format names accepted for decoding (MPO is the multi-picture JPEG
+# variant some phone cameras write)
+SUPPORTED_FORMATS = {"JPEG", "MPO", "PNG", "GIF", "BMP"}
+
+# Formats that can decode at 1/2, 1/4 or 1/8 scale
+DRAFT_FORMATS = {"JPEG", "MPO"}
+
+# Largest image accepted at all, and largest decoded at full resolution
+MAX_IMAGE_PIXELS = 200_000_000
+MAX_FULL_DECODE_PIXELS = 40_000_000
+
+
+def open_image(source) -> Image.Image:
+    """
+    Open an image and validate its header without decoding pixels.
+
+    Args:
+        source: File path, binary file-like object, or bytes-like data
+            (bytes, bytearray, memoryview)
+
+    Returns:
+        Lazily loaded PIL Image
+
+    Raises:
+        ValueError: If the data is not a supported image or is too large
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    try:
+        image = Image.open(source)
+    except Image.DecompressionBombError as e:
+        raise ValueError(f"Image too large: {e}")
+    except Exception as e:
+        raise ValueError(f"Not a valid image: {e}")
+
+    if image.format not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported image format: {image.format}")
+
+    width, height = image.size
+    if width <= 0 or height <= 0:
+        raise ValueError("Image has no pixels")
+
+    limit = MAX_IMAGE_PIXELS if image.format in DRAFT_FORMATS else MAX_FULL_DECODE_PIXELS
+    if width * height > limit:
+        raise ValueError(f"Image too large: {width}x{height} exceeds {limit} pixels")
+
+    return image
+
+
+def decode_image(source, size: Tuple[int, int] = TARGET_SIZE, mode: Optional[str] = None,
+                 resample: int = Image.Resampling.BICUBIC) -> Image.Image:
+    """
+    Decode an image directly at (close to) the requested size.
+
+    Args:
+        source: Anything open_image accepts, or an Image from open_image
+        size: Output (width, height)
+        mode: Convert to this mode (e.g. "RGB"); None keeps the decoded mode
+        resample: Filter for the final resize
+
+    Returns:
+        Decoded PIL Image of exactly `size`
+
+    Raises:
+        ValueError: If the data is not a supported image or is too large
+    """
+    image = source if isinstance(source, Image.Image) else open_image(source)
+
+    if image.format in DRAFT_FORMATS:
+        # Picks the smallest DCT scale that still covers `size`
+        image.draft(image.mode, size)
+
+    try:
+        image.load()
+    except Exception as e:
+        raise ValueError(f"Could not decode image: {e}")
+
+    if mode is not None and image.mode != mode:
+        image = image.convert(mode)
+
+    if image.size != size:
+        # reducing_gap box-reduces large sources before the resample pass
+        image = image.resize(size, resample, reducing_gap=3.0)
+
+    return image
@@ -0,0 +1,175 @@
+"""
+Histogram-based image feature kernel for the disease detector.
+Each channel of the uint8 pixel buffer is counted into a 256-bin histogram
+with integer accumulation (one bincount per channel); every feature is
+then derived from those small (channels, 256) tables instead of from float
+copies of the image. New features that depend on one channel at a time
+register a function of ChannelStats and add no work over the pixels.
+Per-pixel combinations of channels (HSV bins, lesion-colour ratios) are
+not recoverable from these marginal tables and would need their own pass.
+"""
+import numpy as np
+from typing import Callable, Dict, List
+
+LEVELS = np.arange(256, dtype=np.int64)
+LEVELS_SQUARED = LEVELS * LEVELS
+
+# name -> function(ChannelStats) returning an array of shape (N,)
+FEATURES: Dict[str, Callable[["ChannelStats"], np.ndarray]] = {}
+
+
+def register_feature(name: str):
+    """Decorator registering a feature computed from ChannelStats."""
+    def decorator(fn):
+        FEATURES[name] = fn
+        return fn
+    return decorator
+
+
+def channel_histograms(pixels: np.ndarray) -> np.ndarray:
+    """
+    Per-channel 256-bin histograms of a uint8 image.
+
+    Args:
+        pixels: uint8 array of shape (H, W) or (H, W, C)
+
+    Returns:
+        int64 array of shape (C, 256)
+    """
+    if pixels.dtype != np.uint8:
+        raise ValueError(f"Expected uint8 pixels, got {pixels.dtype}")
+    if pixels.ndim == 2:
+        return np.bincount(pixels.ravel(), minlength=256)[None, :]
+
+    flat = pixels.reshape(-1, pixels.shape[-1])
+    # One bincount per strided channel view measures faster than a single
+    # bincount over channel-offset indices, which needs an index array
+    return np.stack([np.bincount(flat[:, c], minlength=256) for c in range(flat.shape[1])])
+
+
+class ChannelStats:
+    """Exact per-channel moments of N images, derived from their histograms."""
+
+    def __init__(self, histograms: np.ndarray):
+        """
+        Args:
+            histograms: int64 array of shape (N, C, 256)
+        """
+        self.histograms = histograms
+        self.channels = histograms.shape[1]
+        self.pixels = histograms[:, 0].sum(axis=1)  # per image, (N,)
+        self.sums = histograms @ LEVELS  # (N, C), exact integers
+        self.sums_squared = histograms @ LEVELS_SQUARED  # (N, C), exact integers
+
+    @property
+    def channel_means(self) -> np.ndarray:
+        """(N, C) mean value of each channel."""
+        return self.sums / self.pixels[:, None]
+
+    @property
+    def mean(self) -> np.ndarray:
+        """(N,) mean over all pixels and channels."""
+        return self.sums.sum(axis=1) / (self.pixels * self.channels)
+
+    @property
+    def std(self) -> np.ndarray:
+        """(N,) population standard deviation over all pixels and channels."""
+        # Exact integer numerator (Python ints, so large images cannot
+        # overflow), hence no cancellation error in E[x^2] - E[x]^2
+        count = (self.pixels * self.channels).astype(object)
+        total = self.sums.sum(axis=1).astype(object)
+        numerator = self.sums_squared.sum(axis=1).astype(object) * count - total * total
+        return np.sqrt((numerator / (count * count)).astype(np.float64))
+
+    @property
+    def is_rgb(self) -> bool:
+        return self.channels == 3
+
+
+@register_feature("brightness")
+def _brightness(stats: ChannelStats) -> np.ndarray:
+    return stats.mean
+
+
+@register_feature("std")
+def _std(stats: ChannelStats) -> np.ndarray:
+    return stats.std
+
+
+@register_feature("green_ratio")
+def _green_ratio(stats: ChannelStats) -> np.ndarray:
+    if not stats.is_rgb:
+        return np.full(len(stats.pixels), 0.5)
+    return stats.channel_means[:, 1] / (stats.mean + 1)
+
+
+@register_feature("brown_score")
+def _brown_score(stats: ChannelStats) -> np.ndarray:
+    if not stats.is_rgb:
+        return np.full(len(stats.pixels), 0.5)
+    red, green, blue = stats.channel_means.T
+    return (red + green / 2) / (green + blue + 1)
+
+
+def features_from_histograms(histograms: np.ndarray) -> List[Dict[str, float]]:
+    """
+    Evaluate every registered feature for a stack of histograms.
+
+    Args:
+        histograms: int64 array of shape (N, C, 256)
+
+    Returns:
+        One feature dictionary of plain floats per image
+    """
+    stats = ChannelStats(histograms)
+    columns = {name: fn(stats) for name, fn in FEATURES.items()}
+    return [
+        {name: float(values[i]) for name, values in columns.items()}
+        for i in range(len(histograms))
+    ]
+
+
+def _float_features(pixels: np.ndarray) -> Dict[str, float]:
+    """Direct float computation for the rare non-8-bit modes (e.g. 16-bit PNG)."""
+    pixels = pixels.astype(np.float64)
+    mean = pixels.mean()
+    features = {"brightness": mean, "std": pixels.std(), "green_ratio": 0.5, "brown_score": 0.5}
+    if pixels.ndim == 3 and pixels.shape[2] == 3:
+        red, green, blue = pixels.reshape(-1, 3).mean(axis=0)
+        features["green_ratio"] = green / (mean + 1)
+        features["brown_score"] = (red + green / 2) / (green + blue + 1)
+    return {name: float(value) for name, value in features.items()}
+
+
+def compute_features(pixels: np.ndarray) -> Dict[str, float]:
+    """
+    Features of one image.
+
+    Args:
+        pixels: uint8 array of shape (H, W) or (H, W, C); other dtypes
+            take a slower float path with the built-in features only
+
+    Returns:
+        Feature dictionary of plain floats
+    """
+    if pixels.dtype != np.uint8:
+        return _float_features(pixels)
+    return features_from_histograms(channel_histograms(pixels)[None])[0]
+
+
+def compute_features_batch(images: np.ndarray) -> List[Dict[str, float]]:
+    """
+    Features of a stack of same-shaped images.
+
+    Histograms are counted per image (cheaper than one giant bincount)
+    and all features are evaluated once over the whole stack.
+
+    Args:
+        images: uint8 array of shape (N, H, W) or (N, H, W, C)
+
+    Returns:
+        One feature dictionary of plain floats per image
+    """
+    if len(images) == 0:
+        return []
+    return features_from_histograms(np.stack([channel_histograms(image) for image in images]))
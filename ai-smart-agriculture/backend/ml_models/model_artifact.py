@@ -0,0 +1,163 @@
+"""
+Versioned, memory-mappable on-disk format for compiled forests.
+An artifact is a directory holding a JSON header and one raw .npy file per
+walk array, in the layout CompiledForest walks. Arrays are opened with
+np.load(mmap_mode="r"), so loading is near-instant and the pages are
+shared by every process using the model.
+
+The checksum is verified once, when an artifact is written; normal loads
+only check the header against each array's dtype and shape, so startup
+does not read every page.
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from typing import Dict, Tuple
+from ml_models.tree_engine import CompiledForest
+
+# Bump when the header layout or array semantics change
+ARTIFACT_SCHEMA_VERSION = 2
+
+HEADER_FILE = "header.json"
+ARRAY_NAMES = ("slot_feature", "slot_threshold", "slot_children", "value", "root_slots")
+
+
+def _checksum(arrays: Dict[str, np.ndarray], crop_labels: list) -> str:
+    """SHA-256 over the crop labels and every array's dtype, shape and bytes."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(crop_labels).encode("utf-8"))
+    for name in ARRAY_NAMES:
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode("utf-8"))
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+def _is_valid_artifact(directory: str) -> bool:
+    """Whether `directory` holds an intact artifact of the current version."""
+    try:
+        load_forest_artifact(directory, verify=True)
+    except (OSError, ValueError, KeyError):
+        return False
+    return True
+
+
+def save_forest_artifact(directory: str, forest: CompiledForest,
+                         feature_importances: np.ndarray, replace: bool = False) -> Dict:
+    """
+    Write a compiled forest as a versioned artifact.
+
+    Every writer stages in its own temporary directory next to the target,
+    verifies the staged files against the checksum once, and publishes
+    them with a single rename, so readers never see a
+    half-written directory and concurrent writers never touch each
+    other's files. Without `replace`, a valid artifact already at the
+    target (for example one another worker published first) is kept and
+    the staged copy discarded.
+
+    Args:
+        directory: Artifact directory
+        forest: Compiled forest to store
+        feature_importances: Forest feature importances, kept for reporting
+        replace: Replace a valid existing artifact (explicit retraining)
+
+    Returns:
+        The header of the artifact now at `directory`
+    """
+    arrays = forest.arrays()
+    crop_labels = [str(label) for label in forest.classes]
+    header = {
+        "schema_version": ARTIFACT_SCHEMA_VERSION,
+        "crop_labels": crop_labels,
+        "n_trees": forest.n_trees,
+        "max_depth": forest.max_depth,
+        "feature_importances": [float(v) for v in feature_importances],
+        "arrays": {
+            name: {"dtype": arrays[name].dtype.str, "shape": list(arrays[name].shape)}
+            for name in ARRAY_NAMES
+        },
+        "checksum": _checksum(arrays, crop_labels)
+    }
+
+    directory = directory.rstrip(os.sep)
+    parent = os.path.dirname(directory) or "."
+    name = os.path.basename(directory)
+    staging = tempfile.mkdtemp(prefix=f".{name}.", suffix=".tmp", dir=parent)
+    try:
+        for array_name in ARRAY_NAMES:
+            np.save(os.path.join(staging, f"{array_name}.npy"),
+                    np.ascontiguousarray(arrays[array_name]))
+        with open(os.path.join(staging, HEADER_FILE), "w") as f:
+            json.dump(header, f, indent=2)
+        load_forest_artifact(staging, verify=True)
+
+        # A few rounds cover writers racing to retire the same old copy
+        for _ in range(5):
+            try:
+                os.rename(staging, directory)
+                return header
+            except OSError:
+                if not os.path.isdir(directory):
+                    continue
+            if not replace and _is_valid_artifact(directory):
+                # Another writer got there first with a usable artifact
+                return load_forest_artifact(directory, verify=False)[1]
+            # Move the stale or replaced copy aside under a unique name
+            retired = tempfile.mkdtemp(prefix=f".{name}.", suffix=".old", dir=parent)
+            try:
+                os.rename(directory, os.path.join(retired, name))
+            except OSError:
+                pass
+            finally:
+                shutil.rmtree(retired, ignore_errors=True)
+        raise OSError(f"Could not publish model artifact at {directory}")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_forest_artifact(directory: str, verify: bool = False) -> Tuple[CompiledForest, Dict]:
+    """
+    Memory-map a compiled forest artifact.
+
+    Args:
+        directory: Artifact directory
+        verify: Also check the stored checksum, which reads every page;
+            save_forest_artifact already did so before publishing
+
+    Returns:
+        Tuple of (CompiledForest backed by read-only mappings, header)
+
+    Raises:
+        ValueError: If the artifact is from another schema version or corrupt
+    """
+    with open(os.path.join(directory, HEADER_FILE)) as f:
+        header = json.load(f)
+
+    version = header.get("schema_version")
+    if version != ARTIFACT_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported model artifact version {version}, expected {ARTIFACT_SCHEMA_VERSION}"
+        )
+
+    arrays = {}
+    for name in ARRAY_NAMES:
+        mapped = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        expected = header["arrays"][name]
+        if mapped.dtype.str != expected["dtype"] or list(mapped.shape) != expected["shape"]:
+            raise ValueError(f"Model artifact array '{name}' does not match its header")
+        # Plain ndarray view of the mapping, without np.memmap's per-op overhead
+        arrays[name] = mapped.view(np.ndarray)
+
+    if verify and _checksum(arrays, header["crop_labels"]) != header["checksum"]:
+        raise ValueError("Model artifact checksum mismatch")
+
+    forest = CompiledForest(
+        classes=np.array(header["crop_labels"]),
+        max_depth=header["max_depth"],
+        **arrays
+    )
+
+    return forest, header
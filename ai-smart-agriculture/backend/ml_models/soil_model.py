@@ -2,13 +2,22 @@
 Soil-based Crop Recommendation Model.
 Uses RandomForest classifier trained on synthetic agricultural data.
 """
+import logging
 import os
 import pickle
+import tempfile
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List
+from ml_models.tree_engine import CompiledForest
+from ml_models.model_artifact import save_forest_artifact, load_forest_artifact
+from ml_models.synthetic_data.soil_data import (
+    generate_soil_samples, iter_soil_chunks, dataset_size
+)
+
+logger = logging.getLogger(__name__)
 
 
 class SoilRecommendationModel:
@@ -66,12 +75,38 @@ class SoilRecommendationModel:
         }
     }
     
-    def __init__(self):
-        """Initialize the model."""
+    # Fallback advice for crops missing from CROP_INFO
+    DEFAULT_CROP_INFO = {
+        "fertilizer": "Consult local agricultural expert for fertilizer recommendations.",
+        "tips": "Ensure proper soil testing before planting."
+    }
+    
+    # Inference engines: flattened NumPy forest or sklearn itself
+    ENGINES = ("compiled", "sklearn")
+    
+    def __init__(self, engine: str = "compiled", load: bool = True):
+        """
+        Initialize the model.
+        
+        Args:
+            engine: Inference engine, "compiled" or "sklearn"
+            load: Load (or train) the saved model now; pass False before
+                train_from_dataset to skip the default model entirely
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown inference engine: {engine}. Use one of {self.ENGINES}")
+        
+        self.engine = engine
         self.model = None
+        self.compiled = None
+        self.feature_importances = None
         self.crop_labels = list(self.CROP_INFO.keys())
+        self.artifact_path = os.path.join(os.path.dirname(__file__), "soil_model")
+        # Pickled sklearn estimator: loaded by the sklearn engine, and by the
+        # compiled engine only to rebuild a missing or unreadable artifact
         self.model_path = os.path.join(os.path.dirname(__file__), "soil_model.pkl")
-        self._load_or_train_model()
+        if load:
+            self._load_or_train_model()
     
     def _generate_synthetic_data(self, n_samples: int = 2000) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -83,49 +118,64 @@ class SoilRecommendationModel:
         Returns:
             Tuple of (features, labels)
         """
-        np.random.seed(42)
-        
-        # Define optimal ranges for each crop
-        crop_ranges = {
-            "rice": {"N": (80, 100), "P": (40, 50), "K": (40, 50), "pH": (5.5, 7.0), "rain": (200, 300)},
-            "wheat": {"N": (100, 120), "P": (50, 70), "K": (30, 50), "pH": (6.0, 7.5), "rain": (50, 100)},
-            "maize": {"N": (70, 90), "P": (40, 60), "K": (30, 50), "pH": (5.8, 7.0), "rain": (80, 150)},
-            "cotton": {"N": (100, 130), "P": (40, 60), "K": (50, 70), "pH": (6.0, 7.5), "rain": (60, 120)},
-            "sugarcane": {"N": (120, 150), "P": (50, 70), "K": (50, 80), "pH": (6.0, 7.5), "rain": (150, 250)},
-            "jute": {"N": (50, 70), "P": (25, 40), "K": (25, 40), "pH": (6.0, 7.0), "rain": (150, 250)},
-            "pulses": {"N": (20, 40), "P": (50, 70), "K": (30, 50), "pH": (6.0, 7.5), "rain": (60, 100)},
-            "groundnut": {"N": (15, 30), "P": (35, 50), "K": (35, 50), "pH": (6.0, 6.5), "rain": (50, 100)},
-            "soybean": {"N": (25, 40), "P": (55, 75), "K": (35, 50), "pH": (6.0, 7.0), "rain": (70, 130)},
-            "potato": {"N": (150, 180), "P": (70, 90), "K": (80, 110), "pH": (5.0, 6.0), "rain": (80, 150)},
-            "tomato": {"N": (100, 130), "P": (70, 90), "K": (70, 90), "pH": (6.0, 7.0), "rain": (60, 120)},
-            "onion": {"N": (90, 110), "P": (45, 60), "K": (45, 60), "pH": (6.0, 7.0), "rain": (40, 80)}
-        }
+        return generate_soil_samples(n_samples, seed=42)
+    
+    def _new_forest(self, n_estimators: int = 100, warm_start: bool = False) -> RandomForestClassifier:
+        """Create an untrained forest with the model's hyperparameters."""
+        return RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=15,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1,
+            warm_start=warm_start
+        )
+    
+    def _save_model(self, replace: bool = False):
+        """
+        Compile the trained forest and persist it.
+        
+        The compiled artifact is only written if no valid one is in place,
+        unless `replace` is set for explicit retraining; the compiled engine
+        then maps whichever artifact was published, so concurrent workers
+        share one copy. When the sklearn engine serves predictions the
+        estimator is pickled as well, so later starts load it instead of
+        retraining.
+        
+        Args:
+            replace: Overwrite valid existing artifact and pickle
+        """
+        self.feature_importances = self.model.feature_importances_
+        self._compile_model()
+        
+        # Never persist a compiled forest that failed the parity check
+        if self.compiled is not None:
+            save_forest_artifact(self.artifact_path, self.compiled, self.feature_importances,
+                                 replace=replace)
+            print(f"Model artifact ready at {self.artifact_path}")
+            
+            if self.engine == "compiled":
+                self.compiled, header = load_forest_artifact(self.artifact_path)
+                self.feature_importances = np.array(header["feature_importances"])
+            else:
+                self.compiled = None
         
-        features = []
-        labels = []
-        
-        samples_per_crop = n_samples // len(crop_ranges)
-        
-        for crop, ranges in crop_ranges.items():
-            for _ in range(samples_per_crop):
-                # Generate sample within optimal range with some noise
-                n = np.random.uniform(ranges["N"][0], ranges["N"][1])
-                p = np.random.uniform(ranges["P"][0], ranges["P"][1])
-                k = np.random.uniform(ranges["K"][0], ranges["K"][1])
-                ph = np.random.uniform(ranges["pH"][0], ranges["pH"][1])
-                rain = np.random.uniform(ranges["rain"][0], ranges["rain"][1])
-                
-                # Add some noise to create variation
-                n += np.random.normal(0, 5)
-                p += np.random.normal(0, 3)
-                k += np.random.normal(0, 3)
-                ph += np.random.normal(0, 0.2)
-                rain += np.random.normal(0, 10)
-                
-                features.append([n, p, k, ph, rain])
-                labels.append(crop)
-        
-        return np.array(features), np.array(labels)
+        if self.engine == "sklearn" and (replace or not os.path.exists(self.model_path)):
+            self._save_estimator()
+    
+    def _save_estimator(self):
+        """Pickle the sklearn estimator, swapping it in atomically."""
+        fd, staging = tempfile.mkstemp(prefix=".soil_model.", suffix=".tmp",
+                                       dir=os.path.dirname(self.model_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(self.model, f)
+            os.replace(staging, self.model_path)
+        except BaseException:
+            os.remove(staging)
+            raise
+        print(f"Estimator saved to {self.model_path}")
     
     def _train_model(self):
         """Train the Random Forest model on synthetic data."""
@@ -140,15 +190,7 @@ class SoilRecommendationModel:
         )
         
         # Train Random Forest
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=15,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42,
-            n_jobs=-1
-        )
-        
+        self.model = self._new_forest()
         self.model.fit(X_train, y_train)
         
         # Evaluate
@@ -158,27 +200,173 @@ class SoilRecommendationModel:
         print(f"Training accuracy: {train_score:.3f}")
         print(f"Testing accuracy: {test_score:.3f}")
         
-        # Save model
-        with open(self.model_path, "wb") as f:
-            pickle.dump(self.model, f)
+        self._save_model()
+    
+    def train_from_dataset(self, directory: str, chunk_size: int = 1_000_000,
+                           n_estimators: int = 100):
+        """
+        Train on a memory-mapped dataset written by write_soil_dataset.
+        
+        The forest is grown with warm_start: each chunk trains its share of
+        the trees, so only one chunk is ever held in memory.
+        
+        Args:
+            directory: Dataset directory
+            chunk_size: Rows per training chunk
+            n_estimators: Total number of trees
+        """
+        n_rows = dataset_size(directory)
+        # Never use more chunks than trees, every chunk needs at least one
+        chunk_size = max(chunk_size, -(-n_rows // n_estimators))
+        n_chunks = -(-n_rows // chunk_size)
+        print(f"Training soil recommendation model on {n_rows} rows in {n_chunks} chunks...")
+        
+        self.model = self._new_forest(n_estimators=0, warm_start=True)
+        for i, (X_chunk, y_chunk) in enumerate(iter_soil_chunks(directory, chunk_size)):
+            # Spread the trees evenly over the chunks
+            self.model.n_estimators += n_estimators // n_chunks + (i < n_estimators % n_chunks)
+            self.model.fit(X_chunk, y_chunk)
+        
+        # Evaluate on a fresh sample the forest has never seen
+        X_test, y_test = generate_soil_samples(2000, seed=None)
+        print(f"Testing accuracy: {self.model.score(X_test, y_test):.3f}")
         
-        print(f"Model saved to {self.model_path}")
+        self._save_model(replace=True)
     
     def _load_or_train_model(self):
-        """Load existing model or train a new one."""
+        """
+        Load the model artifact, converting a pickle or training if needed.
+        
+        The sklearn engine needs the estimator itself, so it reads the
+        pickle, and trains (deterministically) and pickles it only when
+        none exists. A valid artifact is never rewritten on startup.
+        """
+        if self.engine == "compiled" and os.path.isdir(self.artifact_path):
+            try:
+                self.compiled, header = load_forest_artifact(self.artifact_path)
+                self.feature_importances = np.array(header["feature_importances"])
+                print("Soil model loaded successfully")
+                return
+            except Exception as e:
+                print(f"Error loading model artifact: {e}")
+        
         if os.path.exists(self.model_path):
             try:
                 with open(self.model_path, "rb") as f:
                     self.model = pickle.load(f)
-                print("Soil model loaded successfully")
+                print("Soil model loaded from pickle")
             except Exception as e:
-                print(f"Error loading model: {e}")
-                self._train_model()
-        else:
+                print(f"Error loading pickle: {e}")
+                self.model = None
+        
+        if self.model is None:
             self._train_model()
+        elif self.engine == "compiled" or not os.path.isdir(self.artifact_path):
+            # One-time conversion; also replaces an unreadable artifact,
+            # while a valid one another worker just wrote is kept
+            self._save_model()
+        else:
+            self.feature_importances = self.model.feature_importances_
+    
+    def _compile_model(self):
+        """Compile the forest into node arrays and check it against sklearn."""
+        self.compiled = CompiledForest.from_sklearn(self.model)
+        
+        if not self.verify_parity():
+            logger.warning("Compiled soil forest disagrees with sklearn; "
+                           "falling back to the sklearn engine")
+            self.compiled = None
+            self.engine = "sklearn"
+    
+    def verify_parity(self, n_samples: int = 512, seed: int = 0) -> bool:
+        """
+        Check that the compiled engine reproduces sklearn's probabilities exactly.
+        
+        Compares random samples over the full input range, plus samples on
+        and one float32 step either side of every split threshold, both
+        batched and through the single-sample path.
+        
+        Args:
+            n_samples: Number of random soil samples to compare
+            seed: Random seed for the samples
+            
+        Returns:
+            True if both engines give bit-identical probabilities
+        """
+        if self.model is None or self.compiled is None:
+            return False
+        
+        # Cover the full SoilInput range, not just the training clusters
+        rng = np.random.default_rng(seed)
+        features = np.column_stack([
+            rng.uniform(0, 200, size=(n_samples, 3)),
+            rng.uniform(0, 14, size=n_samples),
+            rng.uniform(0, 500, size=n_samples)
+        ])
+        
+        features = np.vstack([features, self.compiled.boundary_samples(features)])
+        
+        expected = self.model.predict_proba(features)
+        if not np.array_equal(expected, self.compiled.predict_proba(features)):
+            return False
+        return all(
+            np.array_equal(expected[i], self.compiled.predict_proba_one(features[i]))
+            for i in range(n_samples)
+        )
+    
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities from the selected inference engine."""
+        if self.engine == "compiled":
+            return self.compiled.predict_proba(features)
+        return self.model.predict_proba(features)
+    
+    @property
+    def classes(self) -> np.ndarray:
+        """Crop names in the column order of predict_probabilities."""
+        return self.compiled.classes if self.engine == "compiled" else self.model.classes_
+    
+    def predict_probabilities(self, features: np.ndarray) -> np.ndarray:
+        """
+        Crop probabilities for many soil samples.
+        
+        Args:
+            features: Array of shape (N, 5) with columns
+                nitrogen, phosphorus, potassium, ph, rainfall
+            
+        Returns:
+            Array of shape (N, len(classes))
+        """
+        if self.model is None and self.compiled is None:
+            raise RuntimeError("Soil model is not loaded")
+        
+        return self._predict_proba(np.asarray(features, dtype=np.float64).reshape(-1, 5))
+    
+    def split_thresholds(self, column: int) -> np.ndarray:
+        """
+        Distinct split thresholds on one feature, over all trees.
+        
+        Inputs that fall between the same pair of adjacent thresholds on
+        every feature take the same path through every tree, so they get
+        identical probabilities.
+        
+        Args:
+            column: Feature column (0-4)
+            
+        Returns:
+            Sorted float64 thresholds; splits send x <= threshold left
+        """
+        if self.engine == "compiled":
+            forest = self.compiled
+            splits = forest.threshold[(forest.feature == column) & np.isfinite(forest.threshold)]
+        else:
+            splits = np.concatenate([
+                estimator.tree_.threshold[estimator.tree_.feature == column]
+                for estimator in self.model.estimators_
+            ])
+        return np.unique(splits)
     
     def predict(self, nitrogen: float, phosphorus: float, potassium: float, 
-                ph: float, rainfall: float) -> Tuple[str, str, float]:
+                ph: float, rainfall: float) -> Tuple[str, str, float, str]:
         """
         Predict recommended crop based on soil parameters.
         
@@ -190,42 +378,66 @@ class SoilRecommendationModel:
             rainfall: Rainfall in mm (0-500)
             
         Returns:
-            Tuple of (crop_name, fertilizer_advice, confidence)
+            Tuple of (crop_name, fertilizer_advice, confidence, tips)
         """
-        if self.model is None:
-            self._load_or_train_model()
+        features = np.array([nitrogen, phosphorus, potassium, ph, rainfall], dtype=np.float64)
+        if self.engine == "compiled":
+            probabilities = self.compiled.predict_proba_one(features)
+        elif self.model is not None:
+            probabilities = self.model.predict_proba(features.reshape(1, -1))[0]
+        else:
+            raise RuntimeError("Soil model is not loaded")
+        
+        best = int(probabilities.argmax())
+        crop = str(self.classes[best])
+        crop_data = self.CROP_INFO.get(crop, self.DEFAULT_CROP_INFO)
+        confidence = float(np.round(probabilities[best], 2))
+        return crop.title(), crop_data["fertilizer"], confidence, crop_data["tips"]
+    
+    def predict_many(self, features: np.ndarray) -> List[Tuple[str, str, float, str]]:
+        """
+        Predict recommended crops for many soil samples at once.
         
-        # Prepare input
-        features = np.array([[nitrogen, phosphorus, potassium, ph, rainfall]])
+        Runs a single predict_proba over the whole (N, 5) array instead of
+        walking the forest twice per sample.
         
-        # Predict
-        crop = self.model.predict(features)[0]
+        Args:
+            features: Array of shape (N, 5) with columns
+                nitrogen, phosphorus, potassium, ph, rainfall
+            
+        Returns:
+            List of (crop_name, fertilizer_advice, confidence, tips) tuples
+        """
+        features = np.asarray(features, dtype=np.float64).reshape(-1, 5)
+        if len(features) == 0:
+            return []
         
-        # Get probability for confidence score
-        probabilities = self.model.predict_proba(features)[0]
-        max_prob_idx = np.argmax(probabilities)
-        confidence = probabilities[max_prob_idx]
+        # One forest pass; the predicted class is the most probable one
+        probabilities = self.predict_probabilities(features)
+        best = np.argmax(probabilities, axis=1)
+        crops = self.classes[best]
+        confidences = np.round(probabilities[np.arange(len(best)), best], 2)
         
-        # Get crop information
-        crop_data = self.CROP_INFO.get(crop, {
-            "fertilizer": "Consult local agricultural expert for fertilizer recommendations.",
-            "tips": "Ensure proper soil testing before planting."
-        })
+        results = []
+        for crop, confidence in zip(crops, confidences.tolist()):
+            # Get crop information
+            crop_data = self.CROP_INFO.get(crop, self.DEFAULT_CROP_INFO)
+            results.append((
+                crop.title(),
+                crop_data["fertilizer"],
+                confidence,
+                crop_data["tips"]
+            ))
         
-        return (
-            crop.title(),
-            crop_data["fertilizer"],
-            round(confidence, 2),
-            crop_data["tips"]
-        )
+        return results
     
     def get_feature_importance(self) -> Dict[str, float]:
         """Get feature importance from the trained model."""
-        if self.model is None:
+        if self.feature_importances is None:
             return {}
         
         features = ["Nitrogen", "Phosphorus", "Potassium", "pH", "Rainfall"]
-        importances = self.model.feature_importances_
+        importances = self.feature_importances
         
         return {feature: round(importance, 3) 
                 for feature, importance in zip(features, importances)}
@@ -0,0 +1,101 @@
+"""
+Synthetic leaf images for training the CNN disease model offline.
+Every image is a mottled green leaf surface; diseased classes add the
+visual symptom the detector's disease notes describe (dark ringed
+lesions, haloed spots, white powder, orange pustules, yellow mosaic).
+"""
+import numpy as np
+from typing import Tuple
+
+# Classes the synthetic generator can draw, all keys of CropDiseaseDetector.DISEASES
+LEAF_CLASSES = ("healthy", "early_blight", "leaf_spot", "powdery_mildew", "rust", "mosaic_virus")
+
+
+def _smooth_noise(rng: np.random.Generator, size: int, cells: int) -> np.ndarray:
+    """Low-frequency noise in [0, 1]: a coarse random grid, upsampled."""
+    coarse = rng.random((cells + 1, cells + 1))
+    positions = np.linspace(0, cells, size)
+    index = np.minimum(positions.astype(int), cells - 1)
+    frac = positions - index
+    rows = coarse[index] * (1 - frac)[:, None] + coarse[index + 1] * frac[:, None]
+    return rows[:, index] * (1 - frac)[None, :] + rows[:, index + 1] * frac[None, :]
+
+
+def _blend(image: np.ndarray, mask: np.ndarray, color) -> None:
+    """Blend `color` into `image` in place with per-pixel weights `mask`."""
+    image += mask[..., None] * (np.asarray(color, dtype=np.float32) - image)
+
+
+def _spots(rng: np.random.Generator, size: int, count: int, radius: Tuple[float, float]):
+    """Distance fields and radii of `count` random circular spots."""
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32)
+    centers = rng.uniform(0, size, (count, 2))
+    radii = rng.uniform(*radius, count)
+    distance = np.sqrt((yy[None] - centers[:, 0, None, None]) ** 2 +
+                       (xx[None] - centers[:, 1, None, None]) ** 2)
+    return distance, radii[:, None, None]
+
+
+def draw_leaf(label: str, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw one synthetic leaf image.
+
+    Args:
+        label: One of LEAF_CLASSES
+        size: Image width and height in pixels
+        rng: Random generator
+
+    Returns:
+        uint8 array of shape (size, size, 3)
+    """
+    base = np.array([rng.uniform(40, 90), rng.uniform(110, 170), rng.uniform(30, 70)],
+                    dtype=np.float32)
+    shade = 0.8 + 0.4 * _smooth_noise(rng, size, 4)
+    image = base * shade[..., None]
+
+    if label == "early_blight":
+        distance, radii = _spots(rng, size, rng.integers(3, 7), (size * 0.05, size * 0.11))
+        lesion = (distance < radii).any(axis=0).astype(np.float32)
+        rings = ((np.abs(distance - radii * 0.6) < 0.8) & (distance < radii)).any(axis=0)
+        _blend(image, lesion, (95, 65, 30))
+        _blend(image, rings.astype(np.float32), (50, 35, 20))
+    elif label == "leaf_spot":
+        distance, radii = _spots(rng, size, rng.integers(10, 20), (size * 0.02, size * 0.04))
+        halo = (distance < radii * 2.0).any(axis=0).astype(np.float32)
+        spot = (distance < radii).any(axis=0).astype(np.float32)
+        _blend(image, 0.7 * halo, (200, 190, 60))
+        _blend(image, spot, (60, 40, 25))
+    elif label == "powdery_mildew":
+        patches = np.clip((_smooth_noise(rng, size, 6) - 0.45) * 3.0, 0, 1)
+        _blend(image, 0.85 * patches, (225, 225, 215))
+    elif label == "rust":
+        distance, radii = _spots(rng, size, rng.integers(25, 45), (size * 0.012, size * 0.025))
+        pustules = np.clip(1.5 - distance / radii, 0, 1).max(axis=0)
+        _blend(image, pustules, (205, 110, 30))
+    elif label == "mosaic_virus":
+        mottle = (_smooth_noise(rng, size, 8) > 0.55).astype(np.float32)
+        _blend(image, 0.75 * mottle, (205, 200, 70))
+
+    image += rng.normal(0, 6, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def generate_leaf_images(n_per_class: int, size: int = 56,
+                         seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate a labelled, shuffled set of synthetic leaf images.
+
+    Args:
+        n_per_class: Images per class
+        size: Image width and height in pixels
+        seed: Random seed
+
+    Returns:
+        Tuple of (uint8 images of shape (N, size, size, 3), int64 class indices
+        into LEAF_CLASSES)
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.repeat(np.arange(len(LEAF_CLASSES)), n_per_class)
+    rng.shuffle(labels)
+    images = np.stack([draw_leaf(LEAF_CLASSES[label], size, rng) for label in labels])
+    return images, labels
@@ -0,0 +1,182 @@
+"""
+Vectorized synthetic soil data for the crop recommendation model.
+Generates samples for all crops as array operations and can stream large
+datasets to memory-mapped .npy files in fixed-size chunks.
+"""
+import os
+import time
+import numpy as np
+from typing import Dict, Iterator, Optional, Tuple
+
+
+# Optimal (low, high) ranges per crop: N, P, K, pH, rainfall
+CROP_RANGES = {
+    "rice": {"N": (80, 100), "P": (40, 50), "K": (40, 50), "pH": (5.5, 7.0), "rain": (200, 300)},
+    "wheat": {"N": (100, 120), "P": (50, 70), "K": (30, 50), "pH": (6.0, 7.5), "rain": (50, 100)},
+    "maize": {"N": (70, 90), "P": (40, 60), "K": (30, 50), "pH": (5.8, 7.0), "rain": (80, 150)},
+    "cotton": {"N": (100, 130), "P": (40, 60), "K": (50, 70), "pH": (6.0, 7.5), "rain": (60, 120)},
+    "sugarcane": {"N": (120, 150), "P": (50, 70), "K": (50, 80), "pH": (6.0, 7.5), "rain": (150, 250)},
+    "jute": {"N": (50, 70), "P": (25, 40), "K": (25, 40), "pH": (6.0, 7.0), "rain": (150, 250)},
+    "pulses": {"N": (20, 40), "P": (50, 70), "K": (30, 50), "pH": (6.0, 7.5), "rain": (60, 100)},
+    "groundnut": {"N": (15, 30), "P": (35, 50), "K": (35, 50), "pH": (6.0, 6.5), "rain": (50, 100)},
+    "soybean": {"N": (25, 40), "P": (55, 75), "K": (35, 50), "pH": (6.0, 7.0), "rain": (70, 130)},
+    "potato": {"N": (150, 180), "P": (70, 90), "K": (80, 110), "pH": (5.0, 6.0), "rain": (80, 150)},
+    "tomato": {"N": (100, 130), "P": (70, 90), "K": (70, 90), "pH": (6.0, 7.0), "rain": (60, 120)},
+    "onion": {"N": (90, 110), "P": (45, 60), "K": (45, 60), "pH": (6.0, 7.0), "rain": (40, 80)}
+}
+
+FEATURE_KEYS = ("N", "P", "K", "pH", "rain")
+
+# Gaussian noise added on top of the optimal range, per feature
+FEATURE_NOISE = np.array([5.0, 3.0, 3.0, 0.2, 10.0])
+
+CROPS = np.array(list(CROP_RANGES.keys()))
+_LOWS = np.array([[CROP_RANGES[c][k][0] for k in FEATURE_KEYS] for c in CROPS], dtype=np.float64)
+_HIGHS = np.array([[CROP_RANGES[c][k][1] for k in FEATURE_KEYS] for c in CROPS], dtype=np.float64)
+
+# File names inside a dataset directory
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+CLASSES_FILE = "classes.npy"
+
+
+def generate_soil_codes(n_samples: int, rng: np.random.Generator,
+                        shuffle: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate samples balanced across crops, with labels as crop indices.
+
+    Args:
+        n_samples: Number of samples; rounded down to a multiple of the crop count
+        rng: Random generator
+        shuffle: Interleave crops instead of grouping them by crop
+
+    Returns:
+        Tuple of (features of shape (N, 5), int16 indices into CROPS)
+    """
+    samples_per_crop = n_samples // len(CROPS)
+    codes = np.repeat(np.arange(len(CROPS), dtype=np.int16), samples_per_crop)
+    if shuffle:
+        rng.shuffle(codes)
+
+    # Uniform draw inside each crop's optimal range, then noise for variation
+    features = rng.uniform(_LOWS[codes], _HIGHS[codes])
+    features += rng.normal(0.0, FEATURE_NOISE, size=features.shape)
+
+    return features, codes
+
+
+def generate_soil_samples(n_samples: int = 2000,
+                          seed: Optional[int] = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate synthetic training data for crop recommendation.
+
+    Args:
+        n_samples: Number of samples to generate
+        seed: Random seed, or None for fresh entropy
+
+    Returns:
+        Tuple of (features, crop name labels)
+    """
+    features, codes = generate_soil_codes(n_samples, np.random.default_rng(seed))
+    return features, CROPS[codes]
+
+
+def write_soil_dataset(directory: str, n_samples: int, chunk_size: int = 1_000_000,
+                       seed: Optional[int] = 42) -> Dict:
+    """
+    Stream a synthetic dataset to memory-mapped .npy files.
+
+    Only one chunk is held in memory at a time. Every chunk is shuffled and
+    balanced across crops, so any chunk is a usable training set on its own.
+
+    Args:
+        directory: Output directory for features.npy, labels.npy and classes.npy
+        n_samples: Total number of rows
+        chunk_size: Rows generated per chunk
+        seed: Random seed, or None for fresh entropy
+
+    Returns:
+        Dictionary with row count, elapsed seconds and rows per second
+    """
+    os.makedirs(directory, exist_ok=True)
+    chunk_size = max(len(CROPS), chunk_size - chunk_size % len(CROPS))
+    n_samples -= n_samples % len(CROPS)
+    rng = np.random.default_rng(seed)
+
+    features = np.lib.format.open_memmap(
+        os.path.join(directory, FEATURES_FILE), mode="w+",
+        dtype=np.float32, shape=(n_samples, len(FEATURE_KEYS))
+    )
+    labels = np.lib.format.open_memmap(
+        os.path.join(directory, LABELS_FILE), mode="w+",
+        dtype=np.int16, shape=(n_samples,)
+    )
+    np.save(os.path.join(directory, CLASSES_FILE), CROPS)
+
+    start_time = time.perf_counter()
+    for start in range(0, n_samples, chunk_size):
+        rows = min(chunk_size, n_samples - start)
+        chunk_features, chunk_codes = generate_soil_codes(rows, rng, shuffle=True)
+        features[start:start + rows] = chunk_features
+        labels[start:start + rows] = chunk_codes
+
+    features.flush()
+    labels.flush()
+    del features, labels
+    elapsed = time.perf_counter() - start_time
+
+    stats = {
+        "rows": n_samples,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(n_samples / elapsed) if elapsed > 0 else None,
+        "path": directory
+    }
+    print(f"Generated {n_samples} rows in {elapsed:.2f}s ({stats['rows_per_second']} rows/s)")
+
+    return stats
+
+
+def iter_soil_chunks(directory: str, chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Iterate over a dataset written by write_soil_dataset without loading it.
+
+    Args:
+        directory: Dataset directory
+        chunk_size: Rows per chunk
+
+    Yields:
+        Tuples of (float32 features, crop name labels) for each chunk
+    """
+    features = np.load(os.path.join(directory, FEATURES_FILE), mmap_mode="r")
+    labels = np.load(os.path.join(directory, LABELS_FILE), mmap_mode="r")
+    classes = np.load(os.path.join(directory, CLASSES_FILE))
+
+    for start in range(0, len(features), chunk_size):
+        yield (
+            np.asarray(features[start:start + chunk_size]),
+            classes[labels[start:start + chunk_size]]
+        )
+
+
+def dataset_size(directory: str) -> int:
+    """Number of rows in a dataset directory."""
+    return len(np.load(os.path.join(directory, LABELS_FILE), mmap_mode="r"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic soil dataset")
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of rows")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Rows per chunk")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--train", action="store_true",
+                        help="Retrain the soil model on the generated dataset")
+    args = parser.parse_args()
+
+    write_soil_dataset(args.directory, args.rows, args.chunk_size, args.seed)
+
+    if args.train:
+        from ml_models.soil_model import SoilRecommendationModel
+        SoilRecommendationModel(load=False).train_from_dataset(args.directory, args.chunk_size)
@@ -0,0 +1,227 @@
+"""
+Compiled tree-ensemble inference engine.
+Flattens a trained RandomForestClassifier into NumPy arrays and walks all
+trees for all samples with vectorized array operations.
+
+The walk arrays are indexed by child slot (2 * node + direction), so the
+next slot is one gather with no separate node -> slot step. They are built
+once at compile time and stored in that layout, so a loaded forest walks
+the mapped arrays directly and holds no private copies.
+"""
+import numpy as np
+from typing import Dict
+
+
+class CompiledForest:
+    """Array-backed random forest for fast predict_proba."""
+
+    # Rows per internal block; bounds the (rows, trees, classes) leaf gather
+    BLOCK_SIZE = 1024
+
+    def __init__(self, slot_feature: np.ndarray, slot_threshold: np.ndarray,
+                 slot_children: np.ndarray, value: np.ndarray, root_slots: np.ndarray,
+                 classes: np.ndarray, max_depth: int):
+        """
+        Initialize from slot-layout walk arrays, used as given (not copied).
+
+        Args:
+            slot_feature: Split feature of the node owning each slot (intp,
+                length 2 * n_nodes, 0 for leaves)
+            slot_threshold: Split threshold of the node owning each slot
+                (float64, +inf for leaves)
+            slot_children: First slot of the (left, right) child per slot;
+                leaves point back to themselves
+            value: Normalized class probabilities per node (n_nodes, n_classes)
+            root_slots: First slot of each tree's root
+            classes: Class labels in probability column order
+            max_depth: Depth of the deepest tree
+        """
+        self.slot_feature = slot_feature
+        self.slot_threshold = slot_threshold
+        self.slot_children = slot_children
+        self.value = value
+        self.root_slots = root_slots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+        self.n_trees = len(root_slots)
+
+    @property
+    def feature(self) -> np.ndarray:
+        """Split feature per node (a view, leaves 0)."""
+        return self.slot_feature[::2]
+
+    @property
+    def threshold(self) -> np.ndarray:
+        """Split threshold per node (a view, leaves +inf)."""
+        return self.slot_threshold[::2]
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "CompiledForest":
+        """
+        Compile a fitted sklearn RandomForestClassifier.
+
+        Args:
+            forest: Fitted RandomForestClassifier
+
+        Returns:
+            CompiledForest with the same decision function
+        """
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n_nodes)
+
+            # Leaves compare +inf and loop back to themselves, so walking
+            # past a leaf is a no-op and no per-step leaf test is needed
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+            # Recent sklearn stores class fractions, older releases store
+            # weighted counts and normalize inside predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            if np.allclose(normalizer, 1.0):
+                normalizer = np.ones_like(normalizer)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            children.append(np.stack([left, right], axis=1).ravel())
+            values.append(value / normalizer)
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            slot_feature=np.repeat(np.concatenate(features).astype(np.intp), 2),
+            slot_threshold=np.repeat(np.concatenate(thresholds).astype(np.float64), 2),
+            slot_children=2 * np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values),
+            root_slots=2 * np.array(roots, dtype=np.intp),
+            classes=np.asarray(forest.classes_),
+            max_depth=max_depth
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Return the walk arrays keyed by name."""
+        return {
+            "slot_feature": self.slot_feature,
+            "slot_threshold": self.slot_threshold,
+            "slot_children": self.slot_children,
+            "value": self.value,
+            "root_slots": self.root_slots
+        }
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Find the leaf reached in every tree for every sample.
+
+        Args:
+            X: float32 array of shape (N, n_features)
+
+        Returns:
+            Leaf node ids of shape (N, n_trees)
+        """
+        n_samples, n_features = X.shape
+        # Widen once so every comparison is float64 vs float64
+        values = X.astype(np.float64).ravel()
+        if n_samples == 1:
+            return (self._walk_one(values) >> 1).reshape(1, self.n_trees)
+
+        slots = np.tile(self.root_slots, n_samples)
+        row_offset = np.repeat(
+            np.arange(n_samples, dtype=np.intp) * n_features, self.n_trees
+        )
+        for _ in range(self.max_depth):
+            x = values.take(row_offset + self.slot_feature.take(slots))
+            slots = self.slot_children.take(slots + (x > self.slot_threshold.take(slots)))
+
+        return (slots >> 1).reshape(n_samples, self.n_trees)
+
+    def _walk_one(self, values: np.ndarray) -> np.ndarray:
+        """Leaf slot of every tree for one float64 sample."""
+        slots = self.root_slots
+        for _ in range(self.max_depth):
+            go_right = values.take(self.slot_feature.take(slots)) > self.slot_threshold.take(slots)
+            slots = self.slot_children.take(slots + go_right)
+        return slots
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities, averaged over all trees.
+
+        Args:
+            X: Array of shape (N, n_features)
+
+        Returns:
+            Probabilities of shape (N, n_classes)
+        """
+        # sklearn evaluates splits on float32 inputs
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        proba = np.empty((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], self.BLOCK_SIZE):
+            block = X[start:start + self.BLOCK_SIZE]
+            leaves = self.apply(block)
+            # Summing over the tree axis accumulates tree by tree, in the
+            # same order sklearn does
+            proba[start:start + len(block)] = self.value[leaves].sum(axis=1)
+
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba_one(self, x: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities of a single sample, without the batch bookkeeping.
+
+        Args:
+            x: Array of n_features values
+
+        Returns:
+            Probabilities of shape (n_classes,), equal to predict_proba's row
+        """
+        values = np.asarray(x, dtype=np.float32).astype(np.float64)
+        proba = self.value.take(self._walk_one(values) >> 1, axis=0).sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def boundary_samples(self, base: np.ndarray) -> np.ndarray:
+        """
+        Samples that sit exactly on, and one float32 step either side of,
+        every split threshold.
+
+        Args:
+            base: (M, n_features) samples supplying the other features,
+                used in turn
+
+        Returns:
+            Array of shape (4 * internal nodes, n_features)
+        """
+        internal = np.isfinite(self.threshold)
+        feature = np.asarray(self.feature)[internal]
+        threshold = np.asarray(self.threshold)[internal]
+        # sklearn compares float32 inputs, so also probe the float32 values
+        # nearest the threshold and their neighbours
+        nearest = threshold.astype(np.float32)
+        probes = np.concatenate([
+            threshold,
+            nearest.astype(np.float64),
+            np.nextafter(nearest, np.float32(-np.inf)).astype(np.float64),
+            np.nextafter(nearest, np.float32(np.inf)).astype(np.float64)
+        ])
+        columns = np.tile(feature, 4)
+        samples = base[np.arange(len(probes)) % len(base)].astype(np.float64)
+        samples[np.arange(len(probes)), columns] = probes
+        return samples
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict the most probable class label for each sample."""
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
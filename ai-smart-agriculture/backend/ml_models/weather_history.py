@@ -0,0 +1,321 @@
+"""
+Daily weather history for every known location, pre-simulated and stored
+as one memory-mapped (location, day, variable) float32 array.
+
+write_weather_history simulates locations in vectorized batches with the
+WeatherSimulator's daily model and writes each batch straight into the
+mapped file. Each run writes a fresh version directory and then switches
+a pointer file to it, so the array and its metadata are always replaced
+together. WeatherHistory opens the current version read-only: a
+location's date range is a view into the mapping, and aggregates are
+computed over that view without reading the rest of the file.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from datetime import date, timedelta
+from typing import Dict, Optional, Sequence
+from ml_models.gazetteer import Gazetteer
+from ml_models.weather_simulator import MONTH_SEASON, WeatherSimulator
+
+VARIABLES = ("temp_min", "temp_max", "temp_mean", "humidity", "rainfall")
+
+# File names inside a history version directory
+SERIES_FILE = "series.npy"
+META_FILE = "meta.json"
+# File in the history directory naming the current version directory
+CURRENT_FILE = "CURRENT"
+
+# Mean rainfall in mm on a rainy day, by season (monsoon, winter, summer,
+# post-monsoon), for a location of REFERENCE_HUMIDITY; it scales with the
+# location's typical humidity and amounts are gamma distributed around it
+RAIN_DAY_MM = np.array([18.0, 3.0, 5.0, 9.0])
+REFERENCE_HUMIDITY = 65.0
+RAIN_SHAPE = 0.8
+
+# Days with at least this much rain count as rainy, in mm
+RAINY_DAY_MM = 1.0
+
+# Growing degree days: base and upper cutoff temperatures in Celsius
+GDD_BASE = 10.0
+GDD_CAP = 30.0
+
+
+def write_weather_history(directory: str, gazetteer: Gazetteer, start: date, days: int,
+                          batch_size: int = 256, seed: Optional[int] = 0) -> Dict:
+    """
+    Simulate daily weather for every gazetteer location and store it.
+
+    Only one batch of locations is held in memory at a time. Both files
+    go into a new version directory, and the CURRENT pointer is swapped to
+    it in one atomic replace at the end, so a reader never sees a
+    half-written store or an array paired with another run's metadata.
+    The previous version is removed afterwards.
+
+    Args:
+        directory: History directory; versions are created inside it
+        gazetteer: Locations to simulate, with their climate
+        start: First day of the series
+        days: Number of days
+        batch_size: Locations simulated per vectorized batch
+        seed: Random seed, or None for fresh entropy
+
+    Returns:
+        Dictionary with location and day counts, size and timing
+    """
+    os.makedirs(directory, exist_ok=True)
+    version = tempfile.mkdtemp(prefix="history-", dir=directory)
+    try:
+        stats = _write_version(version, gazetteer, start, days, batch_size, seed)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+
+    previous = _current_path(directory)
+    pointer = os.path.join(directory, f".{CURRENT_FILE}.{os.path.basename(version)}")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version))
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    # Servers that already mapped the old array keep their open file
+    if previous == directory:
+        for name in (SERIES_FILE, META_FILE):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    elif previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+    stats["path"] = version
+    print(f"Simulated {len(gazetteer)} locations x {days} days in {stats['seconds']:.2f}s "
+          f"({stats['bytes'] / 2**20:.1f} MB)")
+
+    return stats
+
+
+def _write_version(version: str, gazetteer: Gazetteer, start: date, days: int,
+                   batch_size: int, seed: Optional[int]) -> Dict:
+    """Simulate the series into a version directory; see write_weather_history."""
+    series_path = os.path.join(version, SERIES_FILE)
+
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    months = np.array([day.month for day in dates])
+    rain_day_mm = RAIN_DAY_MM[MONTH_SEASON[months]]
+
+    simulator = WeatherSimulator(seed=seed)
+    rng = simulator.rng
+    series = np.lib.format.open_memmap(
+        series_path, mode="w+", dtype=np.float32,
+        shape=(len(gazetteer), days, len(VARIABLES))
+    )
+
+    start_time = time.perf_counter()
+    for low in range(0, len(gazetteer), batch_size):
+        high = min(low + batch_size, len(gazetteer))
+        weather = simulator.simulate_days(
+            gazetteer.base_temp[low:high].astype(np.float64),
+            gazetteer.humidity[low:high].astype(np.float64),
+            months
+        )
+        temperature = weather["temperature"]
+        humidity = weather["humidity"]
+
+        # Humid days swing less between night and day
+        half_range = (14.0 - 0.08 * humidity) / 2
+        wetness = gazetteer.humidity[low:high].mean(axis=1, keepdims=True) / REFERENCE_HUMIDITY
+        rainy = rng.random(temperature.shape) < weather["rain_probability"]
+        amount = rng.gamma(RAIN_SHAPE, wetness * rain_day_mm / RAIN_SHAPE)
+
+        block = series[low:high]
+        block[..., 0] = temperature - half_range
+        block[..., 1] = temperature + half_range
+        block[..., 2] = temperature
+        block[..., 3] = humidity
+        block[..., 4] = np.where(rainy, np.round(amount, 1), 0.0)
+
+    series.flush()
+    del series
+    elapsed = time.perf_counter() - start_time
+
+    meta = {
+        "start": start.isoformat(),
+        "days": days,
+        "variables": list(VARIABLES),
+        "locations": [str(name) for name in gazetteer.names]
+    }
+    with open(os.path.join(version, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    return {
+        "locations": len(gazetteer),
+        "days": days,
+        "bytes": os.path.getsize(series_path),
+        "seconds": round(elapsed, 3)
+    }
+
+
+def _current_path(directory: str) -> Optional[str]:
+    """
+    Directory holding the current version's files, or None if there is none.
+
+    Stores written before version directories existed keep their files
+    directly in `directory`.
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding="utf-8") as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        pass
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        return directory
+    return None
+
+
+class WeatherHistory:
+    """Read-only view of a stored weather history."""
+
+    def __init__(self, path: str):
+        """
+        Open one version of a history written by write_weather_history.
+
+        Args:
+            path: Version directory holding series.npy and meta.json
+
+        Raises:
+            FileNotFoundError: If the version is missing
+            ValueError: If the array does not match its metadata
+        """
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.start = date.fromisoformat(meta["start"])
+        self.days = meta["days"]
+        self.variables = tuple(meta["variables"])
+        self.locations = meta["locations"]
+        self.series = np.load(os.path.join(path, SERIES_FILE), mmap_mode="r")
+        expected = (len(self.locations), self.days, len(self.variables))
+        if self.series.shape != expected:
+            raise ValueError(f"Weather history in {path} has shape {self.series.shape}, "
+                             f"metadata says {expected}")
+
+    @classmethod
+    def open(cls, directory: str) -> Optional["WeatherHistory"]:
+        """The current history in `directory`, or None if none was generated."""
+        # A writer may retire the version between reading CURRENT and
+        # opening its files; the pointer then names a newer one
+        for _ in range(3):
+            path = _current_path(directory)
+            if path is None:
+                return None
+            try:
+                return cls(path)
+            except FileNotFoundError:
+                continue
+        return cls(_current_path(directory))
+
+    @property
+    def end(self) -> date:
+        """Last day covered."""
+        return self.start + timedelta(days=self.days - 1)
+
+    def matches(self, names: Sequence[str]) -> bool:
+        """Whether rows line up with a gazetteer's locations, in order."""
+        return len(names) == len(self.locations) and all(
+            str(name) == stored for name, stored in zip(names, self.locations)
+        )
+
+    def window(self, row: int, first: date, last: date) -> np.ndarray:
+        """
+        Daily values of one location over an inclusive date range.
+
+        Args:
+            row: Location row
+            first: First day
+            last: Last day
+
+        Returns:
+            Read-only (days, variables) view into the memory map
+
+        Raises:
+            ValueError: If the range is empty or outside the stored period
+        """
+        if first > last:
+            raise ValueError("'from' must not be after 'to'")
+        if first < self.start or last > self.end:
+            raise ValueError(f"History covers {self.start.isoformat()} to {self.end.isoformat()}")
+        offset = (first - self.start).days
+        return self.series[row, offset:offset + (last - first).days + 1]
+
+    def summarize(self, window: np.ndarray, gdd_base: float = GDD_BASE) -> Dict[str, float]:
+        """
+        Aggregates over a window returned by window().
+
+        Growing degree days use the capped method: daily minimum and
+        maximum are clipped to [gdd_base, GDD_CAP] before averaging.
+
+        Args:
+            window: (days, variables) daily values
+            gdd_base: Base temperature for growing degree days, Celsius
+
+        Returns:
+            Dictionary of aggregate values
+        """
+        column = {name: window[:, i] for i, name in enumerate(self.variables)}
+        rainfall = column["rainfall"]
+        cap = max(GDD_CAP, gdd_base)
+        daily_gdd = (np.clip(column["temp_min"], gdd_base, cap) +
+                     np.clip(column["temp_max"], gdd_base, cap)) / 2 - gdd_base
+        return {
+            "rainfall_total_mm": round(float(rainfall.sum(dtype=np.float64)), 1),
+            "rainy_days": int(np.count_nonzero(rainfall >= RAINY_DAY_MM)),
+            "max_daily_rainfall_mm": round(float(rainfall.max()), 1),
+            "growing_degree_days": round(float(daily_gdd.sum(dtype=np.float64)), 1),
+            "mean_temperature": round(float(column["temp_mean"].mean(dtype=np.float64)), 1),
+            "min_temperature": round(float(column["temp_min"].min()), 1),
+            "max_temperature": round(float(column["temp_max"].max()), 1),
+            "mean_humidity": round(float(column["humidity"].mean(dtype=np.float64)), 1)
+        }
+
+    def query(self, row: int, first: date, last: date,
+              gdd_base: float = GDD_BASE) -> Dict:
+        """
+        Daily series and aggregates of one location over a date range.
+
+        Rows are gazetteer rows, so locations sharing a display name stay
+        distinct.
+
+        Args:
+            row: Gazetteer row of the location
+            first: First day
+            last: Last day
+            gdd_base: Base temperature for growing degree days, Celsius
+
+        Returns:
+            Dictionary with the range, aggregates and the daily series as
+            parallel columns
+
+        Raises:
+            LookupError: If the location is not in the history
+            ValueError: If the range is empty or outside the stored period
+        """
+        if not 0 <= row < len(self.locations):
+            raise LookupError(f"No weather history for location row {row}")
+        window = self.window(row, first, last)
+
+        daily = {"date": [(first + timedelta(days=i)).isoformat() for i in range(len(window))]}
+        for i, variable in enumerate(self.variables):
+            # Round in float64: float32 values print as e.g. 17.899999618530273
+            daily[variable] = np.round(window[:, i].astype(np.float64), 1).tolist()
+
+        return {
+            "location": self.locations[row],
+            "from": first.isoformat(),
+            "to": last.isoformat(),
+            "days": len(window),
+            "gdd_base": gdd_base,
+            "summary": self.summarize(window, gdd_base),
+            "daily": daily
+        }
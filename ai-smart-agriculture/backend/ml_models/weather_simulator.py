@@ -1,15 +1,100 @@
 """
 Weather Simulator - Generates realistic weather data without external APIs.
+
+Forecasts for a whole horizon are generated in one vectorized pass. The
+daily random draws follow an AR(1) process, so consecutive days are
+correlated, and every day uses its own month's seasonal pattern.
 """
-import random
-import math
-from datetime import datetime
-from typing import Dict, Tuple
+import numpy as np
+from datetime import date, datetime, timedelta
+from scipy.signal import lfilter
+from scipy.special import ndtr
+from typing import Dict, List, Optional, Tuple
+from ml_models.gazetteer import Gazetteer
+
+# Seasonal temperature adjustment in Celsius by month (index 1-12),
+# Northern Hemisphere (India)
+SEASONAL_ADJUSTMENT = np.array([
+    0,
+    -3,  # January - Winter
+    -1,  # February - Late Winter
+    2,   # March - Spring
+    5,   # April - Late Spring
+    7,   # May - Summer
+    6,   # June - Monsoon starts
+    4,   # July - Monsoon
+    3,   # August - Monsoon
+    2,   # September - Post-monsoon
+    0,   # October - Autumn
+    -2,  # November - Early Winter
+    -4   # December - Winter
+], dtype=np.float64)
+
+# Rainfall seasons and the season of each month (index 1-12)
+MONSOON, WINTER, SUMMER, POST_MONSOON = 0, 1, 2, 3
+MONTH_SEASON = np.array([
+    WINTER, WINTER, WINTER, SUMMER, SUMMER, SUMMER, MONSOON,
+    MONSOON, MONSOON, MONSOON, POST_MONSOON, POST_MONSOON, WINTER
+])
+
+# Range of the daily rain probability in each season
+RAIN_PROBABILITY_RANGES = np.array([
+    (0.6, 0.9),    # Monsoon (June-September)
+    (0.1, 0.3),    # Winter (December-February)
+    (0.15, 0.4),   # Summer (March-May)
+    (0.3, 0.5)     # Post-monsoon (October-November)
+])
+
+# Rainfall prediction text, indexed by WeatherSimulator._rain_codes
+RAIN_PREDICTIONS = np.array([
+    "Heavy Rain Expected", "Moderate Rain", "Light Showers",   # Monsoon
+    "Clear Sky", "Possible Light Rain",                         # Winter
+    "Mostly Dry", "Scattered Showers",                          # Summer
+    "Partly Cloudy", "Moderate Rain"                            # Post-monsoon
+], dtype=object)
+HEAVY_RAIN, CLEAR_SKY, MOSTLY_DRY = 0, 3, 5
+
+# Irrigation advice, indexed by WeatherSimulator._irrigation_codes
+IRRIGATION_ADVICE = np.array([
+    "Hold irrigation. Heavy rainfall expected. Ensure proper drainage.",
+    "Reduce irrigation by 50%. Moderate rain expected soon.",
+    "Reduce irrigation by 30%. Monitor weather for possible showers.",
+    "Increase irrigation by 40%. Hot and dry conditions require more water.",
+    "Increase irrigation by 20%. Warm weather increases water demand.",
+    "Maintain normal irrigation schedule. Good moisture retention expected.",
+    "Continue regular irrigation schedule. Weather conditions are favorable."
+], dtype=object)
+
+# Farming tips by kind; index 0 of each is "no tip"
+TEMPERATURE_TIPS = ("", "Apply mulch to protect crops from heat stress.",
+                    "Protect sensitive crops from cold temperatures.")
+RAIN_TIPS = ("", "Postpone fertilizer application. Avoid pesticide spraying.",
+             "Good time for pesticide and fungicide application.")
+HUMIDITY_TIPS = ("", "High humidity increases fungal disease risk. Monitor crops closely.",
+                 "Low humidity may cause stress. Ensure adequate irrigation.")
+SEASON_TIPS = ("Ensure proper drainage to prevent waterlogging.", "",
+               "Consider shade nets for sensitive crops.", "Good time for sowing winter crops.")
+
+# Every combination of tips, joined once: indexed by
+# [temperature tip, rain tip, humidity tip, season]
+FARMING_TIPS = np.array([
+    [[[" ".join(filter(None, (t, r, h, s))) or "Monitor weather regularly for best results."
+       for s in SEASON_TIPS] for h in HUMIDITY_TIPS] for r in RAIN_TIPS] for t in TEMPERATURE_TIPS
+], dtype=object)
+
+# Daily temperature variation around the seasonal value, in Celsius
+DAILY_VARIATION = (-3.0, 5.0)
+
+
+def _first_match(conditions: List[np.ndarray]) -> np.ndarray:
+    """Index of the first true condition per element (len(conditions) if none)."""
+    stacked = np.stack(conditions)
+    return np.where(stacked.any(axis=0), stacked.argmax(axis=0), len(conditions))
 
 
 class WeatherSimulator:
     """Simulates realistic weather conditions for agricultural advice."""
-    
+
     # City base temperatures (annual average in Celsius)
     CITY_BASE_TEMPS = {
         "delhi": 25, "mumbai": 27, "bangalore": 24, "chennai": 29,
@@ -18,222 +103,274 @@ class WeatherSimulator:
         "bhopal": 25, "patna": 26, "ludhiana": 23, "agra": 26,
         "nashik": 25, "vadodara": 28, "rajkot": 27, "default": 26
     }
-    
+
     # Regional humidity patterns
     CITY_HUMIDITY = {
         "mumbai": (70, 90), "chennai": (65, 85), "kolkata": (65, 85),
         "bangalore": (55, 75), "hyderabad": (50, 70), "pune": (50, 70),
         "delhi": (40, 70), "jaipur": (35, 65), "default": (50, 75)
     }
-    
-    def __init__(self):
-        """Initialize weather simulator."""
-        random.seed()
-    
-    def _get_seasonal_adjustment(self) -> float:
-        """
-        Calculate seasonal temperature adjustment based on current month.
-        Returns adjustment in Celsius.
-        """
-        month = datetime.now().month
-        
-        # Seasonal pattern for Northern Hemisphere (India)
-        seasonal_pattern = {
-            1: -3,   # January - Winter
-            2: -1,   # February - Late Winter
-            3: 2,    # March - Spring
-            4: 5,    # April - Late Spring
-            5: 7,    # May - Summer
-            6: 6,    # June - Monsoon starts
-            7: 4,    # July - Monsoon
-            8: 3,    # August - Monsoon
-            9: 2,    # September - Post-monsoon
-            10: 0,   # October - Autumn
-            11: -2,  # November - Early Winter
-            12: -4   # December - Winter
-        }
-        
-        return seasonal_pattern.get(month, 0)
-    
-    def _get_rainfall_probability(self) -> Tuple[float, str]:
-        """
-        Get rainfall probability and prediction based on season.
-        Returns (probability, prediction_text).
-        """
-        month = datetime.now().month
-        
-        # Monsoon months (June-September)
-        if month in [6, 7, 8, 9]:
-            probability = random.uniform(0.6, 0.9)
-            if probability > 0.8:
-                prediction = "Heavy Rain Expected"
-            elif probability > 0.65:
-                prediction = "Moderate Rain"
+
+    # Lag-one correlation of each day's weather with the previous day's
+    DAY_CORRELATION = 0.7
+
+    def __init__(self, seed: Optional[int] = None, gazetteer: Optional[Gazetteer] = None):
+        """
+        Initialize weather simulator.
+
+        Args:
+            seed: Random seed for reproducible weather (None for fresh entropy)
+            gazetteer: Known locations beyond the built-in cities; names,
+                aliases and "lat,lon" queries resolve through it
+        """
+        self.rng = np.random.default_rng(seed)
+        self.gazetteer = gazetteer
+
+    def _climate(self, locations: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Base temperature and humidity range of each location.
+
+        Built-in cities come first, then the gazetteer (by name or alias, or
+        the nearest known place for "lat,lon"); anything else is "default".
+
+        Returns:
+            Tuple of (base temperatures (N,), humidity ranges (N, 2))
+        """
+        base_temps = np.empty(len(locations))
+        humidity_ranges = np.empty((len(locations), 2))
+        for i, location in enumerate(locations):
+            key = location.lower()
+            row = None
+            if key not in self.CITY_BASE_TEMPS and self.gazetteer is not None:
+                row = self.gazetteer.resolve(location)
+            if row is not None:
+                base_temps[i] = self.gazetteer.base_temp[row]
+                humidity_ranges[i] = self.gazetteer.humidity[row]
             else:
-                prediction = "Light Showers"
-        
-        # Winter months (December-February)
-        elif month in [12, 1, 2]:
-            probability = random.uniform(0.1, 0.3)
-            prediction = "Clear Sky" if probability < 0.2 else "Possible Light Rain"
-        
-        # Summer months (March-May)
-        elif month in [3, 4, 5]:
-            probability = random.uniform(0.15, 0.4)
-            prediction = "Mostly Dry" if probability < 0.25 else "Scattered Showers"
-        
-        # Post-monsoon (October-November)
-        else:
-            probability = random.uniform(0.3, 0.5)
-            prediction = "Partly Cloudy" if probability < 0.4 else "Moderate Rain"
-        
-        return probability, prediction
-    
-    def _generate_irrigation_advice(self, rain_probability: float, 
-                                    temperature: float, humidity: float) -> str:
-        """
-        Generate irrigation advice based on weather conditions.
-        
+                base_temps[i] = self.CITY_BASE_TEMPS.get(key, self.CITY_BASE_TEMPS["default"])
+                humidity_ranges[i] = self.CITY_HUMIDITY.get(key, self.CITY_HUMIDITY["default"])
+        return base_temps, humidity_ranges
+
+    def _correlated_uniforms(self, shape: tuple) -> np.ndarray:
+        """
+        Uniform(0, 1) draws that are AR(1)-correlated along the last axis.
+
+        Standard normal innovations are filtered into a stationary AR(1)
+        series with unit variance and mapped through the normal CDF, so
+        each day keeps the uniform distribution the simulator has always
+        drawn from while following the previous day.
+        """
+        phi = self.DAY_CORRELATION
+        scale = np.sqrt(1 - phi * phi)
+        innovations = self.rng.standard_normal(shape)
+        # Start each series from the stationary distribution
+        innovations[..., 0] /= scale
+        series = lfilter([scale], [1, -phi], innovations, axis=-1)
+        return ndtr(series)
+
+    def simulate_days(self, base_temps: np.ndarray, humidity_ranges: np.ndarray,
+                      months: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Numeric daily weather for locations with known climate, in one pass.
+
+        Args:
+            base_temps: Annual average temperature of each location, shape (N,)
+            humidity_ranges: (low, high) humidity of each location, shape (N, 2)
+            months: Month (1-12) of each day, shape (days,)
+
+        Returns:
+            Dictionary of arrays of shape (N, days): temperature, humidity and
+            rain_probability (0-1)
+        """
+        seasons = MONTH_SEASON[months]
+        temp_draw, humidity_draw, rain_draw = self._correlated_uniforms(
+            (3, len(base_temps), len(months))
+        )
+
+        low, high = DAILY_VARIATION
+        temperature = np.round(
+            base_temps[:, None] + SEASONAL_ADJUSTMENT[months] + low + (high - low) * temp_draw, 1
+        )
+        humidity = np.round(
+            humidity_ranges[:, :1] + np.diff(humidity_ranges, axis=1) * humidity_draw, 1
+        )
+        rain_low, rain_high = RAIN_PROBABILITY_RANGES[seasons].T
+        rain_probability = rain_low + (rain_high - rain_low) * rain_draw
+        return {"temperature": temperature, "humidity": humidity,
+                "rain_probability": rain_probability}
+
+    def forecast_arrays(self, locations: List[str], days: int,
+                        start: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """
+        Generate weather for several locations over a horizon, as arrays.
+
+        Args:
+            locations: City names or location identifiers
+            days: Number of days, starting at `start`
+            start: First forecast day (default today)
+
+        Returns:
+            Dictionary of arrays of shape (len(locations), days): temperature,
+            humidity, rain_probability (0-1), rain_prediction,
+            irrigation_advice and farming_tips; plus "dates" of shape (days,)
+        """
+        start = start or date.today()
+        dates = [start + timedelta(days=offset) for offset in range(days)]
+        months = np.array([day.month for day in dates])
+        seasons = MONTH_SEASON[months]
+
+        weather = self.simulate_days(*self._climate(locations), months)
+        temperature = weather["temperature"]
+        humidity = weather["humidity"]
+        rain_probability = weather["rain_probability"]
+
+        rain_codes = self._rain_codes(rain_probability, seasons)
+        irrigation_codes = self._irrigation_codes(rain_probability, temperature, humidity)
+        return {
+            "dates": np.array(dates),
+            "temperature": temperature,
+            "humidity": humidity,
+            "rain_probability": rain_probability,
+            "rain_prediction": RAIN_PREDICTIONS[rain_codes],
+            "irrigation_advice": IRRIGATION_ADVICE[irrigation_codes],
+            "farming_tips": self._farming_tips(temperature, rain_codes, humidity, seasons)
+        }
+
+    @staticmethod
+    def _rain_codes(probability: np.ndarray, seasons: np.ndarray) -> np.ndarray:
+        """
+        Index into RAIN_PREDICTIONS for each day.
+
+        Args:
+            probability: Rain probabilities (0-1), shape (..., days)
+            seasons: Season of each day, shape (days,)
+
+        Returns:
+            Integer array shaped like `probability`
+        """
+        seasons = np.broadcast_to(seasons, probability.shape)
+        monsoon = seasons == MONSOON
+        winter = seasons == WINTER
+        summer = seasons == SUMMER
+        return _first_match([
+            monsoon & (probability > 0.8), monsoon & (probability > 0.65), monsoon,
+            winter & (probability < 0.2), winter,
+            summer & (probability < 0.25), summer,
+            probability < 0.4
+        ])
+
+    @staticmethod
+    def _irrigation_codes(rain_probability: np.ndarray, temperature: np.ndarray,
+                          humidity: np.ndarray) -> np.ndarray:
+        """
+        Index into IRRIGATION_ADVICE based on weather conditions.
+
         Args:
             rain_probability: Probability of rain (0-1)
             temperature: Temperature in Celsius
             humidity: Humidity percentage
-            
+
         Returns:
-            Irrigation advice string
-        """
-        # Heavy rain expected
-        if rain_probability > 0.7:
-            return "Hold irrigation. Heavy rainfall expected. Ensure proper drainage."
-        
-        # Moderate rain expected
-        elif rain_probability > 0.5:
-            return "Reduce irrigation by 50%. Moderate rain expected soon."
-        
-        # Light rain possibility
-        elif rain_probability > 0.3:
-            return "Reduce irrigation by 30%. Monitor weather for possible showers."
-        
-        # Hot and dry conditions
-        elif temperature > 35 and humidity < 40:
-            return "Increase irrigation by 40%. Hot and dry conditions require more water."
-        
-        # Hot conditions
-        elif temperature > 30 and humidity < 50:
-            return "Increase irrigation by 20%. Warm weather increases water demand."
-        
-        # Moderate humidity
-        elif humidity > 70:
-            return "Maintain normal irrigation schedule. Good moisture retention expected."
-        
-        # Normal conditions
-        else:
-            return "Continue regular irrigation schedule. Weather conditions are favorable."
-    
-    def _generate_farming_tips(self, temperature: float, rain_prediction: str, 
-                               humidity: float) -> str:
-        """Generate farming tips based on weather conditions."""
-        month = datetime.now().month
-        tips = []
-        
-        # Temperature-based tips
-        if temperature > 35:
-            tips.append("Apply mulch to protect crops from heat stress.")
-        elif temperature < 15:
-            tips.append("Protect sensitive crops from cold temperatures.")
-        
-        # Rain-based tips
-        if "Heavy" in rain_prediction:
-            tips.append("Postpone fertilizer application. Avoid pesticide spraying.")
-        elif "Clear" in rain_prediction or "Dry" in rain_prediction:
-            tips.append("Good time for pesticide and fungicide application.")
-        
-        # Humidity-based tips
-        if humidity > 80:
-            tips.append("High humidity increases fungal disease risk. Monitor crops closely.")
-        elif humidity < 30:
-            tips.append("Low humidity may cause stress. Ensure adequate irrigation.")
-        
-        # Seasonal tips
-        if month in [6, 7, 8, 9]:  # Monsoon
-            tips.append("Ensure proper drainage to prevent waterlogging.")
-        elif month in [3, 4, 5]:  # Summer
-            tips.append("Consider shade nets for sensitive crops.")
-        elif month in [10, 11]:  # Post-monsoon
-            tips.append("Good time for sowing winter crops.")
-        
-        return " ".join(tips) if tips else "Monitor weather regularly for best results."
-    
+            Integer array of advice indices
+        """
+        return _first_match([
+            rain_probability > 0.7,                    # Heavy rain expected
+            rain_probability > 0.5,                    # Moderate rain expected
+            rain_probability > 0.3,                    # Light rain possibility
+            (temperature > 35) & (humidity < 40),      # Hot and dry conditions
+            (temperature > 30) & (humidity < 50),      # Hot conditions
+            humidity > 70                              # Moderate humidity
+        ])
+
+    @staticmethod
+    def _farming_tips(temperature: np.ndarray, rain_codes: np.ndarray,
+                      humidity: np.ndarray, seasons: np.ndarray) -> np.ndarray:
+        """Look up farming tips for weather conditions and season."""
+        # _first_match gives 2 when neither tip applies; rotate so that is index 0
+        temperature_tip = (_first_match([temperature > 35, temperature < 15]) + 1) % 3
+        rain_tip = (_first_match([rain_codes == HEAVY_RAIN,
+                                  (rain_codes == CLEAR_SKY) | (rain_codes == MOSTLY_DRY)]) + 1) % 3
+        humidity_tip = (_first_match([humidity > 80, humidity < 30]) + 1) % 3
+        return FARMING_TIPS[temperature_tip, rain_tip, humidity_tip, seasons]
+
+    def get_forecast(self, location: str = "default", days: int = 7,
+                     start: Optional[date] = None) -> List[Dict]:
+        """
+        Generate a day-by-day forecast for a location.
+
+        Args:
+            location: City name or location identifier
+            days: Forecast horizon in days
+            start: First forecast day (default today)
+
+        Returns:
+            List of daily weather predictions
+        """
+        arrays = self.forecast_arrays([location], days, start)
+        timestamp = datetime.now().isoformat()
+        name = location.title()
+
+        return [
+            {
+                "day": offset + 1,
+                "date": arrays["dates"][offset].isoformat(),
+                "location": name,
+                "temperature": float(arrays["temperature"][0, offset]),
+                "humidity": float(arrays["humidity"][0, offset]),
+                "rain_prediction": arrays["rain_prediction"][0, offset],
+                "rain_probability": round(float(arrays["rain_probability"][0, offset]) * 100, 1),
+                "irrigation_advice": arrays["irrigation_advice"][0, offset],
+                "farming_tips": arrays["farming_tips"][0, offset],
+                "timestamp": timestamp
+            }
+            for offset in range(days)
+        ]
+
     def get_weather(self, location: str = "default") -> Dict:
         """
         Generate simulated weather data for a location.
-        
+
         Args:
             location: City name or location identifier
-            
+
         Returns:
             Dictionary with weather information
         """
-        location_lower = location.lower()
-        
-        # Get base temperature for location
-        base_temp = self.CITY_BASE_TEMPS.get(location_lower, 
-                                              self.CITY_BASE_TEMPS["default"])
-        
-        # Apply seasonal adjustment
-        seasonal_adj = self._get_seasonal_adjustment()
-        
-        # Add daily variation
-        daily_variation = random.uniform(-3, 5)
-        
-        # Calculate final temperature
-        temperature = round(base_temp + seasonal_adj + daily_variation, 1)
-        
-        # Get humidity range for location
-        humidity_range = self.CITY_HUMIDITY.get(location_lower,
-                                                self.CITY_HUMIDITY["default"])
-        humidity = round(random.uniform(humidity_range[0], humidity_range[1]), 1)
-        
-        # Get rainfall prediction
-        rain_probability, rain_prediction = self._get_rainfall_probability()
-        
-        # Generate irrigation advice
-        irrigation_advice = self._generate_irrigation_advice(
-            rain_probability, temperature, humidity
-        )
-        
-        # Generate farming tips
-        farming_tips = self._generate_farming_tips(
-            temperature, rain_prediction, humidity
-        )
-        
+        weather = self.get_forecast(location, days=1)[0]
+        del weather["day"], weather["date"]
+        return weather
+
+    def get_weather_columns(self, locations: List[str]) -> Dict[str, list]:
+        """
+        Generate today's weather for many locations at once.
+
+        Args:
+            locations: City names or location identifiers
+
+        Returns:
+            Dictionary of equal-length lists, one entry per location: location,
+            temperature, humidity, rain_prediction, rain_probability (percent),
+            irrigation_advice and farming_tips
+        """
+        arrays = self.forecast_arrays(locations, days=1)
         return {
-            "location": location.title(),
-            "temperature": temperature,
-            "humidity": humidity,
-            "rain_prediction": rain_prediction,
-            "rain_probability": round(rain_probability * 100, 1),
-            "irrigation_advice": irrigation_advice,
-            "farming_tips": farming_tips,
-            "timestamp": datetime.now().isoformat()
+            "location": [location.title() for location in locations],
+            "temperature": arrays["temperature"][:, 0].tolist(),
+            "humidity": arrays["humidity"][:, 0].tolist(),
+            "rain_prediction": arrays["rain_prediction"][:, 0].tolist(),
+            "rain_probability": np.round(arrays["rain_probability"][:, 0] * 100, 1).tolist(),
+            "irrigation_advice": arrays["irrigation_advice"][:, 0].tolist(),
+            "farming_tips": arrays["farming_tips"][:, 0].tolist()
         }
-    
+
     def get_weekly_forecast(self, location: str = "default") -> list:
         """
         Generate a 7-day weather forecast.
-        
+
         Args:
             location: City name or location identifier
-            
+
         Returns:
             List of daily weather predictions
         """
-        forecast = []
-        
-        for day in range(7):
-            # Simulate slight correlation between days
-            weather = self.get_weather(location)
-            weather["day"] = day + 1
-            forecast.append(weather)
-        
-        return forecast
+        return self.get_forecast(location, days=7)
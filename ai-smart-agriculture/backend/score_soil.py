@@ -0,0 +1,246 @@
+"""
+Bulk crop recommendations for soil lab CSV exports.
+
+Reads the input in chunks, scores each chunk with the soil model on a pool
+of worker processes and appends the results to an output CSV in input
+order. Only a bounded number of chunks is in flight at any time, so memory
+use does not grow with the file size.
+
+The input needs nitrogen, phosphorus, potassium, ph and rainfall columns
+(N, P, K and pH are accepted too, in any case); other columns are copied to
+the output. Rows with missing or out-of-range values are written without a
+recommendation.
+
+Usage:
+    python score_soil.py samples.csv [-o scored.csv] [--workers 4] [--record]
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app.schemas.prediction import SoilInput
+from app.services.rollups import save_predictions
+from ml_models.soil_model import SoilRecommendationModel
+
+# Model feature order, and lab export headers accepted for each feature
+SOIL_COLUMNS = ["nitrogen", "phosphorus", "potassium", "ph", "rainfall"]
+COLUMN_ALIASES = {"n": "nitrogen", "p": "phosphorus", "k": "potassium"}
+
+# Model of this worker process, loaded by _init_worker
+_worker_model: Optional[SoilRecommendationModel] = None
+
+
+def _init_worker(engine: str):
+    """Load the soil model once per worker process."""
+    global _worker_model
+    _worker_model = SoilRecommendationModel(engine=engine)
+
+
+def _score_features(features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score a chunk in whichever process runs this.
+
+    Args:
+        features: (N, 5) valid soil samples in SOIL_COLUMNS order
+
+    Returns:
+        Tuple of (best class index per row, its probability)
+    """
+    probabilities = _worker_model.predict_probabilities(features)
+    best = probabilities.argmax(axis=1)
+    return best.astype(np.int16), probabilities[np.arange(len(best)), best]
+
+
+def _soil_bounds() -> np.ndarray:
+    """(5, 2) lower and upper bounds of each feature, as validated by the API."""
+    bounds = []
+    for name in SOIL_COLUMNS:
+        metadata = SoilInput.model_fields[name].metadata
+        bounds.append([
+            next(m.ge for m in metadata if hasattr(m, "ge")),
+            next(m.le for m in metadata if hasattr(m, "le"))
+        ])
+    return np.array(bounds, dtype=np.float64)
+
+
+def _feature_columns(header: List[str]) -> List[str]:
+    """
+    Input column holding each soil feature.
+
+    Raises:
+        ValueError: If a feature has no column
+    """
+    by_name = {}
+    for column in header:
+        key = column.strip().lower()
+        by_name.setdefault(COLUMN_ALIASES.get(key, key), column)
+    missing = [name for name in SOIL_COLUMNS if name not in by_name]
+    if missing:
+        raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+    return [by_name[name] for name in SOIL_COLUMNS]
+
+
+class ChunkScorer:
+    """Turns model outputs into output columns and prediction rows."""
+
+    def __init__(self, model: SoilRecommendationModel):
+        crops = [str(crop) for crop in model.classes]
+        info = [model.CROP_INFO.get(crop, model.DEFAULT_CROP_INFO) for crop in crops]
+        self.crops = np.array([crop.title() for crop in crops], dtype=object)
+        self.fertilizer = np.array([i["fertilizer"] for i in info], dtype=object)
+        self.tips = [i["tips"] for i in info]
+        self.bounds = _soil_bounds()
+
+    def valid_rows(self, features: np.ndarray) -> np.ndarray:
+        """Mask of rows with every feature present and in range."""
+        return ((features >= self.bounds[:, 0]) & (features <= self.bounds[:, 1])).all(axis=1)
+
+    def annotate(self, chunk: pd.DataFrame, valid: np.ndarray,
+                 best: np.ndarray, confidence: np.ndarray) -> pd.DataFrame:
+        """Append recommendation columns; invalid rows are left empty."""
+        crop = np.full(len(chunk), None, dtype=object)
+        fertilizer = np.full(len(chunk), None, dtype=object)
+        score = np.full(len(chunk), np.nan)
+        crop[valid] = self.crops[best]
+        fertilizer[valid] = self.fertilizer[best]
+        score[valid] = np.round(confidence, 2)
+        return chunk.assign(recommended_crop=crop, confidence=score, fertilizer_advice=fertilizer)
+
+    def prediction_rows(self, features: np.ndarray, best: np.ndarray,
+                        confidence: np.ndarray, created_at: datetime) -> List[Dict]:
+        """Column dicts for Prediction, shaped like the API's soil rows."""
+        rows = []
+        for sample, index, score in zip(features.tolist(), best.tolist(),
+                                        np.round(confidence, 2).tolist()):
+            result = {
+                "recommended_crop": self.crops[index],
+                "fertilizer_advice": self.fertilizer[index],
+                "confidence": score,
+                "additional_tips": self.tips[index]
+            }
+            rows.append({
+                "prediction_type": "soil",
+                "input_data": dict(zip(SOIL_COLUMNS, sample)),
+                "result": result,
+                "confidence": score,
+                "created_at": created_at
+            })
+        return rows
+
+
+def score_file(input_path: str, output_path: str, chunk_size: int, workers: int,
+               engine: str, record: bool = False) -> Dict:
+    """
+    Score a soil CSV into an output CSV.
+
+    Args:
+        input_path: Input CSV
+        output_path: Output CSV, overwritten
+        chunk_size: Rows per chunk
+        workers: Worker processes; 0 scores in this process
+        engine: Soil inference engine
+        record: Also store every scored row in the predictions table
+
+    Returns:
+        Dictionary with row counts and timing
+    """
+    # Load (or train and save) the model before workers start, so they
+    # all read the finished artifact
+    model = SoilRecommendationModel(engine=engine)
+    scorer = ChunkScorer(model)
+    header = pd.read_csv(input_path, nrows=0).columns.tolist()
+    feature_columns = _feature_columns(header)
+
+    db = None
+    if record:
+        init_db()
+        db = SessionLocal()
+
+    pool = None
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(engine,))
+    else:
+        _init_worker(engine)
+
+    totals = {"rows": 0, "scored": 0, "skipped": 0, "recorded": 0}
+    started = time.perf_counter()
+    # Chunks waiting for their scores, oldest first; at most two per worker
+    pending = deque()
+    max_pending = max(1, 2 * workers)
+
+    def finish_oldest():
+        chunk, features, valid, future = pending.popleft()
+        best, confidence = future.result() if pool else future
+        chunk = scorer.annotate(chunk, valid, best, confidence)
+        chunk.to_csv(output_path, mode="a", header=totals["rows"] == 0, index=False)
+        if db is not None:
+            rows = scorer.prediction_rows(features[valid], best, confidence,
+                                          datetime.now(timezone.utc))
+            save_predictions(db, rows)
+            totals["recorded"] += len(rows)
+
+        totals["rows"] += len(chunk)
+        totals["scored"] += int(valid.sum())
+        totals["skipped"] += int((~valid).sum())
+        elapsed = time.perf_counter() - started
+        print(f"  {totals['rows']} rows, {totals['rows'] / elapsed:.0f} rows/s", flush=True)
+
+    try:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+            features = chunk[feature_columns].apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+            valid = scorer.valid_rows(features)
+            # Only the feature array crosses the process boundary
+            if pool:
+                work = pool.submit(_score_features, features[valid])
+            else:
+                work = _score_features(features[valid])
+            pending.append((chunk, features, valid, work))
+            if len(pending) >= max_pending:
+                finish_oldest()
+        while pending:
+            finish_oldest()
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        if db is not None:
+            db.close()
+
+    totals["seconds"] = round(time.perf_counter() - started, 3)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a soil lab CSV with the crop recommendation model")
+    parser.add_argument("input", help="Input CSV with nitrogen, phosphorus, potassium, ph, rainfall")
+    parser.add_argument("-o", "--output", help="Output CSV (default: <input>_scored.csv)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (0 scores in this process)")
+    parser.add_argument("--engine", default=settings.SOIL_INFERENCE_ENGINE,
+                        choices=SoilRecommendationModel.ENGINES, help="Soil inference engine")
+    parser.add_argument("--record", action="store_true",
+                        help="Also store the predictions (and statistics) in the database")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + "_scored.csv"
+    totals = score_file(args.input, output, args.chunk_size, args.workers, args.engine, args.record)
+
+    rate = totals["rows"] / totals["seconds"] if totals["seconds"] else 0.0
+    print(f"Scored {totals['scored']} rows ({totals['skipped']} skipped) "
+          f"in {totals['seconds']:.2f}s, {rate:.0f} rows/s -> {output}")
+    if args.record:
+        print(f"Recorded {totals['recorded']} predictions")
+
+
+if __name__ == "__main__":
+    main()
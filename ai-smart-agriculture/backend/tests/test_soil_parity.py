@@ -0,0 +1,46 @@
+"""
+The compiled soil forest must reproduce sklearn's probabilities bit for bit.
+"""
+import numpy as np
+import pytest
+from ml_models.model_artifact import load_forest_artifact, save_forest_artifact
+from ml_models.soil_model import SoilRecommendationModel
+from ml_models.tree_engine import CompiledForest
+
+# Fixed soil samples: typical values, range edges and split-prone decimals
+SAMPLES = np.array([
+    [90, 42, 43, 6.5, 202.5],
+    [0, 0, 0, 0, 0],
+    [200, 200, 200, 14, 500],
+    [20.8, 134.2, 199.9, 5.9, 64.7],
+    [60.1, 55.5, 44.4, 7.25, 140.3],
+    [120, 10, 35, 4.5, 1000 / 3],
+])
+
+
+@pytest.fixture(scope="module")
+def forests(tmp_path_factory):
+    """The production forest and its compiled copy, loaded from an artifact."""
+    model = SoilRecommendationModel(load=False)
+    estimator = model._new_forest()
+    estimator.fit(*model._generate_synthetic_data(2000))
+
+    path = str(tmp_path_factory.mktemp("artifact") / "soil_model")
+    save_forest_artifact(path, CompiledForest.from_sklearn(estimator),
+                         estimator.feature_importances_)
+    return estimator, load_forest_artifact(path)[0]
+
+
+def test_batched_matches_sklearn(forests):
+    estimator, compiled = forests
+    features = np.vstack([SAMPLES, compiled.boundary_samples(SAMPLES)])
+    np.testing.assert_array_equal(compiled.predict_proba(features),
+                                  estimator.predict_proba(features))
+
+
+def test_single_sample_matches_sklearn(forests):
+    estimator, compiled = forests
+    features = np.vstack([SAMPLES, compiled.boundary_samples(SAMPLES)[::50]])
+    expected = estimator.predict_proba(features)
+    for sample, row in zip(features, expected):
+        np.testing.assert_array_equal(compiled.predict_proba_one(sample), row)